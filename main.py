@@ -2,13 +2,34 @@ from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from warehouse.warehouse_route import warehouse_router
 from fastapi.middleware.cors import CORSMiddleware
+from services.airtable.airtable_client import init_airtable_client, close_airtable_client
+from services.geolocation.geocoding import init_geocoding_client, close_geocoding_client
+from services.cache.redis_cache import close_redis_cache
+from services.geolocation.driving_cache import close_driving_cache
+from services.geolocation.drive_time_grid import load_drive_time_grid
+from services.geolocation.geolocation_service import shutdown_google_maps_executor
+from services.geolocation.zip_centroids import get_zip_centroids
+from warehouse.warehouse_service import load_warehouse_snapshot, start_request_replica_sync, stop_request_replica_sync
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    #await cache_warehouses()
+    await init_airtable_client()
+    await init_geocoding_client()
+    # Load the offline ZIP table now, so a missing one is reported at startup rather than on the first search
+    get_zip_centroids()
+    # Serve searches from the last persisted snapshot until the first Airtable sync completes
+    await load_warehouse_snapshot()
+    await load_drive_time_grid()
+    start_request_replica_sync()
     print("Caching..")
     yield
     print("App is shutting down...")
+    await stop_request_replica_sync()
+    await close_airtable_client()
+    await close_geocoding_client()
+    close_driving_cache()
+    close_redis_cache()
+    shutdown_google_maps_executor()
 
 
 app = FastAPI(title="jsm-warehousenow", lifespan=lifespan)
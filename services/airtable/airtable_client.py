@@ -0,0 +1,146 @@
+import os
+import random
+import asyncio
+import importlib.util
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+from services.airtable.rate_limiter import INTERACTIVE, TokenBucket
+
+load_dotenv()
+
+AIRTABLE_TOKEN = os.getenv("AIRTABLE_TOKEN")
+BASE_ID = os.getenv("BASE_ID")
+AIRTABLE_API_URL = "https://api.airtable.com/v0"
+
+# Connection pool tuning (all optional)
+AIRTABLE_MAX_CONNECTIONS = int(os.getenv("AIRTABLE_MAX_CONNECTIONS", "20"))
+AIRTABLE_MAX_KEEPALIVE = int(os.getenv("AIRTABLE_MAX_KEEPALIVE", "10"))
+AIRTABLE_KEEPALIVE_EXPIRY = float(os.getenv("AIRTABLE_KEEPALIVE_EXPIRY", "30"))
+AIRTABLE_TIMEOUT = float(os.getenv("AIRTABLE_TIMEOUT", "15"))
+AIRTABLE_CONNECT_TIMEOUT = float(os.getenv("AIRTABLE_CONNECT_TIMEOUT", "5"))
+
+# Airtable allows 5 requests/second per base; 429s block the base for ~30 seconds
+AIRTABLE_RATE_LIMIT = float(os.getenv("AIRTABLE_RATE_LIMIT", "5"))
+AIRTABLE_BURST = float(os.getenv("AIRTABLE_BURST", "5"))
+AIRTABLE_MAX_RETRIES = int(os.getenv("AIRTABLE_MAX_RETRIES", "3"))
+AIRTABLE_MAX_BACKOFF = float(os.getenv("AIRTABLE_MAX_BACKOFF", "30"))
+
+# HTTP/2 needs the optional `h2` package (pip install httpx[http2])
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_client: Optional[httpx.AsyncClient] = None
+_rate_limiters: Dict[str, TokenBucket] = {}
+
+
+class AirtableRateLimited(Exception):
+    """Airtable kept answering 429 after every retry."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Airtable rate limit exceeded; retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+def get_rate_limiter(base_id: Optional[str] = None) -> TokenBucket:
+    """Token bucket shared by every call against one Airtable base."""
+    base_id = base_id or BASE_ID or ""
+    if base_id not in _rate_limiters:
+        _rate_limiters[base_id] = TokenBucket(AIRTABLE_RATE_LIMIT, AIRTABLE_BURST)
+    return _rate_limiters[base_id]
+
+
+def _retry_delay(resp: httpx.Response, attempt: int) -> float:
+    """Honor Retry-After when present, otherwise exponential backoff with jitter."""
+    retry_after = resp.headers.get("Retry-After")
+    if retry_after:
+        try:
+            return min(float(retry_after), AIRTABLE_MAX_BACKOFF)
+        except ValueError:
+            pass
+    return min(2 ** attempt + random.uniform(0, 1), AIRTABLE_MAX_BACKOFF)
+
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=f"{AIRTABLE_API_URL}/{BASE_ID}",
+        headers={"Authorization": f"Bearer {AIRTABLE_TOKEN}"},
+        http2=HTTP2_AVAILABLE,
+        limits=httpx.Limits(
+            max_connections=AIRTABLE_MAX_CONNECTIONS,
+            max_keepalive_connections=AIRTABLE_MAX_KEEPALIVE,
+            keepalive_expiry=AIRTABLE_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(AIRTABLE_TIMEOUT, connect=AIRTABLE_CONNECT_TIMEOUT),
+    )
+
+
+async def init_airtable_client() -> httpx.AsyncClient:
+    """Create the process-wide Airtable client (called from the app lifespan)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def close_airtable_client() -> None:
+    """Close the shared client and release its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_airtable_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it lazily when used outside the lifespan."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def airtable_get(table: str, params: Optional[Dict[str, Any]] = None, priority: int = INTERACTIVE) -> Dict[str, Any]:
+    """Fetch a single page from an Airtable table.
+
+    Calls go through the base's token bucket; `priority` lets interactive
+    requests jump queued BACKGROUND refreshes. 429/503 responses are retried
+    with backoff, honoring Retry-After.
+    """
+    client = get_airtable_client()
+    limiter = get_rate_limiter()
+    for attempt in range(AIRTABLE_MAX_RETRIES + 1):
+        await limiter.acquire(priority)
+        resp = await client.get(f"/{table}", params=params)
+        if resp.status_code not in (429, 503):
+            break
+        delay = _retry_delay(resp, attempt)
+        if attempt == AIRTABLE_MAX_RETRIES:
+            if resp.status_code == 429:
+                raise AirtableRateLimited(delay)
+            break
+        # Back off every caller of this base, not just this one
+        limiter.pause(delay)
+        await asyncio.sleep(delay)
+    resp.raise_for_status()
+    return resp.json()
+
+
+async def iter_airtable_pages(table: str, params: Optional[Dict[str, Any]] = None, priority: int = INTERACTIVE) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield the records of a table page by page, following Airtable's offset cursor."""
+    params = dict(params or {})
+    while True:
+        data = await airtable_get(table, params, priority)
+        yield data.get("records", [])
+        offset = data.get("offset")
+        if not offset:
+            break
+        params["offset"] = offset
+
+
+async def fetch_all_airtable_records(table: str, params: Optional[Dict[str, Any]] = None, priority: int = INTERACTIVE) -> List[Dict[str, Any]]:
+    """Collect every record of a table into a single list."""
+    records: List[Dict[str, Any]] = []
+    async for page in iter_airtable_pages(table, params, priority):
+        records.extend(page)
+    return records
@@ -0,0 +1,219 @@
+import re
+import json
+import time
+import hashlib
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import httpx
+
+from services.airtable.airtable_client import fetch_all_airtable_records
+from services.airtable.rate_limiter import INTERACTIVE
+
+_UNKNOWN_FIELD_RE = re.compile(r'Unknown field name: "(.+?)"')
+
+
+def _airtable_timestamp(ts: float) -> str:
+    return datetime.fromtimestamp(ts, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def modified_since_formula(ts: float) -> str:
+    """Airtable formula matching records created or modified after `ts` (epoch seconds)."""
+    stamp = _airtable_timestamp(ts)
+    return (
+        f"OR(IS_AFTER(LAST_MODIFIED_TIME(), DATETIME_PARSE('{stamp}')), "
+        f"IS_AFTER(CREATED_TIME(), DATETIME_PARSE('{stamp}')))"
+    )
+
+
+def _record_hash(record: Dict[str, Any]) -> int:
+    """64-bit content hash of one record, identical across workers."""
+    data = json.dumps(record, sort_keys=True, separators=(",", ":")).encode()
+    return int.from_bytes(hashlib.sha1(data).digest()[:8], "big")
+
+
+class AirtableTableSync:
+    """
+    Local copy of an Airtable table kept current with delta queries.
+
+    The first sync (and one every `full_reconcile_interval` seconds) pages the
+    whole table, which is the only way to notice deleted records. In between,
+    only records modified since the last watermark are requested and merged in
+    by record ID.
+
+    `version` is the XOR of per-record content hashes, so a sync only hashes
+    the records it changed or removed.
+    """
+
+    def __init__(
+        self,
+        table: str,
+        params: Optional[Dict[str, Any]] = None,
+        full_reconcile_interval: float = 3600,
+        watermark_overlap: float = 60,
+    ):
+        self.table = table
+        self._params = dict(params or {})
+        self.full_reconcile_interval = full_reconcile_interval
+        # Re-read a small window before the watermark to absorb clock skew
+        self.watermark_overlap = watermark_overlap
+        self._records: Dict[str, Dict[str, Any]] = {}
+        self._watermark: Optional[float] = None
+        self._last_full_sync = 0.0
+        self.last_sync_was_full = False
+        self.last_changed_ids: List[str] = []
+        self.full_syncs = 0
+        self.delta_syncs = 0
+        self.version: Optional[str] = None
+        # record ID -> content hash; None until first needed after restoring a state saved without them
+        self._hashes: Optional[Dict[str, int]] = {}
+        self._digest = 0
+
+    @property
+    def fields(self) -> Optional[List[str]]:
+        """Columns requested via `fields[]`, or None when every column is fetched."""
+        return self._params.get("fields[]")
+
+    async def _fetch(self, params: Dict[str, Any], priority: int) -> List[Dict[str, Any]]:
+        while True:
+            try:
+                return await fetch_all_airtable_records(self.table, {**self._params, **params}, priority)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code != 422 or not self.fields:
+                    raise
+                self._drop_unknown_field(e.response)
+
+    def _drop_unknown_field(self, response: httpx.Response) -> None:
+        """Remove a projected column Airtable doesn't know, or the whole projection if it can't tell which."""
+        try:
+            message = response.json().get("error", {}).get("message", "")
+        except ValueError:
+            message = ""
+        match = _UNKNOWN_FIELD_RE.search(message)
+        fields = self.fields
+        if match and match.group(1) in fields:
+            print(f"Airtable table {self.table} has no field {match.group(1)!r}; dropping it from the projection")
+            remaining = [f for f in fields if f != match.group(1)]
+        else:
+            print(f"Airtable rejected the field projection for {self.table}; fetching all fields")
+            remaining = []
+        if remaining:
+            self._params["fields[]"] = remaining
+        else:
+            self._params.pop("fields[]", None)
+
+    @property
+    def records(self) -> List[Dict[str, Any]]:
+        return list(self._records.values())
+
+    @property
+    def has_data(self) -> bool:
+        return self._watermark is not None
+
+    def needs_full_sync(self) -> bool:
+        if self._watermark is None:
+            return True
+        return time.time() - self._last_full_sync > self.full_reconcile_interval
+
+    def reset(self) -> None:
+        """Forget local state so the next sync is a full one."""
+        self._records = {}
+        self._watermark = None
+        self._last_full_sync = 0.0
+        self.last_changed_ids = []
+        self.version = None
+        self._hashes = {}
+        self._digest = 0
+
+    def _update_version(self, changed: Iterable[str], removed: Iterable[str]) -> None:
+        """Fold changed and removed records into the version; unchanged records are not hashed again."""
+        if self._hashes is None:
+            self._hashes = {rec_id: _record_hash(rec) for rec_id, rec in self._records.items()}
+            self._digest = 0
+            for value in self._hashes.values():
+                self._digest ^= value
+        else:
+            for rec_id in removed:
+                self._digest ^= self._hashes.pop(rec_id, 0)
+            for rec_id in changed:
+                value = _record_hash(self._records[rec_id])
+                self._digest ^= self._hashes.get(rec_id, 0) ^ value
+                self._hashes[rec_id] = value
+        self.version = f"{self._digest:016x}"
+
+    def export_state(self) -> Dict[str, Any]:
+        """Serializable state for persisting the local copy."""
+        return {
+            "fields": self.fields,
+            "records": self.records,
+            "watermark": self._watermark,
+            "last_full_sync": self._last_full_sync,
+            "version": self.version,
+            "hashes": dict(self._hashes) if self._hashes is not None else None,
+        }
+
+    def restore_state(self, state: Dict[str, Any]) -> bool:
+        """Load state saved by `export_state`; ignored if it was taken with a different projection."""
+        if state.get("fields") != self.fields or state.get("watermark") is None:
+            return False
+        self._records = {rec["id"]: rec for rec in state.get("records", [])}
+        self._watermark = state["watermark"]
+        self._last_full_sync = state.get("last_full_sync", 0.0)
+        hashes = state.get("hashes")
+        self._hashes = dict(hashes) if hashes is not None and hashes.keys() == self._records.keys() else None
+        self._digest = 0
+        for value in (self._hashes or {}).values():
+            self._digest ^= value
+        self.version = state.get("version")
+        if self.version is None:
+            self._update_version((), ())
+        return True
+
+    async def sync(self, force_full: bool = False, priority: int = INTERACTIVE) -> List[Dict[str, Any]]:
+        """Bring the local copy up to date and return the current record list."""
+        started = time.time()
+        if force_full or self.needs_full_sync():
+            records = await self._fetch({}, priority)
+            previous = self._records
+            self._records = {rec["id"]: rec for rec in records}
+            self.last_changed_ids = [
+                rec_id for rec_id, rec in self._records.items() if previous.get(rec_id) != rec
+            ]
+            removed = previous.keys() - self._records.keys()
+            if removed or self.last_changed_ids or self.version is None:
+                self._update_version(self.last_changed_ids, removed)
+            self._last_full_sync = started
+            self.last_sync_was_full = True
+            self.full_syncs += 1
+        else:
+            changed = await self._fetch({
+                "filterByFormula": modified_since_formula(self._watermark - self.watermark_overlap)
+            }, priority)
+            merged = dict(self._records)
+            self.last_changed_ids = []
+            for rec in changed:
+                if merged.get(rec["id"]) != rec:
+                    self.last_changed_ids.append(rec["id"])
+                merged[rec["id"]] = rec
+            self._records = merged
+            if self.last_changed_ids or self.version is None:
+                self._update_version(self.last_changed_ids, ())
+            self.last_sync_was_full = False
+            self.delta_syncs += 1
+
+        self._watermark = started
+        return self.records
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "table": self.table,
+            "fields": self.fields,
+            "version": self.version,
+            "record_count": len(self._records),
+            "watermark": self._watermark,
+            "last_full_sync": self._last_full_sync,
+            "last_sync_was_full": self.last_sync_was_full,
+            "last_changed_count": len(self.last_changed_ids),
+            "full_syncs": self.full_syncs,
+            "delta_syncs": self.delta_syncs,
+        }
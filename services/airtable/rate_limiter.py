@@ -0,0 +1,77 @@
+import time
+import heapq
+import asyncio
+import itertools
+from typing import Any, Dict, List, Tuple
+
+# Lower value is served first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+
+class TokenBucket:
+    """
+    Async token bucket where queued callers are served by priority, then FIFO.
+
+    Bursts queue instead of failing; `pause` stops all callers, e.g. after a
+    429 with Retry-After.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters: List[Tuple[int, int]] = []
+        self._seq = itertools.count()
+        self.waited = 0
+        self.throttled = 0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller for `seconds` (the bucket is also drained)."""
+        now = time.monotonic()
+        self._paused_until = max(self._paused_until, now + seconds)
+        self._tokens = 0
+        self._updated = now
+        self.throttled += 1
+
+    async def acquire(self, priority: int = INTERACTIVE) -> None:
+        entry = (priority, next(self._seq))
+        heapq.heappush(self._waiters, entry)
+        waited = False
+        try:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                delay = self._paused_until - now
+                if delay <= 0:
+                    if self._waiters[0] == entry and self._tokens >= 1:
+                        heapq.heappop(self._waiters)
+                        self._tokens -= 1
+                        self.waited += waited
+                        return
+                    # Wait for the next token; callers behind the head re-check when it is taken
+                    delay = max((1 - self._tokens) / self.rate, 0.001)
+                waited = True
+                await asyncio.sleep(delay)
+        except BaseException:
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "rate": self.rate,
+            "capacity": self.capacity,
+            "queued": len(self._waiters),
+            "queued_background": sum(1 for priority, _ in self._waiters if priority == BACKGROUND),
+            "waited": self.waited,
+            "throttled": self.throttled,
+            "paused_for": max(self._paused_until - time.monotonic(), 0),
+        }
@@ -0,0 +1,172 @@
+import os
+import zlib
+from typing import Any, Dict, Iterable, List, Optional
+
+import msgpack
+import redis
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "memory" (default) keeps every cache in the worker; "redis" shares REDIS_CACHE_NAMESPACES across workers
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory").strip().lower()
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Prepended to every key so several deployments can share one Redis
+REDIS_CACHE_PREFIX = os.getenv("REDIS_CACHE_PREFIX", "warehousenow:")
+# Cache namespaces (key prefix before ':') stored in Redis; the rest stay in process memory
+REDIS_CACHE_NAMESPACES = [
+    name.strip() for name in os.getenv("REDIS_CACHE_NAMESPACES", "coords,driving").split(",") if name.strip()
+]
+# Cache calls block the caller, so keep them short; a slow Redis is treated as a miss
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", "0.5"))
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "20"))
+
+# Serialized values at least this large are zlib-compressed
+COMPRESS_MIN_BYTES = 1024
+_RAW = b"\x00"
+_ZLIB = b"\x01"
+
+
+def dumps(value: Any) -> bytes:
+    """msgpack, zlib-compressed when large, behind a one-byte format marker."""
+    packed = msgpack.packb(value, use_bin_type=True)
+    if len(packed) >= COMPRESS_MIN_BYTES:
+        return _ZLIB + zlib.compress(packed)
+    return _RAW + packed
+
+
+def loads(data: bytes) -> Any:
+    """Inverse of `dumps`; sequences come back as lists."""
+    body = data[1:]
+    if data[:1] == _ZLIB:
+        body = zlib.decompress(body)
+    return msgpack.unpackb(body, raw=False)
+
+
+class RedisCache:
+    """
+    TTL key/value cache in Redis, shared by every worker and instance.
+
+    Batch reads are a single MGET and batch writes a single pipeline, so a
+    search costs one round trip per cache layer rather than one per key.
+    Redis errors are logged and reported as misses: an unreachable Redis
+    makes requests slower, not failing.
+    """
+
+    def __init__(self, url: str = REDIS_URL, prefix: str = REDIS_CACHE_PREFIX,
+                 socket_timeout: float = REDIS_SOCKET_TIMEOUT, max_connections: int = REDIS_MAX_CONNECTIONS):
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(
+            url,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_timeout,
+            max_connections=max_connections,
+        )
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "errors": 0}
+
+    def _error(self, action: str, e: Exception) -> None:
+        self._stats["errors"] += 1
+        print(f"Redis cache {action} failed: {e}")
+
+    def ping(self) -> bool:
+        try:
+            return bool(self._client.ping())
+        except redis.RedisError:
+            return False
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Values of the keys that are present, in one MGET."""
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        try:
+            values = self._client.mget([self.prefix + key for key in keys])
+        except redis.RedisError as e:
+            self._error("read", e)
+            return {}
+        found = {}
+        for key, value in zip(keys, values):
+            if value is None:
+                continue
+            try:
+                found[key] = loads(value)
+            except (ValueError, TypeError, zlib.error, msgpack.UnpackException) as e:
+                # Written by an incompatible version or corrupted; the caller refetches and overwrites it
+                self._error(f"decode of {key}", e)
+        self._stats["hits"] += len(found)
+        self._stats["misses"] += len(keys) - len(found)
+        return found
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_many([key]).get(key)
+
+    def set_many(self, items: Dict[str, Any], ttl: int = 3600) -> None:
+        if not items:
+            return
+        try:
+            pipe = self._client.pipeline(transaction=False)
+            for key, value in items.items():
+                pipe.set(self.prefix + key, dumps(value), ex=max(1, int(ttl)))
+            pipe.execute()
+        except redis.RedisError as e:
+            self._error("write", e)
+            return
+        self._stats["writes"] += len(items)
+
+    def set(self, key: str, value: Any, ttl: int = 3600) -> None:
+        self.set_many({key: value}, ttl)
+
+    def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+        try:
+            self._client.delete(*[self.prefix + key for key in keys])
+        except redis.RedisError as e:
+            self._error("delete", e)
+
+    def clear(self, namespaces: Optional[List[str]] = None) -> None:
+        """Delete this prefix's keys in the given namespaces (all of them by default)."""
+        patterns = [f"{self.prefix}{namespace}:*" for namespace in namespaces] if namespaces is not None else [f"{self.prefix}*"]
+        try:
+            for pattern in patterns:
+                batch = []
+                for key in self._client.scan_iter(match=pattern, count=500):
+                    batch.append(key)
+                    if len(batch) >= 500:
+                        self._client.unlink(*batch)
+                        batch = []
+                if batch:
+                    self._client.unlink(*batch)
+        except redis.RedisError as e:
+            self._error("clear", e)
+
+    def close(self) -> None:
+        self._client.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = dict(self._stats)
+        connection = self._client.connection_pool.connection_kwargs
+        stats["server"] = f"{connection.get('host')}:{connection.get('port')}/{connection.get('db')}"
+        stats["prefix"] = self.prefix
+        return stats
+
+
+_redis_cache: Optional[RedisCache] = None
+
+
+def get_redis_cache() -> Optional[RedisCache]:
+    """The shared Redis cache when CACHE_BACKEND is "redis", else None."""
+    global _redis_cache
+    if CACHE_BACKEND != "redis":
+        return None
+    if _redis_cache is None:
+        _redis_cache = RedisCache()
+    return _redis_cache
+
+
+def close_redis_cache() -> None:
+    """Close the Redis connections (called from the app lifespan)."""
+    global _redis_cache
+    if _redis_cache is not None:
+        _redis_cache.close()
+        _redis_cache = None
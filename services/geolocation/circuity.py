@@ -0,0 +1,135 @@
+import os
+import math
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from services.geolocation.geolocation_service import haversine
+
+load_dotenv()
+
+# Origins are grouped into square regions of this many degrees
+CIRCUITY_REGION_DEGREES = float(os.getenv("CIRCUITY_REGION_DEGREES", "2"))
+# Driving results kept per region, and how many are needed before a region is trusted
+CIRCUITY_MAX_SAMPLES = int(os.getenv("CIRCUITY_MAX_SAMPLES", "500"))
+CIRCUITY_MIN_SAMPLES = int(os.getenv("CIRCUITY_MIN_SAMPLES", "30"))
+# Tail of the observed ratios treated as outliers when deciding include/exclude
+CIRCUITY_TAIL = float(os.getenv("CIRCUITY_TAIL", "0.02"))
+
+# Trips this short say more about the street grid than the road network
+MIN_SAMPLE_MILES = 2.0
+
+INCLUDE = "include"
+EXCLUDE = "exclude"
+AMBIGUOUS = "ambiguous"
+
+Coords = Tuple[float, float]
+
+
+class CircuityFit(NamedTuple):
+    low: float                 # driving / straight-line ratio almost no route beats
+    high: float                # ratio almost no route exceeds
+    ratio: float               # typical (median) ratio
+    minutes_per_mile: float    # typical driving minutes per road mile
+    samples: int
+
+
+# Used until enough driving results have been seen; matches the old 2x straight-line buffer
+DEFAULT_FIT = CircuityFit(low=1.0, high=2.0, ratio=1.3, minutes_per_mile=1.4, samples=0)
+
+
+class CircuityEstimator:
+    """
+    Learns how much longer roads are than the straight line, per origin region.
+
+    Every driving result the service sees is recorded as a (circuity ratio,
+    minutes per mile) sample for the region of its origin. The fitted bounds
+    let a search decide, from the straight-line distance alone, that a
+    warehouse is certainly inside or outside the driving radius; only the
+    band in between needs a routing call.
+    """
+
+    def __init__(self, region_degrees: float = CIRCUITY_REGION_DEGREES, max_samples: int = CIRCUITY_MAX_SAMPLES,
+                 min_samples: int = CIRCUITY_MIN_SAMPLES, tail: float = CIRCUITY_TAIL):
+        self.region_degrees = region_degrees
+        self.max_samples = max_samples
+        self.min_samples = min_samples
+        self.tail = tail
+        # Samples are keyed by origin/destination pair so a cached route is only counted once
+        self._samples: Dict[Any, "OrderedDict[str, Tuple[float, float]]"] = {}
+        self._fits: Dict[Any, CircuityFit] = {}
+
+    def region(self, coords: Coords) -> Tuple[int, int]:
+        return (math.floor(coords[0] / self.region_degrees), math.floor(coords[1] / self.region_degrees))
+
+    def reset(self) -> None:
+        self._samples = {}
+        self._fits = {}
+
+    def observe(self, key: str, origin: Coords, dest: Coords, driving_data: Dict[str, float]) -> None:
+        """Record one driving result."""
+        straight = haversine(origin[0], origin[1], dest[0], dest[1])
+        miles = driving_data.get("distance_miles")
+        minutes = driving_data.get("duration_minutes")
+        if straight < MIN_SAMPLE_MILES or not miles or not minutes:
+            return
+        sample = (miles / straight, minutes / miles)
+        for region in (self.region(origin), None):
+            samples = self._samples.setdefault(region, OrderedDict())
+            samples[key] = sample
+            samples.move_to_end(key)
+            while len(samples) > self.max_samples:
+                samples.popitem(last=False)
+            self._fits.pop(region, None)
+
+    def _fit_samples(self, region: Any) -> Optional[CircuityFit]:
+        samples = self._samples.get(region)
+        if not samples or len(samples) < self.min_samples:
+            return None
+        if region not in self._fits:
+            values = np.array(list(samples.values()))
+            ratios = values[:, 0]
+            self._fits[region] = CircuityFit(
+                low=max(1.0, float(np.quantile(ratios, self.tail))),
+                high=float(np.quantile(ratios, 1 - self.tail)),
+                ratio=float(np.median(ratios)),
+                minutes_per_mile=float(np.median(values[:, 1])),
+                samples=len(samples),
+            )
+        return self._fits[region]
+
+    def regional_fit(self, origin: Coords) -> Optional[CircuityFit]:
+        """The origin region's own fit, None until the region has enough samples."""
+        return self._fit_samples(self.region(origin))
+
+    def fit(self, origin: Coords) -> CircuityFit:
+        """The origin region's fit, falling back to all regions, then to DEFAULT_FIT."""
+        return self._fit_samples(self.region(origin)) or self._fit_samples(None) or DEFAULT_FIT
+
+    def classify(self, origin: Coords, straight_miles: float, radius_miles: float) -> str:
+        fit = self.fit(origin)
+        if straight_miles * fit.high <= radius_miles:
+            return INCLUDE
+        if straight_miles * fit.low > radius_miles:
+            return EXCLUDE
+        return AMBIGUOUS
+
+    def estimate(self, origin: Coords, straight_miles: float) -> Dict[str, Any]:
+        """Estimated driving distance and time for a straight-line distance."""
+        fit = self.fit(origin)
+        distance_miles = straight_miles * fit.ratio
+        return {
+            "distance_miles": distance_miles,
+            "duration_minutes": distance_miles * fit.minutes_per_mile,
+            "estimated": True,
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        overall = self._fit_samples(None)
+        return {
+            "regions": sum(1 for region in self._samples if region is not None),
+            "samples": len(self._samples.get(None, ())),
+            "fit": overall._asdict() if overall else None,
+        }
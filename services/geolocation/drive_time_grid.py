@@ -0,0 +1,292 @@
+import os
+import math
+import time
+import asyncio
+import tempfile
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+from dotenv import load_dotenv
+
+from services.geolocation.geolocation_service import Coords, get_driving_matrix_google_with_failures, haversine
+from services.geolocation.circuity import AMBIGUOUS, EXCLUDE, INCLUDE
+from services.geolocation.spatial_index import MILES_PER_DEGREE
+
+load_dotenv()
+
+# Grid written by `python -m warehouse.refresh_drive_time_grid` (NumPy .npz); empty disables it
+DRIVE_TIME_GRID_PATH = os.getenv("DRIVE_TIME_GRID_PATH", ".cache/drive_time_grid.npz")
+# Cell size; ~17 miles of latitude at the default
+DRIVE_TIME_GRID_CELL_DEGREES = float(os.getenv("DRIVE_TIME_GRID_CELL_DEGREES", "0.25"))
+# How far out (in driving minutes) each warehouse's grid reaches. Building one warehouse's grid
+# costs a Distance Matrix element per cell within this many minutes at MAX_DRIVING_MPH: about
+# 1,500-1,700 elements (60-70 requests of 25) at the defaults, growing with the square of the reach
+DRIVE_TIME_GRID_MAX_MINUTES = float(os.getenv("DRIVE_TIME_GRID_MAX_MINUTES", "240"))
+# A cell's time is measured to its centre; origins elsewhere in the cell can be this much off
+DRIVE_TIME_GRID_SLACK_MINUTES = float(os.getenv("DRIVE_TIME_GRID_SLACK_MINUTES", "15"))
+# Grids older than this are rebuilt by the refresh job
+DRIVE_TIME_GRID_MAX_AGE_SECONDS = int(os.getenv("DRIVE_TIME_GRID_MAX_AGE_SECONDS", str(30 * 86400)))
+# The refresh job saves after this many builds, so an interrupted run keeps what it paid for
+DRIVE_TIME_GRID_SAVE_EVERY = int(os.getenv("DRIVE_TIME_GRID_SAVE_EVERY", "10"))
+
+# No route averages faster than this; the search pre-filter assumes the same speed, so a grid
+# reaching `max_minutes` at it covers every origin that can be within `max_minutes`
+MAX_DRIVING_MPH = float(os.getenv("NEARBY_MAX_DRIVING_MPH", "85"))
+
+GRID_FORMAT = 2
+
+Cell = Tuple[int, int]
+
+
+def _cell_code(cell: Cell) -> int:
+    """(i, j) packed into one int64, so a warehouse's cells are a sorted array."""
+    return (cell[0] << 32) | (cell[1] & 0xFFFFFFFF)
+
+
+class WarehouseGrid(NamedTuple):
+    coords: Coords             # where the grid was routed from
+    max_minutes: float         # driving minutes the build covered
+    built_at: float
+    cells: np.ndarray          # sorted cell codes (int64)
+    miles: np.ndarray          # driving miles per cell (float32)
+    minutes: np.ndarray        # driving minutes per cell (float32)
+    complete: bool = True      # False when some requests failed; the refresh job builds it again
+
+    def lookup(self, cell: Cell) -> Optional[Tuple[float, float]]:
+        code = _cell_code(cell)
+        pos = int(np.searchsorted(self.cells, code))
+        if pos < len(self.cells) and self.cells[pos] == code:
+            return float(self.miles[pos]), float(self.minutes[pos])
+        return None
+
+
+def _warehouse_grid(coords: Coords, max_minutes: float, built_at: float,
+                    cells: Dict[Cell, Tuple[float, float]], complete: bool = True) -> WarehouseGrid:
+    codes = np.fromiter((_cell_code(cell) for cell in cells), dtype=np.int64, count=len(cells))
+    values = np.array(list(cells.values()), dtype=np.float32).reshape(-1, 2)
+    order = np.argsort(codes)
+    return WarehouseGrid((coords[0], coords[1]), max_minutes, built_at,
+                         codes[order], values[order, 0], values[order, 1], complete)
+
+
+class DriveTimeGrid:
+    """
+    Precomputed driving distance and time between each warehouse and the grid cells around it.
+
+    Warehouses are keyed by their location key (normalized ZIP), so records
+    sharing a ZIP share a grid. Times are routed from the warehouse to each
+    cell centre, which stands in for the reverse trip. Every cell within
+    `max_minutes` at MAX_DRIVING_MPH is routed and kept, however slow, so a
+    drive-time search can include or exclude most warehouses from local data
+    and only route the ones whose cell time is within the slack of the limit.
+    """
+
+    def __init__(self, cell_degrees: float = DRIVE_TIME_GRID_CELL_DEGREES,
+                 slack_minutes: float = DRIVE_TIME_GRID_SLACK_MINUTES):
+        self.cell_degrees = cell_degrees
+        self.slack_minutes = slack_minutes
+        self._grids: Dict[str, WarehouseGrid] = {}
+        self._stats = {"included": 0, "excluded": 0, "ambiguous": 0, "unknown": 0}
+
+    def __len__(self) -> int:
+        return len(self._grids)
+
+    def cell(self, coords: Coords) -> Cell:
+        lon = (coords[1] + 180) % 360 - 180
+        return (math.floor(coords[0] / self.cell_degrees), math.floor(lon / self.cell_degrees))
+
+    def cell_centre(self, cell: Cell) -> Coords:
+        return ((cell[0] + 0.5) * self.cell_degrees, (cell[1] + 0.5) * self.cell_degrees)
+
+    def cells_around(self, coords: Coords, miles: float) -> List[Cell]:
+        """Cells whose centre is within `miles` of `coords`."""
+        lat_span = miles / MILES_PER_DEGREE
+        lon_span = miles / (MILES_PER_DEGREE * max(math.cos(math.radians(coords[0])), 0.01))
+        low = self.cell((coords[0] - lat_span, coords[1] - lon_span))
+        high = self.cell((coords[0] + lat_span, coords[1] + lon_span))
+        n_lon = round(360 / self.cell_degrees)
+        if lon_span >= 180:
+            low, lon_cells = (low[0], -(n_lon // 2)), n_lon
+        else:
+            lon_cells = (high[1] - low[1]) % n_lon + 1
+        cells = []
+        for i in range(low[0], high[0] + 1):
+            for step in range(lon_cells):
+                j = (low[1] + step + n_lon // 2) % n_lon - n_lon // 2
+                centre = self.cell_centre((i, j))
+                if abs(centre[0]) < 90 and haversine(coords[0], coords[1], centre[0], centre[1]) <= miles:
+                    cells.append((i, j))
+        return cells
+
+    def put(self, key: str, coords: Coords, cells: Dict[Cell, Tuple[float, float]],
+            max_minutes: float = DRIVE_TIME_GRID_MAX_MINUTES, built_at: Optional[float] = None,
+            complete: bool = True) -> None:
+        """Replace a warehouse's grid with (distance miles, duration minutes) per cell."""
+        self._grids[key] = _warehouse_grid(coords, max_minutes, time.time() if built_at is None else built_at,
+                                           cells, complete)
+
+    def lookup(self, key: str, origin: Coords) -> Optional[Tuple[float, float]]:
+        """(distance miles, duration minutes) of the origin's cell, None if it wasn't precomputed."""
+        grid = self._grids.get(key)
+        return grid.lookup(self.cell(origin)) if grid else None
+
+    def classify(self, key: str, origin: Coords, max_minutes: float) -> Tuple[str, Optional[Dict[str, float]]]:
+        """INCLUDE (with the grid's driving data), EXCLUDE, or AMBIGUOUS when it needs a live route."""
+        grid = self._grids.get(key)
+        entry = grid.lookup(self.cell(origin)) if grid else None
+        if entry is None:
+            # Outside the routed cells, only a straight line too long for MAX_DRIVING_MPH settles it
+            if grid and haversine(origin[0], origin[1], grid.coords[0], grid.coords[1]) / MAX_DRIVING_MPH * 60 > max_minutes:
+                self._stats["excluded"] += 1
+                return EXCLUDE, None
+            self._stats["unknown"] += 1
+            return AMBIGUOUS, None
+        miles, minutes = entry
+        if minutes + self.slack_minutes <= max_minutes:
+            self._stats["included"] += 1
+            return INCLUDE, {"distance_miles": miles, "duration_minutes": minutes}
+        if minutes - self.slack_minutes > max_minutes:
+            self._stats["excluded"] += 1
+            return EXCLUDE, None
+        self._stats["ambiguous"] += 1
+        return AMBIGUOUS, None
+
+    async def build(self, key: str, coords: Coords, max_minutes: float = DRIVE_TIME_GRID_MAX_MINUTES) -> bool:
+        """Route from the warehouse to every cell in reach and replace its grid.
+
+        Cells the provider can't route to (water, failed requests) are left
+        out and fall back to live routing. A grid with failed requests is kept
+        but marked incomplete, so `stale` returns it until a build succeeds.
+        Returns False, keeping the old grid, when no cell could be routed at all.
+        """
+        cells = self.cells_around(coords, max_minutes / 60 * MAX_DRIVING_MPH)
+        results, failed = await get_driving_matrix_google_with_failures(coords, [self.cell_centre(cell) for cell in cells])
+        if not any(results):
+            return False
+        if failed:
+            print(f"{failed} of {len(cells)} drive-time cells around warehouse ZIP {key} failed; retrying on the next refresh")
+        self.put(key, coords, {
+            cell: (data["distance_miles"], data["duration_minutes"]) for cell, data in zip(cells, results) if data
+        }, max_minutes, complete=not failed)
+        return True
+
+    def stale(self, keys: Iterable[str], max_age: float = DRIVE_TIME_GRID_MAX_AGE_SECONDS,
+              max_minutes: float = DRIVE_TIME_GRID_MAX_MINUTES) -> List[str]:
+        """Keys without a complete grid, with one older than `max_age` seconds, or with one built for a shorter reach."""
+        cutoff = time.time() - max_age
+        return [
+            key for key in keys
+            if key not in self._grids or not self._grids[key].complete
+            or self._grids[key].built_at <= cutoff or self._grids[key].max_minutes < max_minutes
+        ]
+
+    def prune(self, keys: Iterable[str]) -> None:
+        """Drop grids of warehouses that are gone."""
+        keep = set(keys)
+        for key in [key for key in self._grids if key not in keep]:
+            del self._grids[key]
+
+    def save(self, path: str) -> None:
+        """Write the grid as one compressed .npz of concatenated arrays, replacing the old file atomically."""
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        grids = list(self._grids.values())
+        data = {
+            "format": np.array(GRID_FORMAT),
+            "cell_degrees": np.array(self.cell_degrees),
+            "keys": np.array(list(self._grids), dtype=str),
+            "coords": np.array([grid.coords for grid in grids], dtype=np.float64).reshape(-1, 2),
+            "max_minutes": np.array([grid.max_minutes for grid in grids], dtype=np.float64),
+            "built_at": np.array([grid.built_at for grid in grids], dtype=np.float64),
+            "complete": np.array([grid.complete for grid in grids], dtype=bool),
+            "offsets": np.cumsum([0] + [len(grid.cells) for grid in grids]).astype(np.int64),
+            "cells": np.concatenate([grid.cells for grid in grids] or [np.empty(0, dtype=np.int64)]),
+            "miles": np.concatenate([grid.miles for grid in grids] or [np.empty(0, dtype=np.float32)]),
+            "minutes": np.concatenate([grid.minutes for grid in grids] or [np.empty(0, dtype=np.float32)]),
+        }
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.savez_compressed(f, **data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path: str) -> "DriveTimeGrid":
+        """Read a saved grid; each warehouse's arrays are views into the file's few large arrays."""
+        with np.load(path, allow_pickle=False) as data:
+            if "format" not in data or int(data["format"]) != GRID_FORMAT:
+                raise ValueError(f"{path} is not a drive-time grid (format {GRID_FORMAT} expected)")
+            # Each access to `data` decompresses the array again, so read them once
+            grid = cls(cell_degrees=float(data["cell_degrees"]))
+            keys, coords = data["keys"].tolist(), data["coords"].tolist()
+            max_minutes, built_at, offsets = data["max_minutes"].tolist(), data["built_at"].tolist(), data["offsets"].tolist()
+            complete = data["complete"].tolist() if "complete" in data else [True] * len(keys)
+            cells, miles, minutes = data["cells"], data["miles"], data["minutes"]
+        for n, key in enumerate(keys):
+            start, end = offsets[n], offsets[n + 1]
+            grid._grids[key] = WarehouseGrid((coords[n][0], coords[n][1]), max_minutes[n], built_at[n],
+                                             cells[start:end], miles[start:end], minutes[start:end], complete[n])
+        return grid
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = dict(self._stats)
+        stats["warehouses"] = len(self._grids)
+        stats["cells"] = sum(len(grid.cells) for grid in self._grids.values())
+        stats["bytes"] = sum(grid.cells.nbytes + grid.miles.nbytes + grid.minutes.nbytes for grid in self._grids.values())
+        stats["incomplete"] = sum(not grid.complete for grid in self._grids.values())
+        stats["oldest_built_at"] = min((grid.built_at for grid in self._grids.values()), default=None)
+        return stats
+
+
+_grid: Optional[DriveTimeGrid] = None
+_grid_mtime: Optional[float] = None
+_reload_task: Optional[asyncio.Task] = None
+
+
+def _saved_mtime() -> Optional[float]:
+    try:
+        return os.stat(DRIVE_TIME_GRID_PATH).st_mtime if DRIVE_TIME_GRID_PATH else None
+    except OSError:
+        return None
+
+
+def get_drive_time_grid() -> DriveTimeGrid:
+    """The grid loaded in this process (empty until `load_drive_time_grid` has run); never reads the file."""
+    global _grid
+    if _grid is None:
+        _grid = DriveTimeGrid()
+    return _grid
+
+
+async def load_drive_time_grid() -> DriveTimeGrid:
+    """Swap in the saved grid when the file changed since it was last loaded; it is read in a thread."""
+    global _grid, _grid_mtime
+    mtime = _saved_mtime()
+    if mtime is not None and mtime != _grid_mtime:
+        try:
+            _grid = await asyncio.to_thread(DriveTimeGrid.load, DRIVE_TIME_GRID_PATH)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Ignoring unreadable drive-time grid {DRIVE_TIME_GRID_PATH}: {e}")
+        _grid_mtime = mtime
+    return get_drive_time_grid()
+
+
+def reload_drive_time_grid_in_background() -> None:
+    """Start loading the grid file if the refresh job rewrote it; searches keep the current grid meanwhile."""
+    global _reload_task
+    if _reload_task is not None and not _reload_task.done():
+        return
+    mtime = _saved_mtime()
+    if mtime is not None and mtime != _grid_mtime:
+        _reload_task = asyncio.create_task(load_drive_time_grid(), name="drive-time grid reload")
+
+
+def save_drive_time_grid() -> None:
+    global _grid_mtime
+    if DRIVE_TIME_GRID_PATH and _grid is not None:
+        _grid.save(DRIVE_TIME_GRID_PATH)
+        _grid_mtime = os.stat(DRIVE_TIME_GRID_PATH).st_mtime
@@ -0,0 +1,269 @@
+import os
+import time
+import sqlite3
+import asyncio
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from services.cache.redis_cache import REDIS_CACHE_NAMESPACES, get_redis_cache
+
+load_dotenv()
+
+# SQLite file backing the driving-distance cache; empty keeps it in memory only
+DRIVING_CACHE_PATH = os.getenv("DRIVING_CACHE_PATH", ".cache/driving_cache.sqlite3")
+# Road distances between ZIP centroids barely change, so entries live for a long time
+DRIVING_CACHE_TTL_SECONDS = int(os.getenv("DRIVING_CACHE_TTL_SECONDS", str(30 * 86400)))
+DRIVING_CACHE_MAX_ENTRIES = int(os.getenv("DRIVING_CACHE_MAX_ENTRIES", "500000"))
+DRIVING_CACHE_HOT_ENTRIES = int(os.getenv("DRIVING_CACHE_HOT_ENTRIES", "20000"))
+# Expired and least recently used rows are pruned by a write at most this often
+DRIVING_CACHE_MAINTENANCE_SECONDS = int(os.getenv("DRIVING_CACHE_MAINTENANCE_SECONDS", "300"))
+# Reads record recency in memory and write it back in batches of this many keys (or with the next write)
+DRIVING_CACHE_TOUCH_BATCH = 1000
+
+DrivingData = Dict[str, float]
+
+
+class DrivingCache:
+    """
+    Persistent (origin, destination) -> driving data store.
+
+    A bounded in-memory LRU answers hot pairs without touching disk; misses
+    fall through to an optional `shared` cache (Redis, shared by every worker)
+    and then to SQLite, which keeps entries across restarts and trims the
+    least recently used rows once it holds more than `max_entries`. Database
+    and Redis work runs in a worker thread so lookups never block the event loop.
+
+    Several workers can share the SQLite file, so a busy or failing database
+    is logged and treated as a miss or a skipped write, never raised.
+    Expiry and trimming run every `maintenance_seconds` rather than on every
+    write, and reads batch their recency updates.
+    """
+
+    def __init__(self, path: Optional[str] = DRIVING_CACHE_PATH, ttl: int = DRIVING_CACHE_TTL_SECONDS,
+                 max_entries: int = DRIVING_CACHE_MAX_ENTRIES, hot_entries: int = DRIVING_CACHE_HOT_ENTRIES,
+                 shared: Optional[Any] = None, maintenance_seconds: float = DRIVING_CACHE_MAINTENANCE_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hot_entries = hot_entries
+        self.shared = shared
+        self.maintenance_seconds = maintenance_seconds
+        self._last_maintenance = 0.0
+        # key -> last read time not yet written to last_used
+        self._touched: Dict[str, float] = {}
+        self._hot: "OrderedDict[str, Tuple[DrivingData, float]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_lock = threading.Lock()
+        self._stats = {"hot_hits": 0, "shared_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "errors": 0}
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._db is None and self.path:
+            try:
+                os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+                db = sqlite3.connect(self.path, check_same_thread=False)
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                db.execute(
+                    "CREATE TABLE IF NOT EXISTS driving ("
+                    "key TEXT PRIMARY KEY, distance_miles REAL NOT NULL, duration_minutes REAL NOT NULL, "
+                    "expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+                )
+                db.execute("CREATE INDEX IF NOT EXISTS driving_last_used ON driving (last_used)")
+                db.execute("CREATE INDEX IF NOT EXISTS driving_expires_at ON driving (expires_at)")
+                db.commit()
+                self._db = db
+            except sqlite3.Error as e:
+                print(f"Driving cache {self.path} unavailable, using memory only: {e}")
+                self.path = None
+        return self._db
+
+    def _remember(self, key: str, value: DrivingData, expires_at: float) -> None:
+        self._hot[key] = (value, expires_at)
+        self._hot.move_to_end(key)
+        while len(self._hot) > self.hot_entries:
+            self._hot.popitem(last=False)
+
+    def _failed(self, db: sqlite3.Connection, action: str, error: sqlite3.Error) -> None:
+        self._stats["errors"] += 1
+        print(f"Driving cache {action} failed: {error}")
+        try:
+            db.rollback()
+        except sqlite3.Error:
+            pass
+
+    def _flush_touched(self, db: sqlite3.Connection) -> None:
+        if self._touched:
+            db.executemany("UPDATE driving SET last_used = ? WHERE key = ?",
+                           [(used, key) for key, used in self._touched.items()])
+            self._touched.clear()
+
+    def _maintain(self, db: sqlite3.Connection, now: float) -> None:
+        """Drop expired rows and trim to max_entries (both indexed), at most every maintenance_seconds."""
+        if now - self._last_maintenance < self.maintenance_seconds:
+            return
+        self._last_maintenance = now
+        db.execute("DELETE FROM driving WHERE expires_at <= ?", (now,))
+        excess = db.execute("SELECT COUNT(*) FROM driving").fetchone()[0] - self.max_entries
+        if excess > 0:
+            db.execute(
+                "DELETE FROM driving WHERE key IN (SELECT key FROM driving ORDER BY last_used LIMIT ?)",
+                (excess,),
+            )
+            self._stats["evictions"] += excess
+
+    def _read(self, keys: List[str]) -> Dict[str, Tuple[DrivingData, float]]:
+        with self._db_lock:
+            db = self._connect()
+            if db is None:
+                return {}
+            now = time.time()
+            found: Dict[str, Tuple[DrivingData, float]] = {}
+            try:
+                # Stay under SQLite's bound-parameter limit
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    rows = db.execute(
+                        f"SELECT key, distance_miles, duration_minutes, expires_at FROM driving "
+                        f"WHERE key IN ({','.join('?' * len(chunk))}) AND expires_at > ?",
+                        (*chunk, now),
+                    ).fetchall()
+                    for key, distance_miles, duration_minutes, expires_at in rows:
+                        found[key] = ({"distance_miles": distance_miles, "duration_minutes": duration_minutes}, expires_at)
+                self._touched.update(dict.fromkeys(found, now))
+                if len(self._touched) >= DRIVING_CACHE_TOUCH_BATCH:
+                    self._flush_touched(db)
+                    db.commit()
+            except sqlite3.Error as e:
+                self._failed(db, "read", e)
+            return found
+
+    def _write(self, items: List[Tuple[str, DrivingData, float]]) -> None:
+        with self._db_lock:
+            db = self._connect()
+            if db is None:
+                return
+            now = time.time()
+            try:
+                db.executemany(
+                    "INSERT OR REPLACE INTO driving (key, distance_miles, duration_minutes, expires_at, last_used) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    [(key, value["distance_miles"], value["duration_minutes"], expires_at, now)
+                     for key, value, expires_at in items],
+                )
+                self._flush_touched(db)
+                self._maintain(db, now)
+                db.commit()
+            except sqlite3.Error as e:
+                self._failed(db, "write", e)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, DrivingData]:
+        """Cached driving data for the keys that have a live entry."""
+        now = time.time()
+        results: Dict[str, DrivingData] = {}
+        cold: List[str] = []
+        for key in dict.fromkeys(keys):
+            entry = self._hot.get(key)
+            if entry and entry[1] > now:
+                self._hot.move_to_end(key)
+                results[key] = entry[0]
+                self._stats["hot_hits"] += 1
+            else:
+                cold.append(key)
+
+        if cold and self.shared is not None:
+            shared = await asyncio.to_thread(self.shared.get_many, cold)
+            for key, value in shared.items():
+                # Redis enforces the TTL; keep the hot copy no longer than a fresh entry would live
+                self._remember(key, value, now + self.ttl)
+                results[key] = value
+            self._stats["shared_hits"] += len(shared)
+            cold = [key for key in cold if key not in shared]
+
+        found: Dict[str, Tuple[DrivingData, float]] = {}
+        if cold and self.path:
+            found = await asyncio.to_thread(self._read, cold)
+            for key, (value, expires_at) in found.items():
+                self._remember(key, value, expires_at)
+                results[key] = value
+        self._stats["disk_hits"] += len(found)
+        self._stats["misses"] += len(cold) - len(found)
+        return results
+
+    async def get(self, key: str) -> Optional[DrivingData]:
+        return (await self.get_many([key])).get(key)
+
+    async def set_many(self, items: Dict[str, DrivingData]) -> None:
+        if not items:
+            return
+        expires_at = time.time() + self.ttl
+        for key, value in items.items():
+            self._remember(key, value, expires_at)
+        if self.shared is not None:
+            await asyncio.to_thread(self.shared.set_many, items, self.ttl)
+        if self.path:
+            await asyncio.to_thread(self._write, [(key, value, expires_at) for key, value in items.items()])
+
+    async def set(self, key: str, value: DrivingData) -> None:
+        await self.set_many({key: value})
+
+    def clear(self) -> None:
+        self._hot.clear()
+        if self.shared is not None:
+            self.shared.clear(["driving"])
+        with self._db_lock:
+            self._touched.clear()
+            db = self._connect()
+            if db is not None:
+                try:
+                    db.execute("DELETE FROM driving")
+                    db.commit()
+                except sqlite3.Error as e:
+                    self._failed(db, "clear", e)
+
+    def close(self) -> None:
+        with self._db_lock:
+            if self._db is not None:
+                try:
+                    self._flush_touched(self._db)
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    self._failed(self._db, "close", e)
+                self._db.close()
+                self._db = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = dict(self._stats)
+        stats["hot_entries"] = len(self._hot)
+        stats["path"] = self.path
+        stats["shared"] = self.shared is not None
+        if self.path:
+            with self._db_lock:
+                db = self._connect()
+                try:
+                    stats["disk_entries"] = db.execute("SELECT COUNT(*) FROM driving").fetchone()[0] if db else 0
+                except sqlite3.Error as e:
+                    self._failed(db, "count", e)
+                    stats["disk_entries"] = None
+        return stats
+
+
+_driving_cache: Optional[DrivingCache] = None
+
+
+def get_driving_cache() -> DrivingCache:
+    global _driving_cache
+    if _driving_cache is None:
+        shared = get_redis_cache() if "driving" in REDIS_CACHE_NAMESPACES else None
+        _driving_cache = DrivingCache(shared=shared)
+    return _driving_cache
+
+
+def close_driving_cache() -> None:
+    """Close the SQLite connection (called from the app lifespan)."""
+    global _driving_cache
+    if _driving_cache is not None:
+        _driving_cache.close()
+        _driving_cache = None
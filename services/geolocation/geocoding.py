@@ -0,0 +1,218 @@
+import os
+import asyncio
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from dotenv import load_dotenv
+
+from services.geolocation.zip_centroids import lookup_zip_centroid, normalize_location
+
+load_dotenv()
+
+MAPBOX_TOKEN = os.getenv("MAPBOX_TOKEN")
+GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
+
+MAPBOX_GEOCODING_URL = "https://api.mapbox.com/geocoding/v5/mapbox.places"
+GOOGLE_GEOCODING_URL = "https://maps.googleapis.com/maps/api/geocode/json"
+
+# Providers are tried in this order until one returns coordinates
+GEOCODER_CHAIN = os.getenv("GEOCODER_CHAIN", "zip,google,mapbox")
+
+# Per-provider timeouts in seconds; a provider that overruns is skipped, not retried
+GOOGLE_GEOCODER_TIMEOUT = float(os.getenv("GOOGLE_GEOCODER_TIMEOUT", "5"))
+MAPBOX_GEOCODER_TIMEOUT = float(os.getenv("MAPBOX_GEOCODER_TIMEOUT", "3"))
+
+# Connection pool shared by every remote provider
+GEOCODER_MAX_CONNECTIONS = int(os.getenv("GEOCODER_MAX_CONNECTIONS", "20"))
+GEOCODER_MAX_KEEPALIVE = int(os.getenv("GEOCODER_MAX_KEEPALIVE", "10"))
+GEOCODER_CONNECT_TIMEOUT = float(os.getenv("GEOCODER_CONNECT_TIMEOUT", "2"))
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=GEOCODER_MAX_CONNECTIONS,
+            max_keepalive_connections=GEOCODER_MAX_KEEPALIVE,
+        ),
+        timeout=httpx.Timeout(max(GOOGLE_GEOCODER_TIMEOUT, MAPBOX_GEOCODER_TIMEOUT), connect=GEOCODER_CONNECT_TIMEOUT),
+    )
+
+
+async def init_geocoding_client() -> httpx.AsyncClient:
+    """Create the process-wide geocoding client (called from the app lifespan)."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+async def close_geocoding_client() -> None:
+    """Close the shared client and release its pooled connections."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_geocoding_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it lazily when used outside the lifespan."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+class GeocodingProvider:
+    """One way of turning a ZIP or address into (lat, lon).
+
+    `geocode` returns None when the provider has no answer; any exception is
+    treated as a provider failure and the chain moves on to the next one.
+    """
+    name = ""
+    timeout: Optional[float] = None
+
+    async def geocode(self, query: str) -> Optional[Tuple[float, float]]:
+        raise NotImplementedError
+
+
+class ZipCentroidProvider(GeocodingProvider):
+    """Offline ZIP centroid table; answers plain ZIPs without any network call."""
+    name = "zip"
+
+    async def geocode(self, query: str) -> Optional[Tuple[float, float]]:
+        return lookup_zip_centroid(query)
+
+
+class GoogleGeocodingProvider(GeocodingProvider):
+    """Google Geocoding API over the shared async client."""
+    name = "google"
+
+    def __init__(self, api_key: Optional[str] = None, timeout: float = GOOGLE_GEOCODER_TIMEOUT):
+        self.api_key = api_key or GOOGLE_MAPS_API_KEY
+        self.timeout = timeout
+
+    async def geocode(self, query: str) -> Optional[Tuple[float, float]]:
+        if not self.api_key:
+            return None
+        resp = await get_geocoding_client().get(
+            GOOGLE_GEOCODING_URL,
+            params={"address": query, "components": "country:US", "key": self.api_key},
+            timeout=self.timeout,
+        )
+        resp.raise_for_status()
+        data = resp.json()
+        status = data.get("status")
+        if status == "ZERO_RESULTS":
+            return None
+        if status != "OK":
+            raise ValueError(f"Google geocoding status {status}: {data.get('error_message', '')}")
+        location = data["results"][0]["geometry"]["location"]
+        return location["lat"], location["lng"]
+
+
+class MapboxGeocodingProvider(GeocodingProvider):
+    """Mapbox Geocoding API over the shared async client."""
+    name = "mapbox"
+
+    def __init__(self, token: Optional[str] = None, timeout: float = MAPBOX_GEOCODER_TIMEOUT):
+        self.token = token or MAPBOX_TOKEN
+        self.timeout = timeout
+
+    async def geocode(self, query: str) -> Optional[Tuple[float, float]]:
+        if not self.token:
+            return None
+        resp = await get_geocoding_client().get(
+            f"{MAPBOX_GEOCODING_URL}/{query}.json",
+            params={"access_token": self.token, "country": "US", "limit": 1},
+            timeout=self.timeout,
+        )
+        resp.raise_for_status()
+        features = resp.json().get("features")
+        if not features:
+            return None
+        # Mapbox returns coordinates as [lon, lat]
+        lon, lat = features[0]["center"]
+        return lat, lon
+
+
+PROVIDERS = {
+    "zip": ZipCentroidProvider,
+    "google": GoogleGeocodingProvider,
+    "mapbox": MapboxGeocodingProvider,
+}
+
+
+class GeocodingUnavailable(Exception):
+    """No provider found the query and at least one of them failed, so the miss is not conclusive."""
+
+
+class GeocodingChain:
+    """Try providers in order and return the first coordinates found."""
+
+    def __init__(self, providers: List[GeocodingProvider]):
+        self.providers = providers
+        self._stats: Dict[str, Dict[str, int]] = {
+            p.name: {"hits": 0, "misses": 0, "errors": 0, "timeouts": 0} for p in providers
+        }
+
+    async def geocode(self, query: str) -> Optional[Tuple[float, float]]:
+        """First coordinates found, None when every provider answered "not found".
+
+        Raises GeocodingUnavailable when nothing was found but a provider
+        errored or timed out, so callers don't remember an outage as a miss.
+        """
+        failed = False
+        for provider in self.providers:
+            stats = self._stats[provider.name]
+            try:
+                coords = await asyncio.wait_for(provider.geocode(query), provider.timeout)
+            except asyncio.TimeoutError:
+                stats["timeouts"] += 1
+                print(f"Geocoder {provider.name} timed out for {query!r}")
+                failed = True
+                continue
+            except Exception as e:
+                stats["errors"] += 1
+                print(f"Error geocoding {query!r} with {provider.name}: {e}")
+                failed = True
+                continue
+            if coords:
+                stats["hits"] += 1
+                return coords
+            stats["misses"] += 1
+        if failed:
+            raise GeocodingUnavailable(f"No geocoder could resolve {query!r}")
+        return None
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        return {name: dict(stats) for name, stats in self._stats.items()}
+
+
+def build_geocoding_chain(names: Optional[str] = None) -> GeocodingChain:
+    """Build a chain from a comma-separated provider list such as "zip,google,mapbox"."""
+    providers = []
+    for name in (names or GEOCODER_CHAIN).split(","):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in PROVIDERS:
+            raise ValueError(f"Unknown geocoding provider: {name}")
+        providers.append(PROVIDERS[name]())
+    return GeocodingChain(providers)
+
+
+_chain: Optional[GeocodingChain] = None
+
+
+def get_geocoder() -> GeocodingChain:
+    global _chain
+    if _chain is None:
+        _chain = build_geocoding_chain()
+    return _chain
+
+
+async def geocode(query: str) -> Optional[Tuple[float, float]]:
+    """Resolve a ZIP or address through the configured provider chain."""
+    return await get_geocoder().geocode(normalize_location(query))
@@ -1,6 +1,10 @@
 
 import math
 import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
 from dotenv import load_dotenv
 import requests
 import httpx
@@ -14,8 +18,103 @@ GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY")
 
 gmaps = googlemaps.Client(key=GOOGLE_MAPS_API_KEY)
 
+# Google Distance Matrix accepts at most 25 destinations (and 100 elements) per request
+GOOGLE_MATRIX_MAX_DESTINATIONS = 25
+
+# Threads dedicated to the blocking googlemaps client, and how many calls may wait for one
+GOOGLE_MAPS_WORKERS = int(os.getenv("GOOGLE_MAPS_WORKERS", "16"))
+GOOGLE_MAPS_MAX_QUEUE = int(os.getenv("GOOGLE_MAPS_MAX_QUEUE", "256"))
+
+
+class GoogleMapsBusy(Exception):
+    """The Google Maps executor queue is full."""
+
+
+class GoogleMapsExecutor:
+    """
+    Sized thread pool for the synchronous googlemaps client.
+
+    Keeps Google calls off the event loop's default executor and sheds load
+    with GoogleMapsBusy once `max_queue` calls are already waiting for a thread.
+    """
+
+    def __init__(self, workers: int = GOOGLE_MAPS_WORKERS, max_queue: int = GOOGLE_MAPS_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="googlemaps")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._in_flight = 0
+        self._peak_queued = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def _track(self, fn: Callable[[], Any]) -> Callable[[], Any]:
+        def task() -> Any:
+            with self._lock:
+                self._queued -= 1
+                self._in_flight += 1
+            try:
+                return fn()
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+                    self._completed += 1
+        return task
+
+    async def run(self, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            if self._queued >= self.max_queue:
+                self._rejected += 1
+                raise GoogleMapsBusy(f"{self._queued} Google Maps calls already queued")
+            self._queued += 1
+            self._peak_queued = max(self._peak_queued, self._queued)
+        future = self._pool.submit(self._track(fn))
+        future.add_done_callback(self._on_done)
+        return await asyncio.wrap_future(future)
+
+    def _on_done(self, future) -> None:
+        # Calls cancelled while still queued never reach `task`
+        if future.cancelled():
+            with self._lock:
+                self._queued -= 1
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queued": self._queued,
+                "in_flight": self._in_flight,
+                "peak_queued": self._peak_queued,
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
+
+
+_google_maps_executor: Optional[GoogleMapsExecutor] = None
+
+
+def get_google_maps_executor() -> GoogleMapsExecutor:
+    global _google_maps_executor
+    if _google_maps_executor is None:
+        _google_maps_executor = GoogleMapsExecutor()
+    return _google_maps_executor
+
+
+def shutdown_google_maps_executor() -> None:
+    """Stop the Google Maps threads (called from the app lifespan)."""
+    global _google_maps_executor
+    if _google_maps_executor is not None:
+        _google_maps_executor.shutdown()
+        _google_maps_executor = None
+
+EARTH_RADIUS_MILES = 3958.8
+
 def haversine(lat1, lon1, lat2, lon2):
-    R = 3958.8  # Radius of earth in miles
+    R = EARTH_RADIUS_MILES  # Radius of earth in miles
     phi1 = math.radians(lat1)
     phi2 = math.radians(lat2)
     dphi = math.radians(lat2 - lat1)
@@ -25,6 +124,42 @@ def haversine(lat1, lon1, lat2, lon2):
     c = 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
     return R * c
 
+
+Coords = Tuple[float, float]
+
+class PointSet:
+    """(lat, lon) points held as radian arrays so distance queries run vectorized.
+
+    Build once per dataset and reuse across searches; the radians and the
+    latitude cosines are computed here, not per query.
+    """
+
+    def __init__(self, coords: Sequence[Coords]):
+        degrees = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        self.lat = np.radians(degrees[:, 0])
+        self.lon = np.radians(degrees[:, 1])
+        self.cos_lat = np.cos(self.lat)
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def distances(self, origins: Union[Coords, Sequence[Coords]], indices: Optional[np.ndarray] = None) -> np.ndarray:
+        """Great-circle miles from each origin to every point (or just `indices`), shape (origins, points)."""
+        origins = np.radians(np.asarray(origins, dtype=np.float64).reshape(-1, 2))
+        origin_lat = origins[:, 0:1]
+        origin_lon = origins[:, 1:2]
+        lat, lon, cos_lat = self.lat, self.lon, self.cos_lat
+        if indices is not None:
+            lat, lon, cos_lat = lat[indices], lon[indices], cos_lat[indices]
+
+        a = (np.sin((lat - origin_lat) / 2) ** 2
+             + np.cos(origin_lat) * cos_lat * np.sin((lon - origin_lon) / 2) ** 2)
+        return 2 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    def within_radius(self, origins: Union[Coords, Sequence[Coords]], radius_miles: float) -> List[np.ndarray]:
+        """Indices of the points within `radius_miles` of each origin."""
+        return [np.flatnonzero(row <= radius_miles) for row in self.distances(origins)]
+
 async def get_driving_distance_and_time_mapbox(origin_coords: tuple, dest_coords: tuple) -> dict:
     """
     Get driving distance (miles) and time (minutes) using Mapbox Directions API.
@@ -120,9 +255,7 @@ async def get_coordinates_google_async(zip_code: str):
         raise ValueError("GOOGLE_MAPS_API_KEY is missing. Please set it in your environment variables.")
 
     try:
-        loop = asyncio.get_event_loop()
-        geocode_result = await loop.run_in_executor(
-            None, 
+        geocode_result = await get_google_maps_executor().run(
             lambda: gmaps.geocode(
                 address=zip_code,
                 components={"country": "US"}
@@ -147,9 +280,7 @@ async def get_driving_distance_and_time_google(origin_coords: tuple, dest_coords
     origin_coords and dest_coords are tuples: (lat, lon)
     """
     try:
-        loop = asyncio.get_event_loop()
-        directions_result = await loop.run_in_executor(
-            None,
+        directions_result = await get_google_maps_executor().run(
             lambda: gmaps.directions(
                 origin=origin_coords,
                 destination=dest_coords,
@@ -177,3 +308,58 @@ async def get_driving_distance_and_time_google(origin_coords: tuple, dest_coords
     except Exception as e:
         print(f"Error fetching driving data (Google Maps): {e}")
         return None
+
+
+def _matrix_element_to_driving_data(element: dict) -> Optional[dict]:
+    if element.get("status") != "OK":
+        return None
+    return {
+        "distance_miles": element["distance"]["value"] * 0.000621371,
+        "duration_minutes": element["duration"]["value"] / 60,
+    }
+
+async def get_driving_matrix_google(origin_coords: tuple, dest_coords_list: List[tuple]) -> List[Optional[dict]]:
+    """
+    Driving distance (miles) and time (minutes) from one origin to many destinations
+    using the Google Distance Matrix API.
+    Destinations are sent in chunks of GOOGLE_MATRIX_MAX_DESTINATIONS; results come
+    back in the order of `dest_coords_list`, None where no route was found or a chunk failed.
+    """
+    results, _ = await get_driving_matrix_google_with_failures(origin_coords, dest_coords_list)
+    return results
+
+
+async def get_driving_matrix_google_with_failures(origin_coords: tuple,
+                                                  dest_coords_list: List[tuple]) -> Tuple[List[Optional[dict]], int]:
+    """
+    Like `get_driving_matrix_google`, also returning how many destinations were
+    in chunks whose request failed (as opposed to having no route).
+    """
+    failed = 0
+
+    async def fetch_chunk(chunk: List[tuple]) -> List[Optional[dict]]:
+        nonlocal failed
+        try:
+            matrix = await get_google_maps_executor().run(
+                lambda: gmaps.distance_matrix(
+                    origins=[origin_coords],
+                    destinations=chunk,
+                    mode="driving"
+                )
+            )
+            elements = matrix["rows"][0]["elements"] if matrix.get("rows") else []
+            results = [_matrix_element_to_driving_data(element) for element in elements]
+            return results + [None] * (len(chunk) - len(results))
+        except Exception as e:
+            print(f"Error fetching driving matrix (Google Maps): {e}")
+            failed += len(chunk)
+            return [None] * len(chunk)
+
+    chunks = [
+        dest_coords_list[start:start + GOOGLE_MATRIX_MAX_DESTINATIONS]
+        for start in range(0, len(dest_coords_list), GOOGLE_MATRIX_MAX_DESTINATIONS)
+    ]
+    results: List[Optional[dict]] = []
+    for chunk_results in await asyncio.gather(*[fetch_chunk(chunk) for chunk in chunks]):
+        results.extend(chunk_results)
+    return results, failed
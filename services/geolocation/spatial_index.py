@@ -0,0 +1,130 @@
+import os
+import math
+from typing import Dict, List, Sequence, Tuple, Union
+
+import numpy as np
+from dotenv import load_dotenv
+
+from services.geolocation.geolocation_service import EARTH_RADIUS_MILES, Coords, PointSet
+
+load_dotenv()
+
+# Grid cell size; ~35 miles of latitude at the default
+SPATIAL_INDEX_CELL_DEGREES = float(os.getenv("SPATIAL_INDEX_CELL_DEGREES", "0.5"))
+
+MILES_PER_DEGREE = EARTH_RADIUS_MILES * math.pi / 180
+
+
+class SpatialIndex:
+    """Lat/lon grid over a PointSet for radius and k-nearest queries.
+
+    Points are bucketed into fixed-size degree cells. A radius query only
+    computes exact distances for points in the cells overlapping the
+    search cap's bounding box, so the cost follows the number of nearby
+    points rather than the size of the dataset. The index is immutable;
+    build a new one when the coordinates change.
+    """
+
+    def __init__(self, coords: Sequence[Coords], cell_degrees: float = SPATIAL_INDEX_CELL_DEGREES):
+        self.points = PointSet(coords)
+        self.cell_degrees = cell_degrees
+        self.n_lat = int(math.ceil(180 / cell_degrees))
+        self.n_lon = int(math.ceil(360 / cell_degrees))
+
+        cells = (self._lat_index(np.degrees(self.points.lat)) * self.n_lon
+                 + self._lon_index(np.degrees(self.points.lon)))
+        self._order = np.argsort(cells, kind="stable")
+        ids, starts, counts = np.unique(cells[self._order], return_index=True, return_counts=True)
+        self._cells: Dict[int, Tuple[int, int]] = {
+            int(cell): (int(start), int(start + count)) for cell, start, count in zip(ids, starts, counts)
+        }
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _lat_index(self, lat_deg):
+        return np.clip(np.floor((np.asarray(lat_deg) + 90) / self.cell_degrees), 0, self.n_lat - 1).astype(np.int64)
+
+    def _lon_index(self, lon_deg):
+        return (np.floor((np.asarray(lon_deg) + 180) / self.cell_degrees).astype(np.int64)) % self.n_lon
+
+    def _candidates(self, lat: float, lon: float, radius_miles: float) -> np.ndarray:
+        """Indices of every point in the grid cells that can hold points within the radius."""
+        angle = radius_miles / EARTH_RADIUS_MILES
+        dlat = math.degrees(angle)
+        lat_first = int(self._lat_index(max(lat - dlat, -90.0)))
+        lat_last = int(self._lat_index(min(lat + dlat, 90.0)))
+
+        # Widest longitude span of the spherical cap; the whole ring near the poles
+        if lat - dlat <= -90 or lat + dlat >= 90 or math.sin(angle) >= math.cos(math.radians(lat)):
+            lon_cells = range(self.n_lon)
+        else:
+            dlon = math.degrees(math.asin(math.sin(angle) / math.cos(math.radians(lat))))
+            lon_first = int(math.floor((lon - dlon + 180) / self.cell_degrees))
+            lon_last = int(math.floor((lon + dlon + 180) / self.cell_degrees))
+            if lon_last - lon_first + 1 >= self.n_lon:
+                lon_cells = range(self.n_lon)
+            else:
+                lon_cells = [i % self.n_lon for i in range(lon_first, lon_last + 1)]
+
+        # Past this many cells a full vectorized scan is cheaper than the lookups
+        if (lat_last - lat_first + 1) * len(lon_cells) > len(self._cells):
+            return np.arange(len(self.points))
+
+        slices = []
+        for lat_cell in range(lat_first, lat_last + 1):
+            row = lat_cell * self.n_lon
+            for lon_cell in lon_cells:
+                bounds = self._cells.get(row + lon_cell)
+                if bounds:
+                    slices.append(self._order[bounds[0]:bounds[1]])
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(slices)
+
+    def query(self, origin: Coords, radius_miles: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(indices, miles) of the points within `radius_miles` of one origin, in grid order."""
+        candidates = self._candidates(origin[0], origin[1], radius_miles)
+        if len(candidates) == 0:
+            return candidates, np.empty(0)
+        distances = self.points.distances(origin, candidates)[0]
+        keep = distances <= radius_miles
+        return candidates[keep], distances[keep]
+
+    def query_many(self, origins: Sequence[Coords], radii_miles: Sequence[float]) -> List[Tuple[np.ndarray, np.ndarray]]:
+        """`query` for several origins, each with its own radius; indices come back in ascending order.
+
+        The grid candidates of all origins are merged and measured against
+        every origin in a single vectorized distance pass.
+        """
+        if len(origins) == 0:
+            return []
+        candidates = np.unique(np.concatenate(
+            [self._candidates(origin[0], origin[1], radius) for origin, radius in zip(origins, radii_miles)]
+        ).astype(np.int64))
+        if len(candidates) == 0:
+            return [(candidates, np.empty(0)) for _ in origins]
+        distances = self.points.distances(origins, candidates)
+        keep = distances <= np.asarray(radii_miles, dtype=np.float64)[:, None]
+        return [(candidates[row], distances[i][row]) for i, row in enumerate(keep)]
+
+    def within_radius(self, origins: Union[Coords, Sequence[Coords]], radius_miles: float) -> List[np.ndarray]:
+        """Indices of the points within `radius_miles` of each origin, in ascending order."""
+        origins = np.asarray(origins, dtype=np.float64).reshape(-1, 2)
+        return [np.sort(self.query(tuple(origin), radius_miles)[0]) for origin in origins]
+
+    def nearest(self, origin: Coords, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """The `k` closest points to `origin` as (indices, miles), nearest first."""
+        k = min(k, len(self.points))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        # Grow the search radius until it holds k points; the k nearest overall are then inside it
+        radius = self.cell_degrees * MILES_PER_DEGREE
+        while True:
+            indices, distances = self.query(origin, radius)
+            if len(indices) >= k or radius >= math.pi * EARTH_RADIUS_MILES:
+                break
+            radius *= 2
+        order = np.argsort(distances, kind="stable")[:k]
+        return indices[order], distances[order]
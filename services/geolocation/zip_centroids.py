@@ -0,0 +1,157 @@
+"""
+Offline ZIP -> centroid lookup backed by the Census ZCTA gazetteer.
+
+Build the bundled table from the gazetteer file
+(https://www.census.gov/geographies/reference-files/time-series/geo/gazetteer-files.html):
+
+    python -m services.geolocation.zip_centroids build 2023_Gaz_zcta_national.txt
+"""
+import os
+import re
+import sys
+import math
+from array import array
+from typing import Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ZIP_CENTROIDS_PATH = os.getenv(
+    "ZIP_CENTROIDS_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "zip_centroids.bin"),
+)
+
+ZIP_SPACE = 100000
+_MAGIC = b"ZIPCENT1"
+
+# ZIPs as people and spreadsheets write them: leading zeros lost, optional +4 suffix
+_LOOSE_ZIP = re.compile(r"(\d{3,5})(?:-\d{4})?|(\d{5})\d{4}")
+
+
+def zip5(zip_code) -> Optional[str]:
+    """The 5-digit ZIP of a plain ZIP or ZIP+4 input, None for anything else."""
+    value = str(zip_code).strip()
+    if len(value) == 10 and value[5] == "-" and value[6:].isdigit():
+        value = value[:5]
+    if len(value) == 5 and value.isdigit():
+        return value
+    return None
+
+
+def normalize_location(query) -> str:
+    """Canonical form of a ZIP or address, so equivalent inputs share one cache entry.
+
+    ZIPs are trimmed, lose their +4 suffix and get back leading zeros that a
+    numeric column dropped ("2134", " 02134-1234" -> "02134"). Anything else is
+    treated as an address: whitespace is collapsed and case folded.
+    """
+    if isinstance(query, float) and query.is_integer():
+        query = int(query)
+    value = " ".join(str(query).split())
+    match = _LOOSE_ZIP.fullmatch(value)
+    if match:
+        return (match.group(1) or match.group(2)).zfill(5)
+    return value.casefold()
+
+
+class ZipCentroidTable:
+    """ZIP centroids in two float32 arrays indexed by the 5-digit ZIP (NaN = unknown)."""
+
+    def __init__(self, lats: array, lons: array):
+        self._lats = lats
+        self._lons = lons
+        self._count = sum(1 for lat in lats if not math.isnan(lat))
+
+    @classmethod
+    def empty(cls) -> "ZipCentroidTable":
+        return cls(array("f", [math.nan]) * ZIP_SPACE, array("f", [math.nan]) * ZIP_SPACE)
+
+    @classmethod
+    def from_gazetteer(cls, path: str) -> "ZipCentroidTable":
+        """Parse the tab-separated Census ZCTA gazetteer (GEOID ... INTPTLAT INTPTLONG)."""
+        table = cls.empty()
+        with open(path, encoding="utf-8") as f:
+            header = [col.strip() for col in f.readline().split("\t")]
+            geoid, lat_col, lon_col = header.index("GEOID"), header.index("INTPTLAT"), header.index("INTPTLONG")
+            for line in f:
+                cols = line.rstrip("\n").split("\t")
+                if len(cols) < len(header) or zip5(cols[geoid]) is None:
+                    continue
+                index = int(cols[geoid])
+                table._lats[index] = float(cols[lat_col])
+                table._lons[index] = float(cols[lon_col])
+        table._count = sum(1 for lat in table._lats if not math.isnan(lat))
+        return table
+
+    @classmethod
+    def load(cls, path: str) -> "ZipCentroidTable":
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a ZIP centroid table")
+            lats, lons = array("f"), array("f")
+            lats.fromfile(f, ZIP_SPACE)
+            lons.fromfile(f, ZIP_SPACE)
+        if sys.byteorder == "big":
+            lats.byteswap()
+            lons.byteswap()
+        return cls(lats, lons)
+
+    def save(self, path: str) -> None:
+        """Write the compact little-endian binary form (~800 KB)."""
+        lats, lons = array("f", self._lats), array("f", self._lons)
+        if sys.byteorder == "big":
+            lats.byteswap()
+            lons.byteswap()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(_MAGIC)
+            lats.tofile(f)
+            lons.tofile(f)
+
+    def lookup(self, zip_code) -> Optional[Tuple[float, float]]:
+        value = zip5(zip_code)
+        if value is None:
+            return None
+        index = int(value)
+        lat = self._lats[index]
+        if math.isnan(lat):
+            return None
+        return lat, self._lons[index]
+
+    def __len__(self) -> int:
+        return self._count
+
+
+_table: Optional[ZipCentroidTable] = None
+
+
+def get_zip_centroids() -> ZipCentroidTable:
+    """The bundled table, loaded on first use (the app lifespan loads it at startup); empty if the data file is missing."""
+    global _table
+    if _table is None:
+        try:
+            _table = ZipCentroidTable.load(ZIP_CENTROIDS_PATH)
+            print(f"Loaded {len(_table)} ZIP centroids from {ZIP_CENTROIDS_PATH}")
+        except (OSError, ValueError) as e:
+            print(
+                f"WARNING: ZIP centroid table {ZIP_CENTROIDS_PATH} unavailable ({e}); EVERY ZIP will be geocoded "
+                f"remotely. Build it with `python -m services.geolocation.zip_centroids build <gazetteer.txt>`."
+            )
+            _table = ZipCentroidTable.empty()
+    return _table
+
+
+def lookup_zip_centroid(zip_code) -> Optional[Tuple[float, float]]:
+    """Resolve a US ZIP locally; None means the caller should fall back to a remote geocoder."""
+    return get_zip_centroids().lookup(zip_code)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (3, 4) or sys.argv[1] != "build":
+        print("usage: python -m services.geolocation.zip_centroids build <gazetteer.txt> [output.bin]")
+        sys.exit(1)
+    output = sys.argv[3] if len(sys.argv) == 4 else ZIP_CENTROIDS_PATH
+    built = ZipCentroidTable.from_gazetteer(sys.argv[2])
+    built.save(output)
+    print(f"Wrote {len(built)} ZIP centroids to {output}")
@@ -5,6 +5,34 @@ import os
 
 from main import app
 
+@pytest.fixture(autouse=True)
+def reset_warehouse_state(monkeypatch, tmp_path):
+    """Reset module-level warehouse caches so tests don't leak data into each other"""
+    from warehouse import warehouse_service
+    from services.airtable import airtable_client
+    from services.geolocation import drive_time_grid, driving_cache, geocoding, zip_centroids
+    airtable_client._rate_limiters.clear()
+    monkeypatch.setattr(geocoding, "_chain", None)
+    driving = driving_cache.DrivingCache(path=str(tmp_path / "driving_cache.sqlite3"))
+    monkeypatch.setattr(driving_cache, "_driving_cache", driving)
+    # Tests mock the remote geocoders; don't let a bundled ZIP table answer first
+    monkeypatch.setattr(zip_centroids, "_table", zip_centroids.ZipCentroidTable.empty())
+    monkeypatch.setattr(drive_time_grid, "DRIVE_TIME_GRID_PATH", str(tmp_path / "drive_time_grid.npz"))
+    monkeypatch.setattr(drive_time_grid, "_grid", None)
+    monkeypatch.setattr(drive_time_grid, "_grid_mtime", None)
+    monkeypatch.setattr(drive_time_grid, "_reload_task", None)
+    monkeypatch.setattr(warehouse_service, "WAREHOUSE_SNAPSHOT_PATH", str(tmp_path / "warehouse_snapshot.json.gz"))
+    monkeypatch.setattr(warehouse_service, "_snapshot_signature", None)
+    warehouse_service._cache.clear_warehouse_cache()
+    warehouse_service._cache._last_airtable_check = 0
+    for sync in warehouse_service._warehouse_syncs.values():
+        sync.reset()
+    warehouse_service._request_replica.reset()
+    warehouse_service._warehouse_locations.reset()
+    warehouse_service._circuity.reset()
+    yield
+    driving.close()
+
 @pytest.fixture
 def client():
     """Test client for FastAPI app"""
@@ -0,0 +1,109 @@
+import pytest
+from unittest.mock import AsyncMock, patch, MagicMock
+
+from services.airtable import airtable_client
+from services.airtable.airtable_client import (
+    AirtableRateLimited,
+    airtable_get,
+    init_airtable_client,
+    close_airtable_client,
+    get_airtable_client,
+    iter_airtable_pages,
+    fetch_all_airtable_records
+)
+
+def _response(payload, status_code=200, headers=None):
+    resp = MagicMock()
+    resp.status_code = status_code
+    resp.headers = headers or {}
+    resp.json.return_value = payload
+    resp.raise_for_status = MagicMock()
+    return resp
+
+class TestAirtableClient:
+    """Test cases for the shared Airtable client"""
+
+    @pytest.mark.asyncio
+    async def test_init_and_close_client(self):
+        """Test the lifespan hooks create and release a single shared client"""
+        client = await init_airtable_client()
+
+        assert get_airtable_client() is client
+        assert await init_airtable_client() is client
+
+        await close_airtable_client()
+
+        assert client.is_closed
+        assert airtable_client._client is None
+
+    @pytest.mark.asyncio
+    async def test_client_is_pooled(self):
+        """Test the shared client carries auth headers and pool limits"""
+        client = get_airtable_client()
+        try:
+            assert client.headers["Authorization"].startswith("Bearer ")
+            assert str(client.base_url).startswith(airtable_client.AIRTABLE_API_URL)
+            assert client.timeout.connect == airtable_client.AIRTABLE_CONNECT_TIMEOUT
+        finally:
+            await close_airtable_client()
+
+    @pytest.mark.asyncio
+    async def test_iter_airtable_pages_follows_offset(self):
+        """Test pagination follows the offset cursor over the shared client"""
+        mock_instance = AsyncMock()
+        mock_instance.get = AsyncMock(side_effect=[
+            _response({"records": [{"id": "rec1"}], "offset": "page2"}),
+            _response({"records": [{"id": "rec2"}]}),
+        ])
+
+        with patch('services.airtable.airtable_client.get_airtable_client', return_value=mock_instance):
+            pages = [page async for page in iter_airtable_pages("Warehouses")]
+
+        assert pages == [[{"id": "rec1"}], [{"id": "rec2"}]]
+        assert mock_instance.get.call_count == 2
+        assert mock_instance.get.call_args_list[1].kwargs["params"] == {"offset": "page2"}
+
+    @pytest.mark.asyncio
+    async def test_fetch_all_airtable_records(self):
+        """Test all pages are collected into one list"""
+        mock_instance = AsyncMock()
+        mock_instance.get = AsyncMock(side_effect=[
+            _response({"records": [{"id": "rec1"}], "offset": "page2"}),
+            _response({"records": [{"id": "rec2"}]}),
+        ])
+
+        with patch('services.airtable.airtable_client.get_airtable_client', return_value=mock_instance):
+            records = await fetch_all_airtable_records("Requests")
+
+        assert [r["id"] for r in records] == ["rec1", "rec2"]
+
+    @pytest.mark.asyncio
+    async def test_airtable_get_retries_429_honoring_retry_after(self):
+        """Test a 429 backs off for Retry-After and then succeeds"""
+        mock_instance = AsyncMock()
+        mock_instance.get = AsyncMock(side_effect=[
+            _response({}, status_code=429, headers={"Retry-After": "2"}),
+            _response({"records": [{"id": "rec1"}]}),
+        ])
+
+        with patch('services.airtable.airtable_client.get_airtable_client', return_value=mock_instance), \
+             patch('services.airtable.airtable_client.asyncio.sleep', new_callable=AsyncMock) as mock_sleep, \
+             patch.object(airtable_client.get_rate_limiter(), 'acquire', new_callable=AsyncMock):
+            data = await airtable_get("Warehouses")
+
+        assert data["records"][0]["id"] == "rec1"
+        mock_sleep.assert_awaited_once_with(2.0)
+
+    @pytest.mark.asyncio
+    async def test_airtable_get_gives_up_after_max_retries(self):
+        """Test persistent 429s raise AirtableRateLimited"""
+        mock_instance = AsyncMock()
+        mock_instance.get = AsyncMock(return_value=_response({}, status_code=429))
+
+        with patch('services.airtable.airtable_client.get_airtable_client', return_value=mock_instance), \
+             patch('services.airtable.airtable_client.asyncio.sleep', new_callable=AsyncMock), \
+             patch.object(airtable_client.get_rate_limiter(), 'acquire', new_callable=AsyncMock):
+            with pytest.raises(AirtableRateLimited):
+                await airtable_get("Warehouses")
+
+        assert mock_instance.get.call_count == airtable_client.AIRTABLE_MAX_RETRIES + 1
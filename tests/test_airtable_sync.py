@@ -0,0 +1,147 @@
+import pytest
+import httpx
+from unittest.mock import AsyncMock, patch
+
+from services.airtable.airtable_sync import AirtableTableSync, modified_since_formula
+
+class TestAirtableTableSync:
+    """Test cases for incremental Airtable table sync"""
+
+    def test_modified_since_formula(self):
+        """Test the delta formula covers modified and newly created records"""
+        formula = modified_since_formula(0)
+
+        assert "LAST_MODIFIED_TIME()" in formula
+        assert "CREATED_TIME()" in formula
+        assert "1970-01-01T00:00:00.000Z" in formula
+
+    @pytest.mark.asyncio
+    async def test_first_sync_is_full(self):
+        """Test the first sync pages the whole table without a filter"""
+        sync = AirtableTableSync("Warehouses")
+
+        with patch('services.airtable.airtable_sync.fetch_all_airtable_records', new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.return_value = [{"id": "rec1", "fields": {"Name": "A"}}]
+
+            records = await sync.sync()
+
+        assert records == [{"id": "rec1", "fields": {"Name": "A"}}]
+        assert "filterByFormula" not in mock_fetch.call_args.args[1]
+        assert sync.last_sync_was_full
+        assert sync.last_changed_ids == ["rec1"]
+
+    @pytest.mark.asyncio
+    async def test_delta_sync_merges_by_record_id(self):
+        """Test delta syncs request modified records only and merge them by ID"""
+        sync = AirtableTableSync("Warehouses")
+
+        with patch('services.airtable.airtable_sync.fetch_all_airtable_records', new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.return_value = [
+                {"id": "rec1", "fields": {"Name": "A"}},
+                {"id": "rec2", "fields": {"Name": "B"}},
+            ]
+            await sync.sync()
+
+            mock_fetch.return_value = [
+                {"id": "rec2", "fields": {"Name": "B2"}},
+                {"id": "rec3", "fields": {"Name": "C"}},
+            ]
+            records = await sync.sync()
+
+        assert "filterByFormula" in mock_fetch.call_args.args[1]
+        assert not sync.last_sync_was_full
+        assert [r["fields"]["Name"] for r in records] == ["A", "B2", "C"]
+        assert sync.last_changed_ids == ["rec2", "rec3"]
+
+    @pytest.mark.asyncio
+    async def test_full_reconcile_drops_deleted_records(self):
+        """Test a full reconcile removes records deleted in Airtable"""
+        sync = AirtableTableSync("Warehouses", full_reconcile_interval=0)
+
+        with patch('services.airtable.airtable_sync.fetch_all_airtable_records', new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.return_value = [{"id": "rec1", "fields": {}}, {"id": "rec2", "fields": {}}]
+            await sync.sync()
+
+            mock_fetch.return_value = [{"id": "rec2", "fields": {}}]
+            records = await sync.sync()
+
+        assert sync.last_sync_was_full
+        assert [r["id"] for r in records] == ["rec2"]
+        assert sync.get_stats()["full_syncs"] == 2
+
+    @pytest.mark.asyncio
+    async def test_version_hashes_only_changed_records(self):
+        """Test a sync hashes just the changed records and the version matches one built from scratch"""
+        from services.airtable import airtable_sync
+        sync = AirtableTableSync("Warehouses", full_reconcile_interval=0)
+        fresh = AirtableTableSync("Warehouses")
+
+        with patch('services.airtable.airtable_sync.fetch_all_airtable_records', new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.return_value = [{"id": f"rec{i}", "fields": {"Name": str(i)}} for i in range(50)]
+            await sync.sync()
+            first = sync.version
+
+            mock_fetch.return_value = [{"id": f"rec{i}", "fields": {"Name": str(i)}} for i in range(1, 50)] + [
+                {"id": "rec1", "fields": {"Name": "renamed"}},
+            ]
+            with patch('services.airtable.airtable_sync._record_hash', wraps=airtable_sync._record_hash) as mock_hash:
+                records = await sync.sync()
+            assert mock_hash.call_count == 1
+
+            mock_fetch.return_value = records
+            await fresh.sync()
+
+        assert sync.version != first
+        assert sync.version == fresh.version
+
+    def test_restored_version_without_hashes_is_rebuilt_on_change(self):
+        """Test a state saved without per-record hashes keeps its version until a record changes"""
+        sync = AirtableTableSync("Warehouses")
+        assert sync.restore_state({"fields": None, "records": [{"id": "rec1", "fields": {}}], "watermark": 1.0, "version": "saved"})
+        assert sync.version == "saved"
+
+        sync._records["rec2"] = {"id": "rec2", "fields": {}}
+        sync._update_version(["rec2"], ())
+        restored = AirtableTableSync("Warehouses")
+        assert restored.restore_state(sync.export_state())
+        restored._update_version((), ())
+
+        assert sync.version not in (None, "saved")
+        assert restored.version == sync.version
+
+    @pytest.mark.asyncio
+    async def test_reset_forces_full_sync(self):
+        """Test reset clears the watermark"""
+        sync = AirtableTableSync("Warehouses")
+
+        with patch('services.airtable.airtable_sync.fetch_all_airtable_records', new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.return_value = [{"id": "rec1", "fields": {}}]
+            await sync.sync()
+
+        sync.reset()
+
+        assert not sync.has_data
+        assert sync.needs_full_sync()
+
+    @pytest.mark.asyncio
+    async def test_unknown_projected_field_is_dropped(self):
+        """Test a 422 for an unknown projected column drops that column and retries"""
+        sync = AirtableTableSync("Warehouses", params={"fields[]": ["Name", "Bogus"]})
+        request = httpx.Request("GET", "https://api.airtable.com/v0/base/Warehouses")
+        response = httpx.Response(
+            422,
+            json={"error": {"type": "UNKNOWN_FIELD_NAME", "message": 'Unknown field name: "Bogus"'}},
+            request=request,
+        )
+
+        with patch('services.airtable.airtable_sync.fetch_all_airtable_records', new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.side_effect = [
+                httpx.HTTPStatusError("Unprocessable", request=request, response=response),
+                [{"id": "rec1", "fields": {"Name": "A"}}],
+            ]
+
+            records = await sync.sync()
+
+        assert records == [{"id": "rec1", "fields": {"Name": "A"}}]
+        assert sync.fields == ["Name"]
+        assert mock_fetch.call_args.args[1]["fields[]"] == ["Name"]
@@ -0,0 +1,80 @@
+import pytest
+
+from services.geolocation.geolocation_service import haversine
+from services.geolocation.circuity import (
+    AMBIGUOUS,
+    DEFAULT_FIT,
+    EXCLUDE,
+    INCLUDE,
+    CircuityEstimator,
+)
+
+LA = (34.0522, -118.2437)
+
+def _train(estimator, origin, ratios, minutes_per_mile=1.2):
+    for i, ratio in enumerate(ratios):
+        dest = (origin[0] + 0.2 + i * 0.01, origin[1])
+        straight = haversine(*origin, *dest)
+        miles = straight * ratio
+        estimator.observe(f"driving:{origin}:{i}", origin, dest,
+                          {"distance_miles": miles, "duration_minutes": miles * minutes_per_mile})
+
+class TestCircuityEstimator:
+    """Test cases for the road circuity estimator"""
+
+    def test_default_fit_until_enough_samples(self):
+        """Test the 2x straight-line buffer is used before the region has data"""
+        estimator = CircuityEstimator(min_samples=5)
+        _train(estimator, LA, [1.3] * 4)
+
+        assert estimator.fit(LA) == DEFAULT_FIT
+
+    def test_fit_bounds_from_samples(self):
+        """Test the fitted bounds and medians come from the observed ratios"""
+        estimator = CircuityEstimator(min_samples=5, tail=0.0)
+        _train(estimator, LA, [1.1, 1.2, 1.3, 1.4, 1.5])
+
+        fit = estimator.fit(LA)
+
+        assert fit.low == pytest.approx(1.1)
+        assert fit.high == pytest.approx(1.5)
+        assert fit.ratio == pytest.approx(1.3)
+        assert fit.minutes_per_mile == pytest.approx(1.2)
+        assert fit.samples == 5
+
+    def test_classify(self):
+        """Test candidates are included, excluded or left for routing"""
+        estimator = CircuityEstimator(min_samples=5, tail=0.0)
+        _train(estimator, LA, [1.1, 1.2, 1.3, 1.4, 1.5])
+
+        assert estimator.classify(LA, 30, 50) == INCLUDE       # 30 x 1.5 <= 50
+        assert estimator.classify(LA, 40, 50) == AMBIGUOUS
+        assert estimator.classify(LA, 46, 50) == EXCLUDE       # 46 x 1.1 > 50
+
+    def test_estimate(self):
+        """Test estimates use the median ratio and pace and are flagged"""
+        estimator = CircuityEstimator(min_samples=5, tail=0.0)
+        _train(estimator, LA, [1.1, 1.2, 1.3, 1.4, 1.5])
+
+        result = estimator.estimate(LA, 10)
+
+        assert result["distance_miles"] == pytest.approx(13.0)
+        assert result["duration_minutes"] == pytest.approx(15.6)
+        assert result["estimated"] is True
+
+    def test_regions_fall_back_to_all_samples(self):
+        """Test an unseen region uses the fit over every region"""
+        estimator = CircuityEstimator(min_samples=5, tail=0.0)
+        _train(estimator, LA, [1.2] * 5)
+
+        assert estimator.fit((40.7, -74.0)).ratio == pytest.approx(1.2)
+        assert estimator.get_stats()["regions"] == 1
+
+    def test_repeated_pairs_count_once(self):
+        """Test re-observing a cached route doesn't add samples"""
+        estimator = CircuityEstimator(min_samples=2)
+        for _ in range(3):
+            _train(estimator, LA, [1.3])
+
+        assert estimator.get_stats()["samples"] == 1
+        assert estimator.fit(LA) == DEFAULT_FIT
@@ -0,0 +1,124 @@
+import os
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from services.geolocation import drive_time_grid
+from services.geolocation.circuity import AMBIGUOUS, EXCLUDE, INCLUDE
+from services.geolocation.drive_time_grid import (
+    DriveTimeGrid, get_drive_time_grid, load_drive_time_grid, reload_drive_time_grid_in_background, save_drive_time_grid,
+)
+
+LA = (34.0522, -118.2437)
+NYC = (40.75, -73.99)
+
+def _grid_with(key, coords, minutes, miles=None):
+    grid = DriveTimeGrid(cell_degrees=0.25, slack_minutes=10)
+    grid.put(key, coords, {grid.cell(coords): (miles if miles is not None else minutes, minutes)}, built_at=1.0)
+    return grid
+
+class TestDriveTimeGrid:
+    """Test cases for the precomputed drive-time grid"""
+
+    def test_classify_against_slack(self):
+        """Test cell times clear of the slack decide locally and the rest need a route"""
+        grid = _grid_with("90012", LA, minutes=100, miles=80)
+
+        assert grid.classify("90012", LA, 120) == (INCLUDE, {"distance_miles": 80, "duration_minutes": 100})
+        assert grid.classify("90012", LA, 105) == (AMBIGUOUS, None)
+        assert grid.classify("90012", LA, 85) == (EXCLUDE, None)
+        assert grid.classify("90012", (34.3, -118.2437), 120) == (AMBIGUOUS, None)  # no data for that cell
+        assert grid.classify("10001", LA, 120) == (AMBIGUOUS, None)
+        # No data, but too far in a straight line to drive in time
+        assert grid.classify("90012", (40.0, -100.0), 120) == (EXCLUDE, None)
+        assert grid.get_stats()["unknown"] == 2
+        assert grid.get_stats()["excluded"] == 2
+
+    def test_cells_around_wraps_the_antimeridian(self):
+        """Test cells are found on both sides of 180 degrees"""
+        grid = DriveTimeGrid(cell_degrees=0.25)
+
+        cells = grid.cells_around((0.0, 179.9), 40)
+
+        assert {j for _, j in cells} == {717, 718, 719, -720, -719}
+        assert grid.cell((0.0, -180.1)) == grid.cell((0.0, 179.9))
+
+    @pytest.mark.asyncio
+    async def test_build_keeps_every_routed_cell(self):
+        """Test a build routes every cell in reach and keeps slow cells so they can be excluded"""
+        grid = DriveTimeGrid(cell_degrees=0.5, slack_minutes=10)
+
+        async def matrix(origin, dests):
+            return [None if i == 0 else {"distance_miles": 1.0, "duration_minutes": 50.0 * i} for i in range(len(dests))], 0
+
+        with patch('services.geolocation.drive_time_grid.get_driving_matrix_google_with_failures', side_effect=matrix) as mock_matrix:
+            assert await grid.build("90012", LA, max_minutes=60)
+
+        cells = grid.cells_around(LA, 60 / 60 * drive_time_grid.MAX_DRIVING_MPH)
+        assert len(mock_matrix.call_args.args[1]) == len(cells)
+        assert grid.get_stats()["cells"] == len(cells) - 1  # the unroutable one is left out
+        assert grid.classify("90012", grid.cell_centre(cells[1]), 60)[0] == INCLUDE
+        assert grid.classify("90012", grid.cell_centre(cells[2]), 60) == (EXCLUDE, None)
+        assert grid.classify("90012", grid.cell_centre(cells[0]), 60) == (AMBIGUOUS, None)
+        assert grid.stale(["90012", "10001"], max_minutes=60) == ["10001"]
+        assert grid.stale(["90012"], max_minutes=120) == ["90012"]  # built for a shorter reach
+
+    @pytest.mark.asyncio
+    async def test_build_without_any_route_keeps_old_grid(self):
+        """Test a build that could not route anything doesn't wipe the existing grid"""
+        grid = _grid_with("90012", LA, minutes=30)
+
+        with patch('services.geolocation.drive_time_grid.get_driving_matrix_google_with_failures', new_callable=AsyncMock) as mock_matrix:
+            mock_matrix.side_effect = lambda origin, dests: ([None] * len(dests), len(dests))
+            assert not await grid.build("90012", LA, max_minutes=60)
+
+        assert grid.lookup("90012", LA) == (30, 30)
+
+    @pytest.mark.asyncio
+    async def test_build_with_failed_requests_is_retried(self, tmp_path):
+        """Test a partly failed build is kept but stays stale, including after a save and load"""
+        grid = DriveTimeGrid(cell_degrees=0.5)
+
+        async def matrix(origin, dests):
+            return [{"distance_miles": 1.0, "duration_minutes": 5.0}] + [None] * (len(dests) - 1), len(dests) - 1
+
+        with patch('services.geolocation.drive_time_grid.get_driving_matrix_google_with_failures', side_effect=matrix):
+            assert await grid.build("90012", LA, max_minutes=60)
+
+        assert grid.get_stats()["cells"] == 1
+        assert grid.get_stats()["incomplete"] == 1
+        assert grid.stale(["90012"], max_minutes=60) == ["90012"]
+        path = str(tmp_path / "grid.npz")
+        grid.save(path)
+        assert DriveTimeGrid.load(path).stale(["90012"], max_minutes=60) == ["90012"]
+
+    @pytest.mark.asyncio
+    async def test_save_load_and_reload_on_change(self, tmp_path, monkeypatch):
+        """Test the saved grid round-trips and a rewritten file is swapped in by a background reload"""
+        path = str(tmp_path / "grid.npz")
+        monkeypatch.setattr(drive_time_grid, "DRIVE_TIME_GRID_PATH", path)
+        assert len(await load_drive_time_grid()) == 0
+
+        monkeypatch.setattr(drive_time_grid, "_grid", _grid_with("90012", LA, minutes=42))
+        save_drive_time_grid()
+        loaded = DriveTimeGrid.load(path)
+        assert loaded.lookup("90012", LA) == (42, 42)
+        assert loaded.cell_degrees == 0.25
+        assert loaded.get_stats()["oldest_built_at"] == 1.0
+
+        # Another process (the refresh job) rewrites the file; searches keep the loaded grid until it is read
+        _grid_with("10001", NYC, minutes=7).save(path)
+        os.utime(path, (1, 1))
+        reload_drive_time_grid_in_background()
+        assert get_drive_time_grid().lookup("90012", LA) == (42, 42)
+        await drive_time_grid._reload_task
+        assert get_drive_time_grid().lookup("10001", NYC) == (7, 7)
+        assert get_drive_time_grid().lookup("90012", LA) is None
+
+    def test_prune_drops_removed_warehouses(self):
+        """Test grids of warehouses no longer in the table are dropped"""
+        grid = _grid_with("90012", LA, minutes=30)
+
+        grid.prune(["10001"])
+
+        assert len(grid) == 0
+        assert grid.stale(["90012"]) == ["90012"]
@@ -0,0 +1,123 @@
+import time
+import pytest
+
+from warehouse import warehouse_service
+from services.geolocation.driving_cache import DrivingCache
+
+LA_TO_SD = {"distance_miles": 120.5, "duration_minutes": 130.0}
+
+class TestDrivingCache:
+    """Test cases for the persistent driving-distance cache"""
+
+    @pytest.mark.asyncio
+    async def test_entries_survive_a_restart(self, tmp_path):
+        """Test a new cache on the same file serves what the old one stored"""
+        path = str(tmp_path / "driving.sqlite3")
+        cache = DrivingCache(path=path)
+        await cache.set("driving:90012:92101", LA_TO_SD)
+        cache.close()
+
+        restarted = DrivingCache(path=path)
+        try:
+            assert await restarted.get("driving:90012:92101") == LA_TO_SD
+            assert restarted.get_stats()["disk_hits"] == 1
+            # Now served from the hot layer
+            assert await restarted.get("driving:90012:92101") == LA_TO_SD
+            assert restarted.get_stats()["hot_hits"] == 1
+        finally:
+            restarted.close()
+
+    @pytest.mark.asyncio
+    async def test_get_many_reports_only_hits(self, tmp_path):
+        """Test batch lookups return the keys that are cached"""
+        cache = DrivingCache(path=str(tmp_path / "driving.sqlite3"), hot_entries=1)
+        await cache.set_many({"a": LA_TO_SD, "b": LA_TO_SD})
+
+        assert await cache.get_many(["a", "b", "c"]) == {"a": LA_TO_SD, "b": LA_TO_SD}
+        assert cache.get_stats()["misses"] == 1
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_expired_entries_are_ignored(self, tmp_path):
+        """Test entries past their TTL are misses"""
+        cache = DrivingCache(path=str(tmp_path / "driving.sqlite3"), ttl=-1)
+        await cache.set("a", LA_TO_SD)
+
+        assert await cache.get("a") is None
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_least_recently_used_rows_are_evicted(self, tmp_path):
+        """Test the disk store stays within max_entries, dropping the oldest used rows"""
+        cache = DrivingCache(path=str(tmp_path / "driving.sqlite3"), max_entries=2, hot_entries=0, maintenance_seconds=0)
+        await cache.set("a", LA_TO_SD)
+        time.sleep(0.01)
+        await cache.set("b", LA_TO_SD)
+        time.sleep(0.01)
+        assert await cache.get("a") == LA_TO_SD  # touch "a" so "b" is the oldest
+        time.sleep(0.01)
+        await cache.set("c", LA_TO_SD)
+
+        assert set(await cache.get_many(["a", "b", "c"])) == {"a", "c"}
+        stats = cache.get_stats()
+        assert stats["disk_entries"] == 2
+        assert stats["evictions"] == 1
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_trimming_waits_for_the_maintenance_interval(self, tmp_path):
+        """Test writes between maintenance runs skip expiry and trimming"""
+        cache = DrivingCache(path=str(tmp_path / "driving.sqlite3"), max_entries=1, hot_entries=0)
+        await cache.set("a", LA_TO_SD)
+        await cache.set("b", LA_TO_SD)
+
+        assert cache.get_stats()["disk_entries"] == 2
+        cache.maintenance_seconds = 0
+        await cache.set("c", LA_TO_SD)
+        assert cache.get_stats()["disk_entries"] == 1
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_reads_do_not_write(self, tmp_path):
+        """Test a disk hit records recency in memory and writes it back with the next write"""
+        cache = DrivingCache(path=str(tmp_path / "driving.sqlite3"), hot_entries=0)
+        await cache.set("a", LA_TO_SD)
+        changes = cache._db.total_changes
+
+        assert await cache.get("a") == LA_TO_SD
+        assert cache._db.total_changes == changes
+        assert "a" in cache._touched
+        await cache.set("b", LA_TO_SD)
+        assert cache._touched == {}
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_database_errors_are_misses(self, tmp_path):
+        """Test a failing SQLite file (locked, closed, corrupt) is a miss or a skipped write, not an error"""
+        cache = DrivingCache(path=str(tmp_path / "driving.sqlite3"), hot_entries=0)
+        await cache.set("a", LA_TO_SD)
+        cache._db.close()  # every statement now raises sqlite3.ProgrammingError
+
+        assert await cache.get("a") is None
+        await cache.set("b", LA_TO_SD)
+        stats = cache.get_stats()
+        assert stats["errors"] == 2
+        assert stats["disk_entries"] is None
+
+    @pytest.mark.asyncio
+    async def test_memory_only_without_path(self):
+        """Test an empty path keeps a bounded in-memory cache"""
+        cache = DrivingCache(path="", hot_entries=1)
+        await cache.set_many({"a": LA_TO_SD, "b": LA_TO_SD})
+
+        assert await cache.get_many(["a", "b"]) == {"b": LA_TO_SD}
+
+    @pytest.mark.asyncio
+    async def test_warehouse_invalidation_keeps_driving_data(self, mock_env_vars):
+        """Test clearing the warehouse cache leaves driving distances alone"""
+        from services.geolocation.driving_cache import get_driving_cache
+        await get_driving_cache().set("driving:90012:92101", LA_TO_SD)
+
+        await warehouse_service.invalidate_warehouse_cache()
+
+        assert await get_driving_cache().get("driving:90012:92101") == LA_TO_SD
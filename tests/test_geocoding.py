@@ -0,0 +1,133 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from services.geolocation import geocoding
+from services.geolocation.geocoding import (
+    GeocodingChain,
+    GeocodingProvider,
+    GeocodingUnavailable,
+    GoogleGeocodingProvider,
+    MapboxGeocodingProvider,
+    build_geocoding_chain,
+    close_geocoding_client,
+    get_geocoding_client,
+    init_geocoding_client,
+)
+
+def _response(payload):
+    resp = MagicMock()
+    resp.json.return_value = payload
+    resp.raise_for_status = MagicMock()
+    return resp
+
+class _StaticProvider(GeocodingProvider):
+    def __init__(self, name, result=None, error=None, delay=0, timeout=None):
+        self.name = name
+        self.result = result
+        self.error = error
+        self.delay = delay
+        self.timeout = timeout
+        self.calls = 0
+
+    async def geocode(self, query):
+        self.calls += 1
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return self.result
+
+class TestGeocoding:
+    """Test cases for the async geocoding provider chain"""
+
+    @pytest.mark.asyncio
+    async def test_init_and_close_client(self):
+        """Test the lifespan hooks create and release a single pooled client"""
+        client = await init_geocoding_client()
+
+        assert get_geocoding_client() is client
+
+        await close_geocoding_client()
+
+        assert client.is_closed
+        assert geocoding._client is None
+
+    @pytest.mark.asyncio
+    async def test_google_provider(self):
+        """Test Google results are parsed from the REST geocoding response"""
+        mock_client = AsyncMock()
+        mock_client.get = AsyncMock(return_value=_response({
+            "status": "OK",
+            "results": [{"geometry": {"location": {"lat": 34.0901, "lng": -118.4065}}}],
+        }))
+
+        with patch('services.geolocation.geocoding.get_geocoding_client', return_value=mock_client):
+            result = await GoogleGeocodingProvider(api_key="key").geocode("90210")
+
+        assert result == (34.0901, -118.4065)
+        assert mock_client.get.call_args.kwargs["params"]["components"] == "country:US"
+
+    @pytest.mark.asyncio
+    async def test_google_provider_errors_on_denied(self):
+        """Test a non-OK status other than ZERO_RESULTS is a provider failure"""
+        mock_client = AsyncMock()
+        mock_client.get = AsyncMock(return_value=_response({"status": "REQUEST_DENIED"}))
+
+        with patch('services.geolocation.geocoding.get_geocoding_client', return_value=mock_client):
+            with pytest.raises(ValueError):
+                await GoogleGeocodingProvider(api_key="key").geocode("90210")
+
+    @pytest.mark.asyncio
+    async def test_mapbox_provider(self):
+        """Test Mapbox [lon, lat] centers are returned as (lat, lon)"""
+        mock_client = AsyncMock()
+        mock_client.get = AsyncMock(return_value=_response({"features": [{"center": [-118.4065, 34.0901]}]}))
+
+        with patch('services.geolocation.geocoding.get_geocoding_client', return_value=mock_client):
+            result = await MapboxGeocodingProvider(token="token").geocode("90210")
+
+        assert result == (34.0901, -118.4065)
+
+    @pytest.mark.asyncio
+    async def test_chain_falls_back_in_order(self):
+        """Test misses, errors and timeouts move on to the next provider"""
+        missing = _StaticProvider("zip")
+        failing = _StaticProvider("google", error=RuntimeError("boom"))
+        slow = _StaticProvider("slow", result=(1.0, 1.0), delay=0.5, timeout=0.01)
+        mapbox = _StaticProvider("mapbox", result=(34.0, -118.0))
+        chain = GeocodingChain([missing, failing, slow, mapbox])
+
+        assert await chain.geocode("90210") == (34.0, -118.0)
+
+        stats = chain.get_stats()
+        assert stats["zip"]["misses"] == 1
+        assert stats["google"]["errors"] == 1
+        assert stats["slow"]["timeouts"] == 1
+        assert stats["mapbox"]["hits"] == 1
+
+    @pytest.mark.asyncio
+    async def test_chain_stops_at_first_hit(self):
+        """Test later providers are not called once one answers"""
+        first = _StaticProvider("google", result=(34.0, -118.0))
+        second = _StaticProvider("mapbox", result=(0.0, 0.0))
+
+        assert await GeocodingChain([first, second]).geocode("90210") == (34.0, -118.0)
+        assert second.calls == 0
+
+    @pytest.mark.asyncio
+    async def test_chain_miss_is_only_conclusive_without_failures(self):
+        """Test a miss returns None, but a miss after a provider failure raises"""
+        assert await GeocodingChain([_StaticProvider("zip"), _StaticProvider("google")]).geocode("x") is None
+
+        chain = GeocodingChain([_StaticProvider("zip"), _StaticProvider("google", error=RuntimeError("boom"))])
+        with pytest.raises(GeocodingUnavailable):
+            await chain.geocode("x")
+
+    def test_build_chain_from_names(self):
+        """Test the provider order comes from the configured list"""
+        chain = build_geocoding_chain("mapbox, zip")
+
+        assert [p.name for p in chain.providers] == ["mapbox", "zip"]
+        with pytest.raises(ValueError):
+            build_geocoding_chain("zip,osm")
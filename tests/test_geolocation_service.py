@@ -5,10 +5,14 @@ import httpx
 
 from services.geolocation.geolocation_service import (
     haversine,
+    PointSet,
     get_coordinates_mapbox,
     get_coordinates_google,
     get_driving_distance_and_time_mapbox,
-    get_driving_distance_and_time_google
+    get_driving_distance_and_time_google,
+    get_driving_matrix_google,
+    GoogleMapsBusy,
+    GoogleMapsExecutor
 )
 
 class TestGeolocationService:
@@ -192,3 +196,121 @@ class TestGeolocationService:
         result = asyncio.run(result)
         
         assert result is None
+
+    def test_point_set_matches_scalar_haversine(self):
+        """Test vectorized distances agree with the scalar haversine for several origins"""
+        points = [(34.0522, -118.2437), (40.7128, -74.0060), (41.8781, -87.6298)]
+        origins = [(34.0522, -118.2437), (47.6062, -122.3321)]
+
+        distances = PointSet(points).distances(origins)
+
+        assert distances.shape == (2, 3)
+        for i, origin in enumerate(origins):
+            for j, point in enumerate(points):
+                assert distances[i, j] == pytest.approx(haversine(*origin, *point), abs=1e-6)
+
+    def test_point_set_within_radius(self):
+        """Test radius queries return point indices per origin"""
+        points = PointSet([(34.0522, -118.2437), (34.1, -118.3), (40.7128, -74.0060)])
+
+        la, nyc = points.within_radius([(34.0522, -118.2437), (40.7, -74.0)], 50)
+
+        assert la.tolist() == [0, 1]
+        assert nyc.tolist() == [2]
+        assert points.within_radius((34.0522, -118.2437), 50)[0].tolist() == [0, 1]
+
+    def test_empty_point_set(self):
+        """Test an empty point set answers with no indices"""
+        points = PointSet([])
+
+        assert len(points) == 0
+        assert points.within_radius((34.0522, -118.2437), 50)[0].tolist() == []
+
+    @pytest.mark.asyncio
+    @patch('services.geolocation.geolocation_service.gmaps')
+    async def test_get_driving_matrix_google_chunks_destinations(self, mock_gmaps, mock_env_vars):
+        """Test 60 destinations go out as 3 Distance Matrix calls and keep their order"""
+        def distance_matrix(origins, destinations, mode):
+            return {"status": "OK", "rows": [{"elements": [
+                {"status": "OK", "distance": {"value": 1609.344 * lat}, "duration": {"value": 60 * lat}}
+                for lat, _ in destinations
+            ]}]}
+        mock_gmaps.distance_matrix.side_effect = distance_matrix
+        destinations = [(float(i + 1), -118.0) for i in range(60)]
+
+        results = await get_driving_matrix_google((34.0522, -118.2437), destinations)
+
+        assert mock_gmaps.distance_matrix.call_count == 3
+        assert max(len(c.kwargs["destinations"]) for c in mock_gmaps.distance_matrix.call_args_list) == 25
+        assert [round(r["distance_miles"]) for r in results] == list(range(1, 61))
+        assert results[9]["duration_minutes"] == 10.0
+
+    @pytest.mark.asyncio
+    @patch('services.geolocation.geolocation_service.gmaps')
+    async def test_get_driving_matrix_google_partial_results(self, mock_gmaps, mock_env_vars):
+        """Test unroutable destinations and failed chunks come back as None"""
+        mock_gmaps.distance_matrix.side_effect = [
+            {"status": "OK", "rows": [{"elements": [
+                {"status": "ZERO_RESULTS"},
+                {"status": "OK", "distance": {"value": 16093.44}, "duration": {"value": 1800}},
+            ]}]},
+            Exception("OVER_QUERY_LIMIT"),
+        ]
+        destinations = [(34.0, -118.0)] * 26
+
+        results = await get_driving_matrix_google((34.0522, -118.2437), destinations)
+
+        assert results[0] is None
+        assert results[1]["distance_miles"] == pytest.approx(10.0, rel=0.01)
+        assert results[2:] == [None] * 24
+
+    @pytest.mark.asyncio
+    async def test_google_maps_executor_tracks_calls(self):
+        """Test the dedicated executor reports queued and in-flight calls"""
+        import asyncio
+        import threading
+        executor = GoogleMapsExecutor(workers=1, max_queue=10)
+        release = threading.Event()
+        try:
+            first = asyncio.ensure_future(executor.run(lambda: release.wait(5)))
+            second = asyncio.ensure_future(executor.run(lambda: "done"))
+            await asyncio.sleep(0.05)
+
+            stats = executor.get_stats()
+            assert stats["in_flight"] == 1
+            assert stats["queued"] == 1
+
+            release.set()
+            assert await second == "done"
+            await first
+            stats = executor.get_stats()
+            assert (stats["in_flight"], stats["queued"], stats["completed"]) == (0, 0, 2)
+        finally:
+            release.set()
+            executor.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_google_maps_executor_sheds_load_when_queue_full(self):
+        """Test calls beyond the queue bound are rejected instead of piling up"""
+        import asyncio
+        import threading
+        executor = GoogleMapsExecutor(workers=1, max_queue=1)
+        release = threading.Event()
+        try:
+            running = asyncio.ensure_future(executor.run(lambda: release.wait(5)))
+            await asyncio.sleep(0.05)
+            waiting = asyncio.ensure_future(executor.run(lambda: None))
+            await asyncio.sleep(0)
+
+            with pytest.raises(GoogleMapsBusy):
+                await executor.run(lambda: None)
+
+            waiting.cancel()
+            await asyncio.sleep(0.05)
+            assert executor.get_stats()["queued"] == 0
+            assert executor.get_stats()["rejected"] == 1
+            release.set()
+            await running
+        finally:
+            release.set()
+            executor.shutdown()
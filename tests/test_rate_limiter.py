@@ -0,0 +1,75 @@
+import time
+import asyncio
+import pytest
+
+from services.airtable.rate_limiter import TokenBucket, INTERACTIVE, BACKGROUND
+
+class TestTokenBucket:
+    """Test cases for the Airtable token bucket"""
+
+    @pytest.mark.asyncio
+    async def test_burst_within_capacity_does_not_wait(self):
+        """Test callers within the burst capacity are served immediately"""
+        bucket = TokenBucket(rate=5, capacity=3)
+        start = time.monotonic()
+
+        for _ in range(3):
+            await bucket.acquire()
+
+        assert time.monotonic() - start < 0.05
+        assert bucket.get_stats()["waited"] == 0
+
+    @pytest.mark.asyncio
+    async def test_excess_calls_queue_at_the_rate(self):
+        """Test calls beyond capacity queue instead of failing"""
+        bucket = TokenBucket(rate=50, capacity=1)
+        start = time.monotonic()
+
+        await asyncio.gather(*[bucket.acquire() for _ in range(4)])
+
+        assert time.monotonic() - start >= 0.05
+        assert bucket.get_stats()["queued"] == 0
+
+    @pytest.mark.asyncio
+    async def test_interactive_callers_jump_background_queue(self):
+        """Test queued interactive callers are served before background ones"""
+        bucket = TokenBucket(rate=20, capacity=1)
+        await bucket.acquire()  # drain the bucket
+        order = []
+
+        async def call(name, priority):
+            await bucket.acquire(priority)
+            order.append(name)
+
+        background = [asyncio.create_task(call(f"bg{i}", BACKGROUND)) for i in range(2)]
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(call("ui", INTERACTIVE))
+        await asyncio.gather(*background, interactive)
+
+        assert order[0] == "ui"
+
+    @pytest.mark.asyncio
+    async def test_pause_holds_callers(self):
+        """Test pause (e.g. Retry-After) blocks callers for the given time"""
+        bucket = TokenBucket(rate=100, capacity=5)
+        bucket.pause(0.05)
+        start = time.monotonic()
+
+        await bucket.acquire()
+
+        assert time.monotonic() - start >= 0.05
+        assert bucket.get_stats()["throttled"] == 1
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_leaves_queue(self):
+        """Test a cancelled caller doesn't block the queue"""
+        bucket = TokenBucket(rate=10, capacity=1)
+        await bucket.acquire()
+
+        waiter = asyncio.create_task(bucket.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        assert bucket.get_stats()["queued"] == 0
@@ -0,0 +1,130 @@
+import os
+import uuid
+import pytest
+
+from services.cache.redis_cache import COMPRESS_MIN_BYTES, RedisCache, dumps, loads
+from services.geolocation.driving_cache import DrivingCache
+
+# Integration tests use a local redis-server (database 15 by default) and skip when none is running
+REDIS_TEST_URL = os.getenv("REDIS_TEST_URL", "redis://localhost:6379/15")
+
+@pytest.fixture
+def redis_cache():
+    cache = RedisCache(url=REDIS_TEST_URL, prefix=f"test:{uuid.uuid4().hex}:", socket_timeout=0.2)
+    if not cache.ping():
+        cache.close()
+        pytest.skip(f"redis-server not reachable at {REDIS_TEST_URL}")
+    yield cache
+    cache.clear()
+    cache.close()
+
+class TestRedisSerialization:
+    """Test cases for the compact cache value format"""
+
+    def test_roundtrip_small_and_compressed_values(self):
+        """Test values survive serialization and large ones are compressed"""
+        small = {"distance_miles": 12.5, "duration_minutes": 20.0}
+        large = [{"id": f"rec{i}", "fields": {"Name": "Warehouse", "ZIP": "90210"}} for i in range(200)]
+
+        assert loads(dumps(small)) == small
+        assert loads(dumps((34.05, -118.24))) == [34.05, -118.24]
+        assert loads(dumps("not_found")) == "not_found"
+        packed = dumps(large)
+        assert packed[:1] == b"\x01"
+        assert len(packed) < COMPRESS_MIN_BYTES * 4
+        assert loads(packed) == large
+
+    def test_unreachable_redis_is_a_miss(self):
+        """Test Redis errors are counted and reported as misses instead of raised"""
+        cache = RedisCache(url="redis://127.0.0.1:1/0", socket_timeout=0.1)
+
+        cache.set("coords:90210", [34.09, -118.41])
+        assert cache.get_many(["coords:90210"]) == {}
+        assert not cache.ping()
+        assert cache.get_stats()["errors"] == 2
+        cache.close()
+
+    @pytest.mark.asyncio
+    async def test_async_methods_degrade_to_local_results(self):
+        """Test the awaitable cache methods run Redis off the loop and treat an outage as misses"""
+        from warehouse.warehouse_service import RedisBackedCache
+        redis_cache = RedisCache(url="redis://127.0.0.1:1/0", socket_timeout=0.1)
+        cache = RedisBackedCache(redis_cache, ["coords"])
+
+        await cache.set_async("coords:90210", (34.09, -118.41))
+        await cache.set_async("warehouses:search", ([{"id": "rec1"}], "v1"))
+
+        assert await cache.get_async("coords:90210") is None
+        assert await cache.get_many_async(["coords:90210", "warehouses:search"]) == {"warehouses:search": ([{"id": "rec1"}], "v1")}
+        await cache.clear_warehouse_cache_async()
+        assert await cache.get_async("warehouses:search") is None
+        assert redis_cache.get_stats()["errors"] == 4
+        redis_cache.close()
+
+    def test_warehouse_views_never_move_to_redis(self):
+        """Test listing the warehouse namespace in REDIS_CACHE_NAMESPACES is ignored"""
+        from warehouse.warehouse_service import RedisBackedCache
+        redis_cache = RedisCache(url="redis://127.0.0.1:1/0", socket_timeout=0.1)
+        cache = RedisBackedCache(redis_cache, ["coords", "warehouses"])
+
+        cache.set("warehouses:search", ([{"id": "rec1"}], "v1"))
+
+        assert cache.get("warehouses:search") == ([{"id": "rec1"}], "v1")
+        assert redis_cache.get_stats()["errors"] == 0
+        redis_cache.close()
+
+@pytest.mark.integration
+class TestRedisCacheIntegration:
+    """Test cases against a local redis-server"""
+
+    def test_set_get_many_and_clear(self, redis_cache):
+        """Test batch reads return only present keys and clear is limited to a namespace"""
+        redis_cache.set_many({"coords:90210": [34.09, -118.41], "coords:10001": "not_found"}, ttl=60)
+        redis_cache.set("driving:90012:90210", {"distance_miles": 12.0, "duration_minutes": 25.0}, ttl=60)
+
+        found = redis_cache.get_many(["coords:90210", "coords:10001", "coords:02134"])
+        assert found == {"coords:90210": [34.09, -118.41], "coords:10001": "not_found"}
+        assert redis_cache.get_stats()["misses"] == 1
+
+        redis_cache.clear(["coords"])
+        assert redis_cache.get("coords:90210") is None
+        assert redis_cache.get("driving:90012:90210") == {"distance_miles": 12.0, "duration_minutes": 25.0}
+
+    def test_undecodable_value_is_a_miss(self, redis_cache):
+        """Test a corrupt or foreign value is counted as an error and reported as a miss"""
+        redis_cache._client.set(redis_cache.prefix + "coords:90210", b"\x01not zlib")
+        redis_cache.set("coords:10001", [40.75, -73.99], ttl=60)
+
+        assert redis_cache.get_many(["coords:90210", "coords:10001"]) == {"coords:10001": [40.75, -73.99]}
+        assert redis_cache.get_stats()["errors"] == 1
+
+    def test_memory_cache_interface_shares_namespaces_across_workers(self, redis_cache):
+        """Test two workers share coordinates through Redis but keep warehouse views local"""
+        from warehouse.warehouse_service import RedisBackedCache
+        worker_a = RedisBackedCache(redis_cache, ["coords"])
+        worker_b = RedisBackedCache(redis_cache, ["coords"])
+
+        worker_a.set("coords:90210", (34.09, -118.41), ttl=60)
+        worker_a.set("warehouses:search", [{"id": "rec1"}], ttl=60)
+
+        assert worker_b.get("coords:90210") == [34.09, -118.41]
+        assert worker_b.get("warehouses:search") is None
+        assert worker_b.get_many(["coords:90210", "warehouses:search"]) == {"coords:90210": [34.09, -118.41]}
+        assert worker_a.get_cache_stats()["redis"]["namespaces"] == ["coords"]
+
+        worker_b.clear_warehouse_cache()
+        assert worker_a.get("coords:90210") is None
+
+    @pytest.mark.asyncio
+    async def test_driving_cache_reads_through_shared_layer(self, redis_cache, tmp_path):
+        """Test a driving result written by one instance is a shared hit for another"""
+        writer = DrivingCache(path=None, shared=redis_cache)
+        reader = DrivingCache(path=str(tmp_path / "driving.sqlite3"), shared=redis_cache)
+
+        await writer.set("driving:90012:90210", {"distance_miles": 12.0, "duration_minutes": 25.0})
+
+        assert await reader.get("driving:90012:90210") == {"distance_miles": 12.0, "duration_minutes": 25.0}
+        assert reader.get_stats()["shared_hits"] == 1
+        assert await reader.get("driving:90012:90210") is not None
+        assert reader.get_stats()["hot_hits"] == 1
+        reader.close()
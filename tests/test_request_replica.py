@@ -0,0 +1,96 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from services.airtable.airtable_sync import AirtableTableSync
+from warehouse import warehouse_service
+from warehouse.request_replica import RequestReplica, order_from_fields, request_key
+
+REQUEST_RECORDS = [
+    {
+        "id": "rec1",
+        "fields": {
+            "Request ID": 101,
+            "Commodity": "Paper",
+            "Loading Style": "Floor",
+            "BOL & Pictures": "bol.pdf (https://example.com/bol.pdf), pic.jpg (https://example.com/pic.jpg)"
+        }
+    },
+    {
+        "id": "rec2",
+        "fields": {
+            "Request ID": 102,
+            "Commodity": "Steel",
+            "BOL & Pictures": [{"url": "https://example.com/steel.jpg"}]
+        }
+    },
+]
+
+class TestRequestReplica:
+    """Test cases for the in-memory Requests replica"""
+
+    def test_request_key_normalization(self):
+        """Test numeric and string Request IDs share a key"""
+        assert request_key(42) == request_key(42.0) == request_key(" 42 ") == "42"
+        assert request_key(None) is None
+
+    def test_order_from_fields_extracts_images(self):
+        """Test image URLs are extracted from both Airtable formats"""
+        assert order_from_fields(REQUEST_RECORDS[0]["fields"]).request_images == [
+            "https://example.com/bol.pdf", "https://example.com/pic.jpg"
+        ]
+        assert order_from_fields(REQUEST_RECORDS[1]["fields"]).request_images == ["https://example.com/steel.jpg"]
+
+    @pytest.mark.asyncio
+    async def test_refresh_indexes_by_request_id(self):
+        """Test records are indexed by Request ID and only changed records are re-parsed"""
+        replica = RequestReplica(AirtableTableSync("Requests"))
+
+        with patch('services.airtable.airtable_sync.fetch_all_airtable_records', new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.return_value = REQUEST_RECORDS
+            await replica.refresh()
+            first = replica.get(101)[0]
+
+            mock_fetch.return_value = [{"id": "rec2", "fields": {"Request ID": 102, "Commodity": "Copper"}}]
+            await replica.refresh()
+
+        assert replica.ready
+        assert replica.get(101)[0] is first
+        assert replica.get("102")[0].commodity == "Copper"
+        assert replica.get(999) == []
+
+    @pytest.mark.asyncio
+    async def test_lookup_served_from_replica(self, mock_env_vars):
+        """Test request lookups don't query Airtable once the replica is ready"""
+        with patch('services.airtable.airtable_sync.fetch_all_airtable_records', new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.return_value = REQUEST_RECORDS
+            await warehouse_service._request_replica.refresh()
+
+        with patch('warehouse.warehouse_service.airtable_get', new_callable=AsyncMock) as mock_get:
+            orders = await warehouse_service.fetch_orders_by_requestid_from_airtable(101)
+
+        mock_get.assert_not_called()
+        assert orders[0].commodity == "Paper"
+
+    @pytest.mark.asyncio
+    async def test_lookup_miss_triggers_delta_sync(self, mock_env_vars):
+        """Test an unknown Request ID delta-syncs the replica before giving up"""
+        with patch('services.airtable.airtable_sync.fetch_all_airtable_records', new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.return_value = REQUEST_RECORDS
+            await warehouse_service._request_replica.refresh()
+            warehouse_service._request_replica._last_refresh = 0
+
+            mock_fetch.return_value = [{"id": "rec3", "fields": {"Request ID": 103, "Commodity": "Glass"}}]
+            orders = await warehouse_service.fetch_orders_by_requestid_from_airtable(103)
+
+        assert "filterByFormula" in mock_fetch.call_args.args[1]
+        assert orders[0].commodity == "Glass"
+
+    @pytest.mark.asyncio
+    async def test_lookup_falls_back_to_airtable_before_first_sync(self, mock_env_vars):
+        """Test lookups query Airtable directly until the replica has synced"""
+        with patch('warehouse.warehouse_service.airtable_get', new_callable=AsyncMock) as mock_get:
+            mock_get.return_value = {"records": REQUEST_RECORDS[:1]}
+            orders = await warehouse_service.fetch_orders_by_requestid_from_airtable(101)
+
+        assert mock_get.call_args.args[1]["filterByFormula"] == "{Request ID} = 101"
+        assert orders[0].loading_method == "Floor"
@@ -0,0 +1,107 @@
+import os
+import time
+import pytest
+import numpy as np
+
+from services.geolocation.geolocation_service import PointSet
+from services.geolocation.spatial_index import SpatialIndex
+
+def _random_us_points(count, seed=7):
+    rng = np.random.default_rng(seed)
+    lats = rng.uniform(25.0, 49.0, count)
+    lons = rng.uniform(-124.0, -67.0, count)
+    return list(zip(lats.tolist(), lons.tolist()))
+
+class TestSpatialIndex:
+    """Test cases for the grid spatial index"""
+
+    def test_radius_matches_linear_scan(self):
+        """Test radius queries return exactly the linear scan's points"""
+        points = _random_us_points(2000)
+        origins = [(34.05, -118.24), (40.71, -74.0), (47.6, -122.3), (25.5, -80.2)]
+        linear = PointSet(points).within_radius(origins, 150)
+        indexed = SpatialIndex(points).within_radius(origins, 150)
+
+        for expected, actual in zip(linear, indexed):
+            assert actual.tolist() == expected.tolist()
+
+    def test_query_many_matches_single_queries(self):
+        """Test a multi-origin query with per-origin radii equals one query per origin"""
+        points = _random_us_points(2000)
+        index = SpatialIndex(points)
+        origins = [(34.05, -118.24), (40.71, -74.0), (25.5, -80.2)]
+        radii = [50, 150, 0.1]
+
+        for (indices, miles), origin, radius in zip(index.query_many(origins, radii), origins, radii):
+            single, single_miles = index.query(origin, radius)
+            order = np.argsort(single)
+            assert indices.tolist() == single[order].tolist()
+            assert np.allclose(miles, single_miles[order])
+        assert index.query_many([], []) == []
+
+    def test_radius_across_antimeridian_and_pole(self):
+        """Test cells wrap around longitude ±180 and cover the pole"""
+        points = [(60.0, 179.9), (60.0, -179.9), (89.5, 0.0), (89.5, 180.0), (0.0, 0.0)]
+        index = SpatialIndex(points)
+
+        assert index.within_radius((60.0, 179.95), 10)[0].tolist() == [0, 1]
+        assert index.within_radius((89.9, 90.0), 50)[0].tolist() == [2, 3]
+
+    def test_nearest(self):
+        """Test k-nearest returns the closest points in distance order"""
+        points = _random_us_points(2000)
+        origin = (39.74, -104.99)
+        index = SpatialIndex(points)
+
+        indices, distances = index.nearest(origin, 5)
+
+        expected = np.argsort(PointSet(points).distances(origin)[0], kind="stable")[:5]
+        assert indices.tolist() == expected.tolist()
+        assert list(distances) == sorted(distances)
+
+    def test_nearest_more_than_available(self):
+        """Test k larger than the dataset returns every point"""
+        index = SpatialIndex([(34.05, -118.24), (40.71, -74.0)])
+
+        indices, _ = index.nearest((34.0, -118.0), 10)
+
+        assert indices.tolist() == [0, 1]
+
+    def test_empty_index(self):
+        """Test an empty index answers every query with no points"""
+        index = SpatialIndex([])
+
+        assert len(index) == 0
+        assert index.within_radius((34.05, -118.24), 100)[0].tolist() == []
+        assert index.nearest((34.05, -118.24), 3)[0].tolist() == []
+
+    def test_large_dataset_matches_linear_scan(self):
+        """Test radius queries over a large dataset return exactly the linear scan's points"""
+        points = _random_us_points(20000)
+        origins = _random_us_points(200, seed=11)
+        linear = PointSet(points)
+        index = SpatialIndex(points)
+
+        for origin in origins:
+            assert index.within_radius(origin, 100)[0].tolist() == linear.within_radius(origin, 100)[0].tolist()
+
+    @pytest.mark.slow
+    @pytest.mark.skipif(not os.getenv("RUN_BENCHMARKS"), reason="timing benchmark; set RUN_BENCHMARKS=1 to run")
+    def test_benchmark_against_linear_scan(self):
+        """Benchmark radius queries against the vectorized linear scan"""
+        points = _random_us_points(20000)
+        origins = _random_us_points(200, seed=11)
+        linear = PointSet(points)
+        index = SpatialIndex(points)
+
+        start = time.perf_counter()
+        for origin in origins:
+            linear.within_radius(origin, 100)
+        linear_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for origin in origins:
+            index.within_radius(origin, 100)
+        index_seconds = time.perf_counter() - start
+
+        assert index_seconds < linear_seconds, f"index {index_seconds * 1000:.1f} ms, linear {linear_seconds * 1000:.1f} ms"
@@ -0,0 +1,93 @@
+import pytest
+from unittest.mock import AsyncMock
+
+from warehouse.warehouse_locations import WarehouseLocations, location_key
+
+def _records(*zips):
+    return [{"id": f"rec{i}", "fields": {"ZIP": zip_code}} for i, zip_code in enumerate(zips)]
+
+class TestWarehouseLocations:
+    """Test cases for ingest-time warehouse geocoding"""
+
+    def test_location_key(self):
+        """Test ZIPs stored as numbers or padded strings share one key"""
+        assert location_key({"ZIP": 90210}) == "90210"
+        assert location_key({"ZIP": 90210.0}) == "90210"
+        assert location_key({"ZIP": " 90210 "}) == "90210"
+        assert location_key({"ZIP": ""}) is None
+        assert location_key({}) is None
+
+    @pytest.mark.asyncio
+    async def test_only_new_or_changed_zips_are_geocoded(self):
+        """Test unchanged records keep their coordinates without a geocode call"""
+        locations = WarehouseLocations()
+        geocode = AsyncMock(side_effect=lambda zip_code: (float(zip_code[:2]), 0.0))
+
+        assert await locations.update(_records("90210", "90210", "10001"), geocode) == 2
+        revision = locations.revision
+
+        assert await locations.update(_records("90210", "90210", "10001"), geocode) == 0
+        assert locations.revision == revision
+
+        assert await locations.update(_records("90210", "60601", "10001"), geocode) == 1
+        assert geocode.call_args.args == ("60601",)
+        assert locations.get("rec1") == (60.0, 0.0)
+        assert locations.revision == revision + 1
+
+    @pytest.mark.asyncio
+    async def test_removed_records_are_dropped(self):
+        """Test records missing from the table lose their location"""
+        locations = WarehouseLocations()
+        geocode = AsyncMock(return_value=(34.0, -118.0))
+        await locations.update(_records("90210", "10001"), geocode)
+
+        await locations.update(_records("90210"), geocode)
+
+        assert len(locations) == 1
+        assert locations.get("rec1") is None
+
+    @pytest.mark.asyncio
+    async def test_unresolved_zips_wait_for_a_change_or_retry(self):
+        """Test failed geocodes aren't repeated on every update"""
+        locations = WarehouseLocations()
+        geocode = AsyncMock(side_effect=[None, RuntimeError("provider down"), (34.0, -118.0)])
+
+        assert await locations.update(_records("00000"), geocode) == 1
+        assert await locations.update(_records("00000"), geocode) == 0
+        assert await locations.update(_records("00000"), geocode, retry_unresolved=True) == 1
+        assert locations.get("rec0") is None
+        assert await locations.update(_records("90210"), geocode) == 1
+        assert locations.get("rec0") == (34.0, -118.0)
+        assert locations.get_stats()["unresolved_records"] == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_geocodes_are_retried_after_backoff(self):
+        """Test a geocode that raised is retried once the backoff passes, not only on a ZIP change"""
+        locations = WarehouseLocations(retry_seconds=3600)
+        geocode = AsyncMock(side_effect=[RuntimeError("provider down"), (34.0, -118.0)])
+        records = _records("90210")
+
+        assert await locations.update(records, geocode) == 1
+        assert not locations.needs_update(records)
+        assert await locations.update(_records("90210"), geocode) == 0
+        assert locations.get_stats()["unavailable_records"] == 1
+
+        locations._retry_at = 0
+        assert locations.needs_update(records)
+        assert await locations.update(records, geocode) == 1
+        assert locations.get("rec0") == (34.0, -118.0)
+        assert not locations.needs_update(records)
+
+    @pytest.mark.asyncio
+    async def test_export_and_restore(self):
+        """Test locations round-trip through the snapshot state"""
+        locations = WarehouseLocations()
+        await locations.update(_records("90210"), AsyncMock(return_value=(34.0, -118.0)))
+
+        restored = WarehouseLocations()
+        restored.restore_state(locations.export_state())
+
+        assert restored.get("rec0") == (34.0, -118.0)
+        geocode = AsyncMock()
+        assert await restored.update(_records("90210"), geocode) == 0
+        geocode.assert_not_called()
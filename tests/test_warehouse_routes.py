@@ -1,3 +1,4 @@
+import json
 import pytest
 from unittest.mock import AsyncMock, patch
 from fastapi import HTTPException
@@ -8,8 +9,8 @@ class TestWarehouseRoutes:
     @pytest.mark.asyncio
     async def test_warehouses_endpoint_success(self, client, mock_env_vars, sample_warehouse_data):
         """Test successful warehouses endpoint"""
-        with patch('warehouse.warehouse_route.fetch_warehouses_from_airtable', new_callable=AsyncMock) as mock_fetch:
-            mock_fetch.return_value = [sample_warehouse_data]
+        with patch('warehouse.warehouse_route.fetch_warehouses_with_version', new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.return_value = ([sample_warehouse_data], None)
             
             response = client.get("/warehouses")
             
@@ -19,10 +20,112 @@ class TestWarehouseRoutes:
             assert len(data["data"]) == 1
             assert data["data"][0]["id"] == "rec123"
 
+    @pytest.mark.asyncio
+    async def test_warehouses_endpoint_view(self, client, mock_env_vars, sample_warehouse_data):
+        """Test the view query parameter selects a field projection"""
+        with patch('warehouse.warehouse_route.fetch_warehouses_with_version', new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.return_value = ([sample_warehouse_data], None)
+
+            response = client.get("/warehouses?view=listing")
+            invalid = client.get("/warehouses?view=everything")
+
+            assert response.status_code == 200
+            assert mock_fetch.call_args.kwargs["view"] == "listing"
+            assert invalid.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_warehouses_endpoint_ndjson_stream(self, client, mock_env_vars, sample_warehouse_data):
+        """Test warehouses can be streamed as NDJSON"""
+        with patch('warehouse.warehouse_service.fetch_warehouses_from_airtable', new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.return_value = [sample_warehouse_data, {**sample_warehouse_data, "id": "rec456"}]
+
+            response = client.get("/warehouses?stream=ndjson")
+
+            assert response.status_code == 200
+            assert response.headers["content-type"].startswith("application/x-ndjson")
+            lines = [json.loads(line) for line in response.text.splitlines()]
+            assert [line["id"] for line in lines] == ["rec123", "rec456"]
+
+    @pytest.mark.asyncio
+    async def test_all_requests_endpoint_ndjson_stream(self, client, mock_env_vars):
+        """Test all requests are streamed page by page as NDJSON"""
+        async def pages():
+            yield [{"id": "rec1", "fields": {}}]
+            yield [{"id": "rec2", "fields": {}}]
+
+        with patch('warehouse.warehouse_route.iter_orders_from_airtable', return_value=pages()):
+            response = client.get("/all-requests?stream=ndjson")
+
+            assert response.status_code == 200
+            assert [json.loads(line)["id"] for line in response.text.splitlines()] == ["rec1", "rec2"]
+
+    @pytest.mark.asyncio
+    async def test_all_requests_endpoint_ndjson_stream_error(self, client, mock_env_vars):
+        """Test an upstream failure before the first page returns a 500"""
+        async def pages():
+            raise Exception("Airtable down")
+            yield []
+
+        with patch('warehouse.warehouse_route.iter_orders_from_airtable', return_value=pages()):
+            response = client.get("/all-requests?stream=ndjson")
+
+            assert response.status_code == 500
+
+    @pytest.mark.asyncio
+    async def test_warehouses_endpoint_rate_limited(self, client, mock_env_vars):
+        """Test an exhausted Airtable rate limit returns 503 with Retry-After"""
+        from services.airtable.airtable_client import AirtableRateLimited
+
+        with patch('warehouse.warehouse_route.fetch_warehouses_with_version', new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.side_effect = AirtableRateLimited(30)
+
+            response = client.get("/warehouses")
+
+            assert response.status_code == 503
+            assert response.headers["Retry-After"] == "30"
+
+    @pytest.mark.asyncio
+    async def test_warehouses_endpoint_etag_not_modified(self, client, mock_env_vars, sample_warehouse_data):
+        """Test the ETag follows the dataset version and If-None-Match returns 304"""
+        with patch('warehouse.warehouse_route.fetch_warehouses_with_version', new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.return_value = ([sample_warehouse_data], "abc123")
+
+            response = client.get("/warehouses")
+            etag = response.headers["ETag"]
+            not_modified = client.get("/warehouses", headers={"If-None-Match": etag})
+            weak = client.get("/warehouses", headers={"If-None-Match": f"W/{etag}"})
+            changed = client.get("/warehouses", headers={"If-None-Match": '"detail-old"'})
+
+            assert etag == '"detail-abc123"'
+            assert not_modified.status_code == 304
+            assert not_modified.content == b""
+            assert weak.status_code == 304
+            assert changed.status_code == 200
+
+    @pytest.mark.asyncio
+    async def test_warehouses_endpoint_cursor_pagination(self, client, mock_env_vars, sample_warehouse_data):
+        """Test limit/cursor walk the whole dataset in record ID order"""
+        records = [{**sample_warehouse_data, "id": f"rec{i}"} for i in (3, 1, 4, 2, 5)]
+
+        with patch('warehouse.warehouse_route.fetch_warehouses_with_version', new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.return_value = (records, None)
+
+            seen, cursor = [], None
+            while True:
+                url = "/warehouses?limit=2" + (f"&cursor={cursor}" if cursor else "")
+                page = client.get(url).json()["data"]
+                seen.extend(rec["id"] for rec in page["records"])
+                cursor = page["next_cursor"]
+                if not cursor:
+                    break
+
+            assert seen == ["rec1", "rec2", "rec3", "rec4", "rec5"]
+            assert client.get("/warehouses?limit=0").status_code == 422
+
     @pytest.mark.asyncio
     async def test_warehouses_endpoint_error(self, client, mock_env_vars):
         """Test warehouses endpoint with error"""
-        with patch('warehouse.warehouse_route.fetch_warehouses_from_airtable', new_callable=AsyncMock) as mock_fetch:
+        with patch('warehouse.warehouse_route.fetch_warehouses_with_version', new_callable=AsyncMock) as mock_fetch:
             mock_fetch.side_effect = Exception("Test error")
             
             response = client.get("/warehouses")
@@ -59,6 +162,54 @@ class TestWarehouseRoutes:
         
         assert response.status_code == 422  # Validation error
 
+    @pytest.mark.asyncio
+    async def test_nearby_warehouses_endpoint_passes_limit(self, client, mock_env_vars):
+        """Test limit and estimate reach the search and a non-positive limit is rejected"""
+        with patch('warehouse.warehouse_route.find_nearby_warehouses', new_callable=AsyncMock) as mock_find:
+            mock_find.return_value = {"origin_zip": "90210", "warehouses": [], "ai_analysis": ""}
+
+            response = client.post("/nearby_warehouses", json={"zip_code": "90210", "limit": 5, "estimate": True})
+
+            assert response.status_code == 200
+            mock_find.assert_awaited_once_with("90210", 50, True, 5, None)
+
+        response = client.post("/nearby_warehouses", json={"zip_code": "90210", "limit": 0})
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_nearby_warehouses_endpoint_passes_max_drive_minutes(self, client, mock_env_vars):
+        """Test a drive-time search reaches the service and a non-positive max_drive_minutes is rejected"""
+        with patch('warehouse.warehouse_route.find_nearby_warehouses', new_callable=AsyncMock) as mock_find:
+            mock_find.return_value = {"origin_zip": "90210", "warehouses": [], "ai_analysis": ""}
+
+            response = client.post("/nearby_warehouses", json={"zip_code": "90210", "max_drive_minutes": 120})
+
+            assert response.status_code == 200
+            mock_find.assert_awaited_once_with("90210", 50, False, None, 120)
+
+        response = client.post("/nearby_warehouses", json={"zip_code": "90210", "max_drive_minutes": 0})
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_nearby_warehouses_batch_endpoint(self, client, mock_env_vars):
+        """Test the batch endpoint passes every origin and rejects an empty batch"""
+        with patch('warehouse.warehouse_route.find_nearby_warehouses_batch', new_callable=AsyncMock) as mock_batch:
+            mock_batch.return_value = [{"origin_zip": "90210", "warehouses": []}]
+
+            response = client.post("/nearby_warehouses/batch", json={
+                "origins": [{"zip_code": "90210"}, {"zip_code": "10001", "max_drive_minutes": 90}],
+                "limit": 3,
+            })
+
+            assert response.status_code == 200
+            assert response.json()["data"] == {"results": [{"origin_zip": "90210", "warehouses": []}]}
+            mock_batch.assert_awaited_once_with([
+                {"zip_code": "90210", "radius_miles": 50, "max_drive_minutes": None},
+                {"zip_code": "10001", "radius_miles": 50, "max_drive_minutes": 90},
+            ], False, 3)
+
+        assert client.post("/nearby_warehouses/batch", json={"origins": []}).status_code == 422
+
     @pytest.mark.asyncio
     async def test_send_email_endpoint_success(self, client, mock_env_vars, sample_email_data):
         """Test successful send email endpoint"""
@@ -6,6 +6,14 @@ import requests
 from warehouse.warehouse_service import (
     fetch_warehouses_from_airtable,
     find_nearby_warehouses,
+    get_coordinates_cached,
+    batch_get_driving_data,
+    batch_get_driving_data_for_origins,
+    find_nearby_warehouses_batch,
+    SingleFlight,
+    MemoryCache,
+    paginate_warehouses,
+    InvalidCursor,
     _tier_rank,
     find_missing_fields
 )
@@ -25,9 +33,9 @@ class TestWarehouseService:
             ]
         }
         
-        with patch('httpx.AsyncClient') as mock_client:
+        with patch('services.airtable.airtable_client.get_airtable_client') as mock_client:
             mock_instance = AsyncMock()
-            mock_client.return_value.__aenter__.return_value = mock_instance
+            mock_client.return_value = mock_instance
             
             # Create a mock response object
             mock_response_obj = MagicMock()
@@ -45,9 +53,9 @@ class TestWarehouseService:
     @pytest.mark.asyncio
     async def test_fetch_warehouses_from_airtable_error(self, mock_env_vars):
         """Test warehouse fetching with HTTP error"""
-        with patch('httpx.AsyncClient') as mock_client:
+        with patch('services.airtable.airtable_client.get_airtable_client') as mock_client:
             mock_instance = AsyncMock()
-            mock_client.return_value.__aenter__.return_value = mock_instance
+            mock_client.return_value = mock_instance
             mock_instance.get.side_effect = httpx.HTTPError("Test error")
             
             with pytest.raises(httpx.HTTPError):
@@ -123,10 +131,719 @@ class TestWarehouseService:
     @pytest.mark.asyncio
     async def test_find_nearby_warehouses_invalid_zip(self, mock_env_vars):
         """Test nearby warehouse search with invalid ZIP code"""
-        with patch('services.geolocation.geolocation_service.get_coordinates_mapbox') as mock_mapbox:
-            mock_mapbox.return_value = None  # Invalid ZIP
+        with patch('warehouse.warehouse_service.geocode', new_callable=AsyncMock) as mock_geocode:
+            mock_geocode.return_value = None  # Invalid ZIP
             
             result = await find_nearby_warehouses("invalid", 50.0)
             
             assert "error" in result
             assert result["error"] == "Invalid ZIP code"
+
+    @pytest.mark.asyncio
+    async def test_find_nearby_warehouses_prefilters_by_straight_line(self, mock_env_vars):
+        """Test only warehouses within the radius in a straight line are sent for driving data"""
+        mock_warehouses = [
+            {"id": "recNear", "fields": {"Name": "Near", "ZIP": "90210", "Tier": "Silver"}},
+            {"id": "recFar", "fields": {"Name": "Far", "ZIP": "10001", "Tier": "Gold"}},
+            {"id": "recNoZip", "fields": {"Name": "No ZIP"}},
+        ]
+        coords = {"90012": (34.0522, -118.2437), "90210": (34.0901, -118.4065), "10001": (40.7506, -73.9972)}
+
+        async def geocode(zip_code, raise_unavailable=False):
+            return coords.get(zip_code)
+
+        with patch('warehouse.warehouse_service.get_coordinates_cached', side_effect=geocode), \
+             patch('warehouse.warehouse_service.fetch_warehouses_from_airtable', new_callable=AsyncMock) as mock_fetch, \
+             patch('warehouse.warehouse_service.batch_get_driving_data', new_callable=AsyncMock) as mock_driving, \
+             patch('warehouse.warehouse_service.analyze_warehouse_with_gemini', new_callable=AsyncMock) as mock_ai:
+            mock_fetch.return_value = mock_warehouses
+            mock_driving.return_value = [{"distance_miles": 12.0, "duration_minutes": 25.0}]
+            mock_ai.return_value = "Test AI analysis"
+
+            result = await find_nearby_warehouses("90012", 50.0)
+
+        assert mock_driving.call_args.args[1] == [coords["90210"]]
+        assert mock_driving.call_args.args[3] == ["90210"]
+        assert [wh["id"] for wh in result["warehouses"]] == ["recNear"]
+
+    @pytest.mark.asyncio
+    async def test_warehouses_geocoded_once_at_ingest(self, mock_env_vars):
+        """Test records are geocoded when synced and cache invalidation doesn't re-geocode them"""
+        from warehouse import warehouse_service
+        records = [
+            {"id": "rec1", "fields": {"Name": "A", "ZIP": "90210"}},
+            {"id": "rec2", "fields": {"Name": "B", "ZIP": 10001}},
+        ]
+
+        async def geocode(zip_code, raise_unavailable=False):
+            return {"90210": (34.09, -118.41), "10001": (40.75, -74.0)}[zip_code]
+
+        with patch('services.airtable.airtable_sync.fetch_all_airtable_records', new_callable=AsyncMock) as mock_fetch, \
+             patch('warehouse.warehouse_service.get_coordinates_cached', side_effect=geocode) as mock_geocode:
+            mock_fetch.return_value = records
+            await fetch_warehouses_from_airtable(view="search")
+            assert mock_geocode.call_count == 2
+            assert warehouse_service._warehouse_locations.get("rec2") == (40.75, -74.0)
+
+            # Webhook invalidation, then a delta sync that only changes rec1's ZIP
+            warehouse_service._cache.clear_warehouse_cache()
+            mock_fetch.return_value = [{"id": "rec1", "fields": {"Name": "A", "ZIP": "10001"}}]
+            await fetch_warehouses_from_airtable(view="search")
+
+        assert mock_geocode.call_count == 3
+        assert mock_geocode.call_args.args == ("10001",)
+        assert warehouse_service._warehouse_locations.get("rec1") == (40.75, -74.0)
+
+    @pytest.mark.asyncio
+    async def test_warehouse_geocoded_during_outage_is_retried(self, mock_env_vars):
+        """Test a ZIP that failed while the geocoder was down is searchable once it recovers"""
+        from warehouse import warehouse_service
+        from services.geolocation.geocoding import GeocodingUnavailable
+        outage = True
+
+        async def remote_geocode(query):
+            if query == "90210" and outage:
+                raise GeocodingUnavailable("provider down")
+            return {"90012": (34.0522, -118.2437), "90210": (34.0901, -118.4065)}[query]
+
+        with patch('services.airtable.airtable_sync.fetch_all_airtable_records', new_callable=AsyncMock) as mock_fetch, \
+             patch('warehouse.warehouse_service.geocode', side_effect=remote_geocode), \
+             patch('warehouse.warehouse_service.batch_get_driving_data', new_callable=AsyncMock) as mock_driving, \
+             patch('warehouse.warehouse_service.analyze_warehouse_with_gemini', new_callable=AsyncMock) as mock_ai:
+            mock_fetch.return_value = [{"id": "rec1", "fields": {"Name": "A", "ZIP": "90210"}}]
+            mock_driving.return_value = [{"distance_miles": 12.0, "duration_minutes": 25.0}]
+            mock_ai.return_value = "Test AI analysis"
+            warehouses = await fetch_warehouses_from_airtable(view="search")
+            assert warehouse_service._warehouse_locations.get_stats()["unavailable_records"] == 1
+            assert not warehouse_service._warehouse_locations.needs_update(warehouses)
+
+            outage = False
+            warehouse_service._warehouse_locations._retry_at = 0  # backoff elapsed
+            result = await find_nearby_warehouses("90012", 50.0)
+
+        assert [wh["id"] for wh in result["warehouses"]] == ["rec1"]
+        assert warehouse_service._warehouse_locations.get_stats()["unavailable_records"] == 0
+
+    @pytest.mark.asyncio
+    async def test_batch_driving_data_uses_matrix_and_pair_cache(self, mock_env_vars):
+        """Test misses go out as one matrix request per ZIP and are cached per pair"""
+        from services.geolocation.driving_cache import get_driving_cache
+        await get_driving_cache().set("driving:90012:90210", {"distance_miles": 12.0, "duration_minutes": 25.0})
+        origin = (34.0522, -118.2437)
+        dests = [(34.09, -118.41), (33.77, -118.19), (33.77, -118.19), (40.75, -74.0)]
+
+        with patch('warehouse.warehouse_service.get_driving_matrix_google', new_callable=AsyncMock) as mock_matrix:
+            mock_matrix.return_value = [{"distance_miles": 25.0, "duration_minutes": 35.0}, None]
+            results = await batch_get_driving_data(origin, dests, "90012", ["90210", "90802", "90802", "10001"])
+
+        mock_matrix.assert_awaited_once_with(origin, [(33.77, -118.19), (40.75, -74.0)])
+        assert results[0]["distance_miles"] == 12.0
+        assert results[1] == results[2] == {"distance_miles": 25.0, "duration_minutes": 35.0}
+        assert results[3] is None
+        assert await get_driving_cache().get("driving:90012:90802") == results[1]
+        assert await get_driving_cache().get("driving:90012:10001") is None
+
+    @pytest.mark.asyncio
+    async def test_concurrent_batch_driving_lookups_share_routes(self, mock_env_vars):
+        """Test concurrent searches missing the same pairs send one matrix request for them"""
+        import asyncio
+        origin = (34.0522, -118.2437)
+
+        async def matrix(origin, dests):
+            await asyncio.sleep(0.01)
+            return [{"distance_miles": 10.0, "duration_minutes": 20.0} for _ in dests]
+
+        with patch('warehouse.warehouse_service.get_driving_matrix_google', side_effect=matrix) as mock_matrix:
+            same = await asyncio.gather(*[
+                batch_get_driving_data(origin, [(34.09, -118.41)], "90012", ["90210"]) for _ in range(5)
+            ])
+            assert mock_matrix.call_count == 1
+            # Overlapping batches only route the pairs nobody else is routing
+            await asyncio.gather(
+                batch_get_driving_data(origin, [(33.77, -118.19), (40.75, -74.0)], "90012", ["90802", "10001"]),
+                batch_get_driving_data(origin, [(40.75, -74.0), (37.77, -122.42)], "90012", ["10001", "94103"]),
+            )
+
+        assert all(result == same[0] for result in same)
+        assert same[0][0]["distance_miles"] == 10.0
+        assert sorted(len(call.args[1]) for call in mock_matrix.call_args_list[1:]) == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_batch_driving_data_for_origins_routes_each_pair_once(self, mock_env_vars):
+        """Test legs share one matrix row per origin ZIP and a pair requested twice is routed once"""
+        la, sf = (34.0522, -118.2437), (37.7749, -122.4194)
+        legs = [
+            (la, "90012", [(34.09, -118.41), (33.77, -118.19)], ["90210", "90802"]),
+            (sf, "94103", [(34.09, -118.41)], ["90210"]),
+            (la, "90012", [(33.77, -118.19)], ["90802"]),
+        ]
+
+        async def matrix(origin, dests):
+            return [{"distance_miles": 400.0 if origin == sf else 10.0 + i, "duration_minutes": 20.0} for i in range(len(dests))]
+
+        with patch('warehouse.warehouse_service.get_driving_matrix_google', side_effect=matrix) as mock_matrix:
+            results = await batch_get_driving_data_for_origins(legs)
+
+        assert sorted(len(call.args[1]) for call in mock_matrix.call_args_list) == [1, 2]
+        assert [r["distance_miles"] for r in results[0]] == [10.0, 11.0]
+        assert results[1][0]["distance_miles"] == 400.0
+        assert results[2][0] == results[0][1]
+
+    @pytest.mark.asyncio
+    async def test_find_nearby_warehouses_batch(self, mock_env_vars):
+        """Test several origins share one snapshot and routing round and match the single search"""
+        mock_warehouses = [
+            {"id": "recLA", "fields": {"Name": "LA", "ZIP": "90210", "Tier": "Silver"}},
+            {"id": "recLB", "fields": {"Name": "LB", "ZIP": "90802", "Tier": "Gold"}},
+            {"id": "recSF", "fields": {"Name": "SF", "ZIP": "94103", "Tier": "Gold"}},
+        ]
+        coords = {"90012": (34.0522, -118.2437), "94105": (37.7898, -122.3942), "90210": (34.0901, -118.4065),
+                  "90802": (33.7701, -118.1937), "94103": (37.7725, -122.4147)}
+
+        async def geocode(zip_code, raise_unavailable=False):
+            return coords.get(zip_code)
+
+        async def driving(legs):
+            from services.geolocation.geolocation_service import haversine
+            return [[{"distance_miles": haversine(*origin, *dest) * 1.2, "duration_minutes": haversine(*origin, *dest)}
+                     for dest in dests] for origin, _, dests, _ in legs]
+
+        with patch('warehouse.warehouse_service.get_coordinates_cached', side_effect=geocode), \
+             patch('warehouse.warehouse_service.fetch_warehouses_from_airtable', new_callable=AsyncMock) as mock_fetch, \
+             patch('warehouse.warehouse_service.batch_get_driving_data_for_origins', side_effect=driving) as mock_driving, \
+             patch('warehouse.warehouse_service.analyze_warehouse_with_gemini', new_callable=AsyncMock) as mock_ai:
+            mock_fetch.return_value = mock_warehouses
+            results = await find_nearby_warehouses_batch([
+                {"zip_code": "90012", "radius_miles": 50},
+                {"zip_code": "bad"},
+                {"zip_code": "94105", "radius_miles": 10},
+            ])
+
+        assert mock_fetch.call_count == 1
+        assert mock_driving.call_count == 1
+        assert [leg[1] for leg in mock_driving.call_args.args[0]] == ["90012", "94105"]
+        assert not mock_ai.called
+        assert [wh["id"] for wh in results[0]["warehouses"]] == ["recLB", "recLA"]
+        assert results[1] == {"origin_zip": "bad", "error": "Invalid ZIP code"}
+        assert [wh["id"] for wh in results[2]["warehouses"]] == ["recSF"]
+
+    @pytest.mark.asyncio
+    async def test_find_nearby_warehouses_estimate_mode(self, mock_env_vars):
+        """Test clear-cut candidates are estimated and only the ambiguous band is routed"""
+        from warehouse import warehouse_service
+        from services.geolocation.circuity import CircuityEstimator
+        from services.geolocation.geolocation_service import haversine
+        estimator = CircuityEstimator(min_samples=1, tail=0.0)
+        for i, ratio in enumerate([1.2, 1.25, 1.3]):
+            dest = (34.3 + i * 0.1, -118.2437)
+            miles = haversine(34.0522, -118.2437, *dest) * ratio
+            estimator.observe(f"k{i}", (34.0522, -118.2437), dest, {"distance_miles": miles, "duration_minutes": miles * 1.2})
+        mock_warehouses = [
+            {"id": "recNear", "fields": {"Name": "Near", "ZIP": "90210", "Tier": "Silver"}},
+            {"id": "recEdge", "fields": {"Name": "Edge", "ZIP": "92101", "Tier": "Gold"}},
+        ]
+        coords = {"90012": (34.0522, -118.2437), "90210": (34.0901, -118.4065), "92101": (32.7157, -117.1611)}
+
+        async def geocode(zip_code, raise_unavailable=False):
+            return coords.get(zip_code)
+
+        with patch.object(warehouse_service, '_circuity', estimator), \
+             patch('warehouse.warehouse_service.get_coordinates_cached', side_effect=geocode), \
+             patch('warehouse.warehouse_service.fetch_warehouses_from_airtable', new_callable=AsyncMock) as mock_fetch, \
+             patch('warehouse.warehouse_service.batch_get_driving_data', new_callable=AsyncMock) as mock_driving, \
+             patch('warehouse.warehouse_service.analyze_warehouse_with_gemini', new_callable=AsyncMock) as mock_ai:
+            mock_fetch.return_value = mock_warehouses
+            mock_driving.return_value = [{"distance_miles": 120.0, "duration_minutes": 125.0}]
+            mock_ai.return_value = "Test AI analysis"
+
+            result = await find_nearby_warehouses("90012", 140.0, estimate=True)
+
+        # San Diego is ~112 straight-line miles away: 112 x 1.3 > 140 but 112 x 1.2 < 140
+        assert mock_driving.call_args.args[3] == ["92101"]
+        by_id = {wh["id"]: wh for wh in result["warehouses"]}
+        assert by_id["recNear"]["estimated"] is True
+        assert by_id["recEdge"]["estimated"] is False
+        assert by_id["recEdge"]["distance_miles"] == 120.0
+
+    @pytest.mark.asyncio
+    async def test_prefilter_ignores_other_regions_circuity(self, mock_env_vars):
+        """Test circuity learned elsewhere never drops a warehouse that is within the radius"""
+        from warehouse import warehouse_service
+        from services.geolocation.circuity import CircuityEstimator
+        from services.geolocation.geolocation_service import haversine
+        estimator = CircuityEstimator(min_samples=1, tail=0.0)
+        nyc = (40.7506, -73.9972)
+        dest = (41.2, -73.9972)
+        miles = haversine(*nyc, *dest) * 1.5
+        estimator.observe("k0", nyc, dest, {"distance_miles": miles, "duration_minutes": miles * 1.2})
+        mock_warehouses = [{"id": "recSD", "fields": {"Name": "San Diego", "ZIP": "92101", "Tier": "Gold"}}]
+        coords = {"90012": (34.0522, -118.2437), "92101": (32.7157, -117.1611)}
+
+        async def geocode(zip_code, raise_unavailable=False):
+            return coords.get(zip_code)
+
+        with patch.object(warehouse_service, '_circuity', estimator), \
+             patch('warehouse.warehouse_service.get_coordinates_cached', side_effect=geocode), \
+             patch('warehouse.warehouse_service.fetch_warehouses_from_airtable', new_callable=AsyncMock) as mock_fetch, \
+             patch('warehouse.warehouse_service.batch_get_driving_data', new_callable=AsyncMock) as mock_driving, \
+             patch('warehouse.warehouse_service.analyze_warehouse_with_gemini', new_callable=AsyncMock) as mock_ai:
+            mock_fetch.return_value = mock_warehouses
+            mock_driving.return_value = [{"distance_miles": 120.0, "duration_minutes": 125.0}]
+            mock_ai.return_value = "Test AI analysis"
+
+            # ~112 straight-line miles: 112 x 1.5 > 140, but LA has no samples of its own
+            exact = await find_nearby_warehouses("90012", 140.0)
+            estimated = await find_nearby_warehouses("90012", 140.0, estimate=True)
+
+        assert [wh["id"] for wh in exact["warehouses"]] == ["recSD"]
+        assert [wh["id"] for wh in estimated["warehouses"]] == ["recSD"]
+        assert mock_driving.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_find_nearby_warehouses_drive_time_mode(self, mock_env_vars, monkeypatch):
+        """Test a drive-time search settles clear cells from the grid and routes only the rest"""
+        from services.geolocation import drive_time_grid
+        from services.geolocation.drive_time_grid import DriveTimeGrid
+        origin = (34.0522, -118.2437)
+        mock_warehouses = [
+            {"id": "recIn", "fields": {"Name": "In", "ZIP": "90210", "Tier": "Silver"}},
+            {"id": "recOut", "fields": {"Name": "Out", "ZIP": "92501", "Tier": "Gold"}},
+            {"id": "recEdge", "fields": {"Name": "Edge", "ZIP": "91101", "Tier": "Gold"}},
+            {"id": "recNoGrid", "fields": {"Name": "NoGrid", "ZIP": "93001", "Tier": "Gold"}},
+        ]
+        coords = {"90012": origin, "90210": (34.0901, -118.4065), "92501": (33.9806, -117.3755),
+                  "91101": (34.1478, -118.1445), "93001": (34.2805, -119.2945)}
+        grid = DriveTimeGrid(cell_degrees=0.25, slack_minutes=15)
+        # warehouse ZIP -> minutes from the origin's cell
+        for key, minutes in {"90210": 30.0, "92501": 90.0, "91101": 58.0}.items():
+            grid.put(key, coords[key], {grid.cell(origin): (minutes * 0.8, minutes)})
+        monkeypatch.setattr(drive_time_grid, "_grid", grid)
+
+        async def geocode(zip_code, raise_unavailable=False):
+            return coords.get(zip_code)
+
+        with patch('warehouse.warehouse_service.get_coordinates_cached', side_effect=geocode), \
+             patch('warehouse.warehouse_service.fetch_warehouses_from_airtable', new_callable=AsyncMock) as mock_fetch, \
+             patch('warehouse.warehouse_service.batch_get_driving_data', new_callable=AsyncMock) as mock_driving, \
+             patch('warehouse.warehouse_service.analyze_warehouse_with_gemini', new_callable=AsyncMock) as mock_ai:
+            mock_fetch.return_value = mock_warehouses
+            mock_driving.return_value = [{"distance_miles": 20.0, "duration_minutes": 55.0},
+                                         {"distance_miles": 70.0, "duration_minutes": 75.0}]
+            mock_ai.return_value = "Test AI analysis"
+
+            result = await find_nearby_warehouses("90012", 50.0, max_drive_minutes=60)
+
+        assert mock_driving.call_args.args[3] == ["91101", "93001"]
+        assert [wh["id"] for wh in result["warehouses"]] == ["recEdge", "recIn"]
+        by_id = {wh["id"]: wh for wh in result["warehouses"]}
+        assert by_id["recIn"]["estimated"] is True
+        assert by_id["recIn"]["duration_minutes"] == 30.0
+        assert by_id["recEdge"]["estimated"] is False
+
+    @pytest.mark.asyncio
+    async def test_refresh_drive_time_grid_builds_stale_and_prunes(self, mock_env_vars, monkeypatch):
+        """Test the refresh job routes only warehouses without a fresh grid and saves the result"""
+        import time
+        from services.geolocation import drive_time_grid
+        from services.geolocation.drive_time_grid import DriveTimeGrid
+        from warehouse.warehouse_service import refresh_drive_time_grid
+        grid = DriveTimeGrid(cell_degrees=1.0)
+        grid.put("90210", (34.0901, -118.4065), {}, built_at=time.time())
+        grid.put("99999", (0.0, 0.0), {}, built_at=time.time())
+        monkeypatch.setattr(drive_time_grid, "_grid", grid)
+        mock_warehouses = [
+            {"id": "recA", "fields": {"ZIP": "90210"}},
+            {"id": "recB", "fields": {"ZIP": "10001"}},
+            {"id": "recC", "fields": {"ZIP": "10001"}},
+        ]
+        coords = {"90210": (34.0901, -118.4065), "10001": (40.7506, -73.9972)}
+
+        async def geocode(zip_code, raise_unavailable=False):
+            return coords.get(zip_code)
+
+        async def matrix(origin, dests):
+            return [{"distance_miles": 10.0, "duration_minutes": 12.0} for _ in dests], 0
+
+        with patch('warehouse.warehouse_service.get_coordinates_cached', side_effect=geocode), \
+             patch('warehouse.warehouse_service.fetch_warehouses_from_airtable', new_callable=AsyncMock) as mock_fetch, \
+             patch('services.geolocation.drive_time_grid.get_driving_matrix_google_with_failures', side_effect=matrix) as mock_matrix:
+            mock_fetch.return_value = mock_warehouses
+            assert await refresh_drive_time_grid() == 1
+
+        assert mock_matrix.call_count == 1
+        assert mock_matrix.call_args.args[0] == (40.7506, -73.9972)
+        saved = DriveTimeGrid.load(drive_time_grid.DRIVE_TIME_GRID_PATH)
+        assert sorted(saved._grids) == ["10001", "90210"]
+        assert saved.lookup("10001", (40.7506, -73.9972)) == (10.0, 12.0)
+
+    @pytest.mark.asyncio
+    async def test_refresh_drive_time_grid_saves_progress(self, mock_env_vars, monkeypatch):
+        """Test grids built before an interrupted refresh are already saved"""
+        import os
+        import asyncio
+        from services.geolocation import drive_time_grid
+        from services.geolocation.drive_time_grid import DriveTimeGrid
+        from warehouse import warehouse_service
+        monkeypatch.setattr(drive_time_grid, "_grid", DriveTimeGrid(cell_degrees=1.0))
+        monkeypatch.setattr(warehouse_service, "DRIVE_TIME_GRID_SAVE_EVERY", 1)
+        mock_warehouses = [{"id": "recA", "fields": {"ZIP": "90210"}}, {"id": "recB", "fields": {"ZIP": "10001"}}]
+        coords = {"90210": (34.0901, -118.4065), "10001": (40.7506, -73.9972)}
+        saved_after_first = []
+
+        async def geocode(zip_code, raise_unavailable=False):
+            return coords.get(zip_code)
+
+        async def matrix(origin, dests):
+            if saved_after_first:
+                raise asyncio.CancelledError  # the job is stopped mid-run
+            saved_after_first.append(os.path.exists(drive_time_grid.DRIVE_TIME_GRID_PATH))
+            return [{"distance_miles": 10.0, "duration_minutes": 12.0} for _ in dests], 0
+
+        with patch('warehouse.warehouse_service.get_coordinates_cached', side_effect=geocode), \
+             patch('warehouse.warehouse_service.fetch_warehouses_from_airtable', new_callable=AsyncMock) as mock_fetch, \
+             patch('services.geolocation.drive_time_grid.get_driving_matrix_google_with_failures', side_effect=matrix):
+            mock_fetch.return_value = mock_warehouses
+            with pytest.raises(asyncio.CancelledError):
+                await warehouse_service.refresh_drive_time_grid()
+
+        assert saved_after_first == [False]
+        assert len(DriveTimeGrid.load(drive_time_grid.DRIVE_TIME_GRID_PATH)) == 1
+
+    @pytest.mark.asyncio
+    async def test_find_nearby_warehouses_top_k_stops_early(self, mock_env_vars):
+        """Test a limit routes candidates by tier and time bound and stops once the top K are final"""
+        from warehouse import warehouse_service
+        from services.geolocation.geolocation_service import haversine
+        origin = (34.0522, -118.2437)
+        # (id, tier, latitude offset) - roughly 7 miles per 0.1 degree
+        layout = [("recG1", "Gold", 0.1), ("recG2", "Gold", 0.3), ("recS1", "Silver", 0.05),
+                  ("recS2", "Silver", 0.2), ("recB1", "Bronze", 0.02), ("recB2", "Bronze", 0.4)]
+        mock_warehouses = [{"id": rec_id, "fields": {"Name": rec_id, "ZIP": rec_id.lower(), "Tier": tier}} for rec_id, tier, _ in layout]
+        coords = {"90012": origin, **{rec_id.lower(): (origin[0] + offset, origin[1]) for rec_id, _, offset in layout}}
+
+        async def geocode(zip_code, raise_unavailable=False):
+            return coords.get(zip_code)
+
+        async def driving(origin_coords, dest_coords_list, origin_zip, dest_zips):
+            return [{"distance_miles": haversine(*origin_coords, *dest) * 1.3,
+                     "duration_minutes": haversine(*origin_coords, *dest) * 1.3 * 1.2} for dest in dest_coords_list]
+
+        with patch.object(warehouse_service, 'NEARBY_TOP_K_BATCH_SIZE', 2), \
+             patch('warehouse.warehouse_service.get_coordinates_cached', side_effect=geocode), \
+             patch('warehouse.warehouse_service.fetch_warehouses_from_airtable', new_callable=AsyncMock) as mock_fetch, \
+             patch('warehouse.warehouse_service.batch_get_driving_data', side_effect=driving) as mock_driving, \
+             patch('warehouse.warehouse_service.analyze_warehouse_with_gemini', new_callable=AsyncMock) as mock_ai:
+            mock_fetch.return_value = mock_warehouses
+            mock_ai.return_value = "Test AI analysis"
+
+            limited = await find_nearby_warehouses("90012", 100.0, limit=2)
+            assert mock_driving.call_count == 1
+            assert mock_driving.call_args.args[3] == ["recg1", "recg2"]
+
+            full = await find_nearby_warehouses("90012", 100.0)
+
+        assert [wh["id"] for wh in limited["warehouses"]] == ["recG1", "recG2"]
+        assert [wh["id"] for wh in full["warehouses"]][:2] == ["recG1", "recG2"]
+
+    @pytest.mark.asyncio
+    async def test_top_k_bound_ignores_learned_circuity(self, mock_env_vars, monkeypatch):
+        """Test a learned circuity floor above 1 doesn't stop the search before a faster route is seen"""
+        from warehouse import warehouse_service
+        from services.geolocation.circuity import CircuityFit
+        origin = (34.0522, -118.2437)
+        monkeypatch.setattr(warehouse_service._circuity, "fit", lambda coords: CircuityFit(1.5, 2.0, 1.6, 1.4, 100))
+        # (straight-line miles, actual driving minutes): the second route is unusually direct
+        candidates = [
+            {"warehouse": {"id": "recA", "fields": {}}, "zip": "a", "coordinates": (34.2, -118.2437), "straight_miles": 10.0, "tier_rank": 0},
+            {"warehouse": {"id": "recB", "fields": {}}, "zip": "b", "coordinates": (34.3, -118.2437), "straight_miles": 12.0, "tier_rank": 0},
+        ]
+        minutes = {"a": 12.0, "b": 9.0}
+
+        async def driving(origin_coords, dest_coords_list, origin_zip, dest_zips):
+            return [{"distance_miles": 15.0, "duration_minutes": minutes[z]} for z in dest_zips]
+
+        with patch.object(warehouse_service, 'NEARBY_TOP_K_BATCH_SIZE', 1), \
+             patch('warehouse.warehouse_service.batch_get_driving_data', side_effect=driving):
+            top = await warehouse_service._top_k(origin, "90012", 100.0, candidates, False, 1)
+
+        assert [wh["id"] for wh in top] == ["recB"]
+
+    @pytest.mark.asyncio
+    async def test_find_nearby_warehouses_top_k_continues_when_not_final(self, mock_env_vars):
+        """Test the search keeps routing while a later candidate could still outrank the K-th result"""
+        from warehouse import warehouse_service
+        origin = (34.0522, -118.2437)
+        mock_warehouses = [
+            {"id": "recFar", "fields": {"Name": "Far", "ZIP": "far", "Tier": "Gold"}},
+            {"id": "recNear", "fields": {"Name": "Near", "ZIP": "near", "Tier": "Gold"}},
+        ]
+        coords = {"90012": origin, "far": (34.5, -118.2437), "near": (34.3, -118.2437)}
+
+        async def geocode(zip_code, raise_unavailable=False):
+            return coords.get(zip_code)
+
+        # The closer warehouse by straight line turns out to be the slower drive
+        async def driving(origin_coords, dest_coords_list, origin_zip, dest_zips):
+            minutes = {"near": 90.0, "far": 45.0}
+            return [{"distance_miles": 40.0, "duration_minutes": minutes[z]} for z in dest_zips]
+
+        with patch.object(warehouse_service, 'NEARBY_TOP_K_BATCH_SIZE', 1), \
+             patch('warehouse.warehouse_service.get_coordinates_cached', side_effect=geocode), \
+             patch('warehouse.warehouse_service.fetch_warehouses_from_airtable', new_callable=AsyncMock) as mock_fetch, \
+             patch('warehouse.warehouse_service.batch_get_driving_data', side_effect=driving) as mock_driving, \
+             patch('warehouse.warehouse_service.analyze_warehouse_with_gemini', new_callable=AsyncMock):
+            mock_fetch.return_value = mock_warehouses
+
+            result = await find_nearby_warehouses("90012", 100.0, limit=1)
+
+        assert mock_driving.call_count == 2
+        assert [wh["id"] for wh in result["warehouses"]] == ["recFar"]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_warehouse_misses_share_one_fetch(self, mock_env_vars):
+        """Test concurrent cache misses run a single Airtable pagination"""
+        import asyncio
+
+        async def slow_fetch(*args, **kwargs):
+            await asyncio.sleep(0.01)
+            return [{"id": "rec123", "fields": {"Name": "Test Warehouse"}}]
+
+        with patch('services.airtable.airtable_sync.fetch_all_airtable_records', side_effect=slow_fetch) as mock_fetch:
+            results = await asyncio.gather(*[fetch_warehouses_from_airtable() for _ in range(5)])
+
+        assert mock_fetch.call_count == 1
+        assert all(r[0]["id"] == "rec123" for r in results)
+
+    @pytest.mark.asyncio
+    async def test_concurrent_coordinate_misses_share_one_geocode(self, mock_env_vars):
+        """Test concurrent geocodes of the same ZIP hit the provider once"""
+        import asyncio
+
+        async def slow_geocode(zip_code):
+            await asyncio.sleep(0.01)
+            return (34.0522, -118.2437)
+
+        with patch('warehouse.warehouse_service.geocode', side_effect=slow_geocode) as mock_geocode:
+            results = await asyncio.gather(*[get_coordinates_cached("90210") for _ in range(5)])
+
+        assert mock_geocode.call_count == 1
+        assert results == [(34.0522, -118.2437)] * 5
+
+    @pytest.mark.asyncio
+    async def test_coordinates_cache_normalized_keys_and_misses(self, mock_env_vars):
+        """Test equivalent inputs share an entry and misses are cached without calling the provider again"""
+        with patch('warehouse.warehouse_service.geocode', new_callable=AsyncMock) as mock_geocode:
+            mock_geocode.return_value = (42.36, -71.13)
+            assert await get_coordinates_cached("2134") == (42.36, -71.13)
+            assert await get_coordinates_cached(" 02134-1234") == (42.36, -71.13)
+            mock_geocode.assert_awaited_once_with("02134")
+
+            mock_geocode.reset_mock()
+            mock_geocode.return_value = None
+            assert await get_coordinates_cached("not a zip") is None
+            assert await get_coordinates_cached("NOT A ZIP ") is None
+            assert mock_geocode.await_count == 1
+            assert await get_coordinates_cached("   ") is None
+            assert mock_geocode.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_coordinates_miss_not_cached_when_geocoder_unavailable(self, mock_env_vars):
+        """Test a miss caused by a provider failure is retried on the next call"""
+        from services.geolocation.geocoding import GeocodingUnavailable
+
+        with patch('warehouse.warehouse_service.geocode', new_callable=AsyncMock) as mock_geocode:
+            mock_geocode.side_effect = [GeocodingUnavailable("down"), (1.0, 2.0)]
+            assert await get_coordinates_cached("99999") is None
+            assert await get_coordinates_cached("99999") == (1.0, 2.0)
+
+    def test_memory_cache_evicts_least_recently_used_per_namespace(self):
+        """Test a namespace over its entry limit drops its least recently used keys only"""
+        cache = MemoryCache(max_entries=2, limits={"warehouses": (10, 10 ** 6)})
+        cache.set("warehouses:all", [])
+        cache.set("coords:a", (1.0, 1.0))
+        cache.set("coords:b", (2.0, 2.0))
+        assert cache.get("coords:a") == (1.0, 1.0)  # b is now least recently used
+        cache.set("coords:c", (3.0, 3.0))
+
+        assert cache.get("coords:b") is None
+        assert cache.get("coords:a") == (1.0, 1.0)
+        assert cache.get("warehouses:all") == []
+        stats = cache.get_cache_stats()
+        assert stats["evictions"] == 1
+        assert stats["namespaces"]["coords"]["entries"] == 2
+        assert stats["namespaces"]["warehouses"]["evictions"] == 0
+
+    def test_memory_cache_byte_limit(self):
+        """Test the approximate byte budget evicts old entries but keeps the newest one"""
+        cache = MemoryCache(max_bytes=20000)
+        cache.set("coords:small", (1.0, 1.0))
+        small = cache.get_cache_stats()["approximate_bytes"]
+        cache.set("coords:big", ["x" * 1000 for _ in range(30)])
+
+        assert cache.get("coords:small") is None
+        assert len(cache.get("coords:big")) == 30
+        assert cache.get_cache_stats()["approximate_bytes"] > 20000 > small
+
+        cache.delete("coords:big")
+        assert cache.get_cache_stats()["namespaces"]["coords"] == {
+            "entries": 0, "approximate_bytes": 0, "evictions": 1, "max_entries": cache._default_limits[0], "max_bytes": 20000,
+        }
+
+    def test_approximate_size_samples_large_containers(self):
+        """Test a large view is sized from a sample and lands close to a full walk"""
+        import sys
+        from warehouse.warehouse_service import _approximate_size
+        records = [{"id": f"rec{i}", "fields": {f"Field_{j}": f"value {i}-{j}" for j in range(40)}} for i in range(2000)]
+
+        full = sys.getsizeof(records) + sum(
+            sys.getsizeof(record) + sys.getsizeof("id") + sys.getsizeof(record["id"]) + sys.getsizeof("fields")
+            + sys.getsizeof(record["fields"]) + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in record["fields"].items())
+            for record in records
+        )
+        estimate = _approximate_size(records)
+
+        assert 0.8 * full < estimate < 1.2 * full
+        assert _approximate_size([]) == sys.getsizeof([])
+
+    @pytest.mark.asyncio
+    async def test_single_flight_shares_errors_and_clears_key(self):
+        """Test a failed in-flight call propagates to all waiters and is not cached"""
+        import asyncio
+        flight = SingleFlight()
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(*[flight.do("key", failing) for _ in range(3)], return_exceptions=True)
+
+        assert all(isinstance(r, ValueError) for r in results)
+        assert flight.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_single_flight_batch_shares_errors_and_clears_keys(self):
+        """Test a failed batch fails every caller waiting on its keys and leaves nothing in flight"""
+        import asyncio
+        flight = SingleFlight()
+
+        async def failing(keys):
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        results = await asyncio.gather(flight.do_many(["a", "b"], failing), flight.do_many(["b"], failing),
+                                       return_exceptions=True)
+
+        assert all(isinstance(r, ValueError) for r in results)
+        assert flight.in_flight() == 0
+
+    @pytest.mark.asyncio
+    async def test_stale_snapshot_served_while_refreshing(self, mock_env_vars):
+        """Test a stale snapshot is returned immediately and refreshed in the background"""
+        import asyncio
+        from warehouse import warehouse_service
+
+        warehouse_service._cache.set("warehouses:all", ([{"id": "old", "fields": {}}], "v1"), ttl=3600)
+        warehouse_service._cache._last_airtable_check = 0  # soft refresh is due
+
+        with patch('services.airtable.airtable_sync.fetch_all_airtable_records', new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.return_value = [{"id": "new", "fields": {}}]
+
+            result = await fetch_warehouses_from_airtable()
+            assert result[0]["id"] == "old"
+
+            await asyncio.gather(*list(warehouse_service._background_tasks))
+
+        assert mock_fetch.call_count == 1
+        assert warehouse_service._cache.get("warehouses:all")[0][0]["id"] == "new"
+
+    @pytest.mark.asyncio
+    async def test_version_matches_served_records_while_geocoding(self, mock_env_vars):
+        """Test the version served during ingest geocoding still describes the cached records"""
+        import asyncio
+        import time
+        from warehouse import warehouse_service
+        from warehouse.warehouse_service import fetch_warehouses_with_version
+
+        warehouse_service._cache.set("warehouses:search", ([{"id": "rec1", "fields": {}}], "v1"), ttl=3600)
+        warehouse_service._cache._last_airtable_check = time.time()
+        geocoding = asyncio.Event()
+
+        async def slow_update(*args, **kwargs):
+            await geocoding.wait()
+            return 0
+
+        with patch('services.airtable.airtable_sync.fetch_all_airtable_records', new_callable=AsyncMock) as mock_fetch, \
+             patch.object(warehouse_service._warehouse_locations, 'update', side_effect=slow_update):
+            mock_fetch.return_value = [{"id": "rec1", "fields": {}}, {"id": "rec2", "fields": {}}]
+            refresh = asyncio.create_task(warehouse_service._refresh_warehouses("search", force_full=True))
+            while not mock_fetch.called:
+                await asyncio.sleep(0)
+            await asyncio.sleep(0)
+
+            records, version = await fetch_warehouses_with_version(view="search")
+            assert [rec["id"] for rec in records] == ["rec1"]
+            assert version == "v1"
+
+            geocoding.set()
+            records, version = await refresh
+        assert len(records) == 2
+        assert version == warehouse_service._warehouse_syncs["search"].version != "v1"
+        await asyncio.gather(*list(warehouse_service._background_tasks))
+
+    @pytest.mark.asyncio
+    async def test_fresh_snapshot_does_not_refresh(self, mock_env_vars):
+        """Test a snapshot younger than the check interval triggers no Airtable call"""
+        import time
+        from warehouse import warehouse_service
+
+        warehouse_service._cache.set("warehouses:all", ([], "v1"), ttl=3600)
+        warehouse_service._cache._last_airtable_check = time.time()
+
+        with patch('services.airtable.airtable_sync.fetch_all_airtable_records', new_callable=AsyncMock) as mock_fetch:
+            result = await fetch_warehouses_from_airtable()
+
+        assert result == []
+        mock_fetch.assert_not_called()
+        assert not warehouse_service._background_tasks
+
+    @pytest.mark.asyncio
+    async def test_views_request_projected_fields_and_cache_separately(self, mock_env_vars):
+        """Test each view sends its own fields[] projection and has its own cache entry"""
+        from warehouse import warehouse_service
+
+        with patch('services.airtable.airtable_sync.fetch_all_airtable_records', new_callable=AsyncMock) as mock_fetch:
+            mock_fetch.return_value = [{"id": "rec123", "fields": {"Name": "Test Warehouse"}}]
+
+            await fetch_warehouses_from_airtable(view="search")
+            search_params = mock_fetch.call_args.args[1]
+            await fetch_warehouses_from_airtable(view="detail")
+            detail_params = mock_fetch.call_args.args[1]
+
+        assert "ZIP" in search_params["fields[]"]
+        assert "Tier" in search_params["fields[]"]
+        assert "fields[]" not in detail_params
+        assert warehouse_service._cache.get("warehouses:search") is not None
+        assert warehouse_service._cache.get("warehouses:all") is not None
+
+    @pytest.mark.asyncio
+    async def test_unknown_view_is_rejected(self, mock_env_vars):
+        """Test an unknown view name raises instead of fetching everything"""
+        with pytest.raises(ValueError):
+            await fetch_warehouses_from_airtable(view="everything")
+
+    def test_paginate_warehouses_is_stable_across_inserts(self):
+        """Test a cursor keeps its position when records are added before it"""
+        records = [{"id": f"rec{i}", "fields": {}} for i in (2, 4, 6)]
+        page, cursor = paginate_warehouses(records, limit=2)
+        assert [r["id"] for r in page] == ["rec2", "rec4"]
+
+        updated = records + [{"id": "rec1", "fields": {}}, {"id": "rec5", "fields": {}}]
+        page, cursor = paginate_warehouses(updated, limit=2, cursor=cursor)
+
+        assert [r["id"] for r in page] == ["rec5", "rec6"]
+        assert cursor is None
+
+    def test_paginate_warehouses_invalid_cursor(self):
+        """Test an undecodable cursor is rejected"""
+        with pytest.raises(InvalidCursor):
+            paginate_warehouses([], limit=10, cursor="%%%")
@@ -0,0 +1,86 @@
+import gzip
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from warehouse import warehouse_service
+from warehouse.warehouse_snapshot import build_snapshot, read_snapshot, write_snapshot, dataset_version
+
+class TestWarehouseSnapshot:
+    """Test cases for the on-disk warehouse snapshot"""
+
+    def test_write_and_read_roundtrip(self, tmp_path):
+        """Test a snapshot survives a write/read cycle"""
+        path = str(tmp_path / "nested" / "snapshot.json.gz")
+        snapshot = build_snapshot(
+            {"search": {"version": "abc", "records": [{"id": "rec1", "fields": {"ZIP": "90210"}}]}},
+            {"rec1": ["90210", 34.09, -118.41]},
+        )
+
+        write_snapshot(snapshot, path)
+
+        assert read_snapshot(path) == snapshot
+
+    def test_read_missing_or_corrupt_snapshot(self, tmp_path):
+        """Test missing and unreadable snapshots are ignored"""
+        path = tmp_path / "snapshot.json.gz"
+        assert read_snapshot(str(path)) is None
+
+        path.write_bytes(b"not gzip")
+        assert read_snapshot(str(path)) is None
+
+        with gzip.open(path, "wt") as f:
+            f.write('{"format": 999}')
+        assert read_snapshot(str(path)) is None
+
+    def test_dataset_version_changes_with_views(self):
+        """Test the dataset version tracks every view version"""
+        assert dataset_version({"search": "a"}) == dataset_version({"search": "a"})
+        assert dataset_version({"search": "a"}) != dataset_version({"search": "b"})
+
+    @pytest.mark.asyncio
+    async def test_save_and_load_restores_warehouses(self, mock_env_vars):
+        """Test a saved snapshot seeds the caches and sync state of a fresh worker"""
+        with patch('services.airtable.airtable_sync.fetch_all_airtable_records', new_callable=AsyncMock) as mock_fetch, \
+             patch('warehouse.warehouse_service.get_coordinates_cached', new_callable=AsyncMock) as mock_geocode:
+            mock_fetch.return_value = [{"id": "rec123", "fields": {"Name": "Test Warehouse", "ZIP": "90210"}}]
+            mock_geocode.return_value = (34.09, -118.41)
+            await warehouse_service.fetch_warehouses_from_airtable(view="search")
+        # The sync already scheduled a save
+        await asyncio.gather(*list(warehouse_service._background_tasks))
+
+        assert not await warehouse_service.save_warehouse_snapshot()  # written by the sync
+        warehouse_service._snapshot_signature = None
+        assert await warehouse_service.save_warehouse_snapshot()
+        assert not await warehouse_service.save_warehouse_snapshot()  # unchanged
+
+        # Simulate a restart
+        warehouse_service._cache.clear_warehouse_cache()
+        for sync in warehouse_service._warehouse_syncs.values():
+            sync.reset()
+        warehouse_service._warehouse_locations.reset()
+
+        assert await warehouse_service.load_warehouse_snapshot()
+        assert warehouse_service._cache.get("warehouses:search")[0][0]["id"] == "rec123"
+        assert warehouse_service._warehouse_locations.get("rec123") == (34.09, -118.41)
+        assert not warehouse_service._warehouse_syncs["search"].needs_full_sync()
+
+    @pytest.mark.asyncio
+    async def test_snapshot_served_only_until_max_staleness(self, mock_env_vars, monkeypatch):
+        """Test a snapshot view expires by its sync time, not by when the worker started"""
+        import time
+        monkeypatch.setattr(warehouse_service, "WAREHOUSE_MAX_STALENESS_SECONDS", 3600)
+        records = [{"id": "rec123", "fields": {"Name": "Test Warehouse", "ZIP": "90210"}}]
+        fields = {view: sync.fields for view, sync in warehouse_service._warehouse_syncs.items()}
+        write_snapshot(build_snapshot({
+            "search": {"fields": fields["search"], "records": records, "watermark": time.time() - 7 * 86400, "version": "old"},
+            "detail": {"fields": fields["detail"], "records": records, "watermark": time.time() - 3000, "version": "recent"},
+        }, {}), warehouse_service.WAREHOUSE_SNAPSHOT_PATH)
+
+        assert await warehouse_service.load_warehouse_snapshot()
+
+        assert warehouse_service._cache.get("warehouses:search") is None
+        assert warehouse_service._warehouse_syncs["search"].has_data  # next refresh is a delta sync
+        assert warehouse_service._cache.get("warehouses:all")[1] == "recent"
+        expires_at = warehouse_service._cache._cache["warehouses"]["warehouses:all"]["expires_at"]
+        assert expires_at - time.time() == pytest.approx(600, abs=5)
@@ -0,0 +1,74 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from services.geolocation import zip_centroids
+from services.geolocation.zip_centroids import ZipCentroidTable, zip5, lookup_zip_centroid, normalize_location
+
+GAZETTEER = (
+    "GEOID\tALAND\tAWATER\tALAND_SQMI\tAWATER_SQMI\tINTPTLAT\tINTPTLONG                                                                                                               \n"
+    "02134\t2380000\t0\t0.919\t0.0\t42.357595\t-71.129373\n"
+    "90210\t26000000\t0\t10.0\t0.0\t34.100517\t-118.414712\n"
+)
+
+@pytest.fixture
+def centroid_table(tmp_path):
+    source = tmp_path / "gazetteer.txt"
+    source.write_text(GAZETTEER)
+    binary = tmp_path / "zip_centroids.bin"
+    ZipCentroidTable.from_gazetteer(str(source)).save(str(binary))
+    return ZipCentroidTable.load(str(binary))
+
+class TestZipCentroids:
+    """Test cases for the offline ZIP centroid table"""
+
+    def test_zip5(self):
+        """Test plain and ZIP+4 inputs reduce to 5 digits"""
+        assert zip5("90210") == "90210"
+        assert zip5(" 90210-1234 ") == "90210"
+        assert zip5("Beverly Hills, CA") is None
+        assert zip5("9021") is None
+
+    def test_normalize_location(self):
+        """Test equivalent ZIPs and addresses normalize to one key"""
+        assert normalize_location(" 02134-1234 ") == "02134"
+        assert normalize_location("021341234") == "02134"
+        assert normalize_location("2134") == "02134"
+        assert normalize_location(2134) == "02134"
+        assert normalize_location(2134.0) == "02134"
+        assert normalize_location(" 1 Main  St,\tBoston ") == "1 main st, boston"
+        assert normalize_location("123456") == "123456"
+
+    def test_build_save_and_load(self, centroid_table):
+        """Test a gazetteer file round-trips through the binary format"""
+        assert len(centroid_table) == 2
+        lat, lon = centroid_table.lookup("02134")
+        assert lat == pytest.approx(42.357595, abs=1e-4)
+        assert lon == pytest.approx(-71.129373, abs=1e-4)
+        assert centroid_table.lookup("90210-0001") == centroid_table.lookup("90210")
+
+    def test_unknown_and_non_zip_inputs(self, centroid_table):
+        """Test unknown ZIPs and free-form addresses are left to the remote geocoders"""
+        assert centroid_table.lookup("00000") is None
+        assert centroid_table.lookup("1 Main St, Boston") is None
+
+    def test_load_rejects_other_files(self, tmp_path):
+        """Test a file without the table header is rejected"""
+        path = tmp_path / "other.bin"
+        path.write_bytes(b"not a table")
+        with pytest.raises(ValueError):
+            ZipCentroidTable.load(str(path))
+
+    @pytest.mark.asyncio
+    async def test_cached_coordinates_prefer_local_table(self, centroid_table, monkeypatch, mock_env_vars):
+        """Test known ZIPs resolve locally without calling Google"""
+        from warehouse.warehouse_service import get_coordinates_cached
+        monkeypatch.setattr(zip_centroids, "_table", centroid_table)
+
+        with patch('warehouse.warehouse_service.geocode', new_callable=AsyncMock) as mock_google:
+            mock_google.return_value = (1.0, 2.0)
+            local = await get_coordinates_cached("90210")
+            remote = await get_coordinates_cached("10001")
+
+        assert local == lookup_zip_centroid("90210")
+        assert remote == (1.0, 2.0)
+        mock_google.assert_awaited_once_with("10001")
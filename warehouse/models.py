@@ -1,10 +1,29 @@
 
-from typing import List, Generic, TypeVar
-from pydantic import BaseModel
+from typing import List, Generic, Optional, TypeVar
+from pydantic import BaseModel, Field
 
 class LocationRequest(BaseModel):
     zip_code: str
     radius_miles: float = 50 
+    # Estimate distance/time for warehouses clearly inside the radius instead of routing them
+    estimate: bool = False
+    # Only return the top N warehouses; routing stops once they are final
+    limit: Optional[int] = Field(default=None, ge=1)
+    # Search by driving time instead of radius_miles, answered from the precomputed drive-time grid
+    max_drive_minutes: Optional[float] = Field(default=None, gt=0)
+
+
+class OriginRequest(BaseModel):
+    zip_code: str
+    radius_miles: float = 50
+    max_drive_minutes: Optional[float] = Field(default=None, gt=0)
+
+
+class BatchLocationRequest(BaseModel):
+    # Candidate pickup ZIPs searched together against one warehouse snapshot
+    origins: List[OriginRequest] = Field(min_length=1, max_length=50)
+    estimate: bool = False
+    limit: Optional[int] = Field(default=None, ge=1)
 
 
 from typing import List, Optional
@@ -0,0 +1,31 @@
+"""
+Rebuild the drive-time grid used by `max_drive_minutes` searches. Run it offline,
+e.g. nightly from cron; only warehouses that are new, moved or older than
+DRIVE_TIME_GRID_MAX_AGE_SECONDS are routed again:
+
+    python -m warehouse.refresh_drive_time_grid
+"""
+import asyncio
+
+from services.airtable.airtable_client import init_airtable_client, close_airtable_client
+from services.geolocation.geocoding import init_geocoding_client, close_geocoding_client
+from services.geolocation.driving_cache import close_driving_cache
+from services.geolocation.geolocation_service import shutdown_google_maps_executor
+from warehouse.warehouse_service import refresh_drive_time_grid
+
+
+async def main() -> None:
+    await init_airtable_client()
+    await init_geocoding_client()
+    try:
+        built = await refresh_drive_time_grid()
+        print(f"Rebuilt {built} drive-time grids")
+    finally:
+        await close_airtable_client()
+        await close_geocoding_client()
+        close_driving_cache()
+        shutdown_google_maps_executor()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
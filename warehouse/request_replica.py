@@ -0,0 +1,106 @@
+import re
+import time
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from services.airtable.airtable_sync import AirtableTableSync
+from services.airtable.rate_limiter import INTERACTIVE
+from warehouse.models import OrderData
+
+# Columns of the Requests table needed to answer request-ID lookups
+REQUEST_REPLICA_FIELDS = ["Request ID", "Commodity", "Loading Style", "BOL & Pictures"]
+
+
+def request_key(request_id: Any) -> Optional[str]:
+    """Normalize a Request ID so 42, 42.0 and "42" index the same entry."""
+    if request_id is None or request_id == "":
+        return None
+    if isinstance(request_id, float) and request_id.is_integer():
+        request_id = int(request_id)
+    return str(request_id).strip()
+
+
+def order_from_fields(fields: Dict[str, Any]) -> OrderData:
+    """Build the OrderData for a Requests record, extracting its image URLs."""
+    request_images: List[str] = []
+    raw_images = fields.get("BOL & Pictures")
+
+    if isinstance(raw_images, str):
+        # Case: "filename (url), filename (url)"
+        request_images = re.findall(r"\((https?://[^\)]+)\)", raw_images)
+
+    elif isinstance(raw_images, list):
+        # Case: array of objects with "url"
+        for img in raw_images:
+            if isinstance(img, dict) and "url" in img:
+                request_images.append(img["url"])
+
+    return OrderData(
+        commodity=fields.get("Commodity"),
+        loading_method=fields.get("Loading Style"),
+        request_images=request_images
+    )
+
+
+class RequestReplica:
+    """
+    In-memory copy of the Requests table indexed by Request ID.
+
+    Kept current by delta syncs; each record is parsed into OrderData once,
+    when it first arrives or changes, so lookups are a dict access.
+    """
+
+    def __init__(self, sync: AirtableTableSync):
+        self._sync = sync
+        self._orders_by_record: Dict[str, Tuple[Optional[str], OrderData]] = {}
+        self._index: Dict[str, List[OrderData]] = {}
+        self._last_refresh = 0.0
+        self._lock = asyncio.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self._sync.has_data
+
+    def reset(self) -> None:
+        self._sync.reset()
+        self._orders_by_record = {}
+        self._index = {}
+        self._last_refresh = 0.0
+
+    async def refresh(self, max_age: float = 0, priority: int = INTERACTIVE) -> None:
+        """Delta-sync the replica, unless it was refreshed less than `max_age` seconds ago."""
+        async with self._lock:
+            if max_age and time.time() - self._last_refresh < max_age:
+                return
+            records = await self._sync.sync(priority=priority)
+
+            changed = set(self._sync.last_changed_ids)
+            previous = self._orders_by_record
+            orders_by_record: Dict[str, Tuple[Optional[str], OrderData]] = {}
+            for record in records:
+                rec_id = record["id"]
+                if rec_id in changed or rec_id not in previous:
+                    fields = record.get("fields", {})
+                    orders_by_record[rec_id] = (request_key(fields.get("Request ID")), order_from_fields(fields))
+                else:
+                    orders_by_record[rec_id] = previous[rec_id]
+
+            index: Dict[str, List[OrderData]] = {}
+            for key, order in orders_by_record.values():
+                if key is not None:
+                    index.setdefault(key, []).append(order)
+
+            self._orders_by_record = orders_by_record
+            self._index = index
+            self._last_refresh = time.time()
+
+    def get(self, request_id: Any) -> List[OrderData]:
+        return list(self._index.get(request_key(request_id), []))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "request_ids": len(self._index),
+            "last_refresh": self._last_refresh,
+            "sync": self._sync.get_stats(),
+        }
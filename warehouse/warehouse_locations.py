@@ -0,0 +1,163 @@
+import time
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from services.geolocation.zip_centroids import normalize_location
+
+Coords = Tuple[float, float]
+
+# ZIPs whose geocode raised (provider outage) are tried again after this long
+GEOCODE_RETRY_SECONDS = 60.0
+
+
+def location_key(fields: Dict[str, Any]) -> Optional[str]:
+    """The value a warehouse is geocoded by (its ZIP); None when it has none."""
+    value = fields.get("ZIP")
+    if value is None or value == "":
+        return None
+    return normalize_location(value) or None
+
+
+class WarehouseLocations:
+    """
+    Coordinates of every warehouse record, resolved when the record is ingested.
+
+    Each entry remembers the ZIP it was geocoded from, so a record is only
+    geocoded again when it is new or its ZIP changed. Entries live outside the
+    response cache: invalidating warehouse data never re-geocodes the table.
+
+    A ZIP the geocoder returned nothing for stays unresolved until it changes
+    or a retry is requested; one whose geocode raised (the provider was down)
+    is retried by the first update after `retry_seconds`.
+    """
+
+    def __init__(self, max_concurrent: int = 10, retry_seconds: float = GEOCODE_RETRY_SECONDS):
+        self._max_concurrent = max_concurrent
+        self._retry_seconds = retry_seconds
+        self._entries: Dict[str, Tuple[str, Coords]] = {}
+        # record ID -> ZIP that could not be geocoded
+        self._unresolved: Dict[str, str] = {}
+        # record ID -> ZIP whose geocode failed, and when those are due another try
+        self._unavailable: Dict[str, str] = {}
+        self._retry_at = 0.0
+        # The record list of the last update, so callers can skip re-checking an unchanged table
+        self._records: Optional[List[Dict[str, Any]]] = None
+        self._lock = asyncio.Lock()
+        self.revision = 0
+        self.geocoded = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def reset(self) -> None:
+        self._entries = {}
+        self._unresolved = {}
+        self._unavailable = {}
+        self._records = None
+        self.revision = 0
+        self.geocoded = 0
+
+    def get(self, record_id: str) -> Optional[Coords]:
+        entry = self._entries.get(record_id)
+        return entry[1] if entry else None
+
+    def needs_update(self, records: List[Dict[str, Any]]) -> bool:
+        """Whether `update` could change anything: `records` is not the list last updated from, or failed geocodes are due a retry."""
+        return records is not self._records or (bool(self._unavailable) and time.monotonic() >= self._retry_at)
+
+    async def update(self, records: List[Dict[str, Any]], geocode: Callable[[str], Awaitable[Optional[Coords]]],
+                     retry_unresolved: bool = False,
+                     lookup_cached: Optional[Callable[[List[str]], Awaitable[Dict[str, Optional[Coords]]]]] = None) -> int:
+        """Geocode records that are new or whose ZIP changed and drop records that are gone.
+
+        `records` must be the whole table. ZIPs that geocoded to nothing are
+        only tried again when they change or `retry_unresolved` is set; ZIPs
+        whose geocode raised are retried once `retry_seconds` have passed. When given,
+        `lookup_cached` resolves the ZIPs it already knows in one batch before
+        the rest go to `geocode`. Returns how many ZIPs were looked up.
+        """
+        async with self._lock:
+            entries: Dict[str, Tuple[str, Coords]] = {}
+            unresolved: Dict[str, str] = {}
+            unavailable: Dict[str, str] = {}
+            pending: Dict[str, List[str]] = {}
+            retry_due = time.monotonic() >= self._retry_at
+            for record in records:
+                key = location_key(record.get("fields", {}))
+                if key is None:
+                    continue
+                current = self._entries.get(record["id"])
+                if current and current[0] == key:
+                    entries[record["id"]] = current
+                elif not retry_due and self._unavailable.get(record["id"]) == key:
+                    unavailable[record["id"]] = key
+                elif not retry_unresolved and self._unresolved.get(record["id"]) == key:
+                    unresolved[record["id"]] = key
+                else:
+                    pending.setdefault(key, []).append(record["id"])
+
+            if not pending and len(entries) == len(self._entries):
+                self._unresolved = unresolved
+                self._unavailable = unavailable
+                self._records = records
+                return 0
+
+            semaphore = asyncio.Semaphore(self._max_concurrent)
+            known: Dict[str, Optional[Coords]] = {}
+            if lookup_cached is not None and pending:
+                try:
+                    known = await lookup_cached(list(pending))
+                except Exception as e:
+                    print(f"Error reading cached warehouse coordinates: {e}")
+
+            async def resolve(key: str) -> Tuple[str, Optional[Coords], bool]:
+                """(key, coordinates, whether the geocoder answered)."""
+                if key in known:
+                    return key, known[key], True
+                async with semaphore:
+                    try:
+                        return key, await geocode(key), True
+                    except Exception as e:
+                        print(f"Error geocoding warehouse ZIP {key}: {e}")
+                        return key, None, False
+
+            for key, coords, answered in await asyncio.gather(*[resolve(key) for key in pending]):
+                for record_id in pending[key]:
+                    if coords:
+                        entries[record_id] = (key, (coords[0], coords[1]))
+                    elif answered:
+                        unresolved[record_id] = key
+                    else:
+                        unavailable[record_id] = key
+            if unavailable and retry_due:
+                self._retry_at = time.monotonic() + self._retry_seconds
+
+            # Searches key their spatial index on the revision; only bump it on a real change
+            if entries != self._entries:
+                self._entries = entries
+                self.revision += 1
+            self._unresolved = unresolved
+            self._unavailable = unavailable
+            self._records = records
+            self.geocoded += len(pending)
+            return len(pending)
+
+    def by_location_key(self) -> Dict[str, Coords]:
+        """Coordinates per distinct location key; records sharing a ZIP appear once."""
+        return {key: coords for key, coords in self._entries.values()}
+
+    def export_state(self) -> Dict[str, List[Any]]:
+        return {record_id: [key, coords[0], coords[1]] for record_id, (key, coords) in self._entries.items()}
+
+    def restore_state(self, state: Dict[str, List[Any]]) -> None:
+        self._entries = {record_id: (key, (lat, lon)) for record_id, (key, lat, lon) in state.items()}
+        self._records = None
+        self.revision += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "located_records": len(self._entries),
+            "unresolved_records": len(self._unresolved),
+            "unavailable_records": len(self._unavailable),
+            "geocoded": self.geocoded,
+        }
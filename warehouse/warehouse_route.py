@@ -1,23 +1,90 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Header, HTTPException, Query, Response
 from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 import httpx
 import requests
 import os
+import json
+import math
 import time
+from typing import Any, AsyncIterator, Dict, List, Literal, Optional
 
 from services.messaging.email_service import send_bulk_email
-from warehouse.models import LocationRequest, ResponseModel, SendBulkEmailData, SendEmailData
-from warehouse.warehouse_service import fetch_orders_by_requestid_from_airtable, fetch_orders_from_airtable, fetch_warehouses_from_airtable, find_nearby_warehouses, invalidate_warehouse_cache, get_cache_status
+from services.airtable.airtable_client import AirtableRateLimited
+from warehouse.models import BatchLocationRequest, LocationRequest, ResponseModel, SendBulkEmailData, SendEmailData
+from warehouse.warehouse_service import fetch_orders_by_requestid_from_airtable, fetch_orders_from_airtable, find_nearby_warehouses, find_nearby_warehouses_batch, invalidate_warehouse_cache, get_cache_status, refresh_warehouse_views, iter_orders_from_airtable, iter_warehouse_pages, fetch_warehouses_with_version, paginate_warehouses, InvalidCursor
 
 
 warehouse_router = APIRouter()
 
+# Lets a CDN cache /warehouses but always revalidate it against the ETag
+WAREHOUSES_CACHE_CONTROL = os.getenv("WAREHOUSES_CACHE_CONTROL", "public, max-age=0, must-revalidate")
+
+
+def _rate_limited(e: AirtableRateLimited) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(math.ceil(e.retry_after))})
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison as required for If-None-Match."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+async def _ndjson_response(pages: AsyncIterator[List[Dict[str, Any]]]) -> StreamingResponse:
+    """Stream records one JSON object per line as pages arrive.
+
+    The first page is read before the response starts so upstream failures
+    still surface as a 500 instead of a truncated 200.
+    """
+    try:
+        first_page = await pages.__anext__()
+    except StopAsyncIteration:
+        first_page = []
+
+    def lines(page: List[Dict[str, Any]]) -> str:
+        return "".join(json.dumps(record, separators=(",", ":")) + "\n" for record in page)
+
+    async def body():
+        yield lines(first_page)
+        async for page in pages:
+            yield lines(page)
+
+    return StreamingResponse(body(), media_type="application/x-ndjson")
+
 
 @warehouse_router.get("/warehouses")
-async def warehouses():
+async def warehouses(
+    response: Response,
+    view: Literal["search", "listing", "detail"] = "detail",
+    stream: Optional[Literal["ndjson"]] = None,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+):
     try:
-        data = await fetch_warehouses_from_airtable()
+        if stream == "ndjson":
+            return await _ndjson_response(iter_warehouse_pages(view=view))
+        data, version = await fetch_warehouses_with_version(view=view)
+
+        # Strong ETag from the dataset version lets clients and CDNs revalidate with If-None-Match
+        headers = {"Cache-Control": WAREHOUSES_CACHE_CONTROL}
+        if version:
+            headers["ETag"] = f'"{view}-{version}"'
+            if _etag_matches(if_none_match, headers["ETag"]):
+                return Response(status_code=304, headers=headers)
+        response.headers.update(headers)
+
+        if limit is not None:
+            page, next_cursor = paginate_warehouses(data, limit, cursor)
+            return ResponseModel(status="success", data={"records": page, "next_cursor": next_cursor})
         return ResponseModel(status="success", data=data)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except AirtableRateLimited as e:
+        raise _rate_limited(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
@@ -28,25 +95,45 @@ async def requests(request_id: int):
         if not data:
             raise HTTPException(status_code=404, detail=f"Order with Request ID {request_id} not found")
         return ResponseModel(status="success", data=data)   
+    except AirtableRateLimited as e:
+        raise _rate_limited(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
     
 @warehouse_router.get("/all-requests")
-async def requests():
+async def requests(stream: Optional[Literal["ndjson"]] = None):
     try:
+        if stream == "ndjson":
+            return await _ndjson_response(iter_orders_from_airtable())
         data = await fetch_orders_from_airtable()
         if not data:
             raise HTTPException(status_code=404, detail=f"Orders not found")
         return ResponseModel(status="success", data=data)   
+    except AirtableRateLimited as e:
+        raise _rate_limited(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
     
 @warehouse_router.post("/nearby_warehouses")
 async def find_nearby_warehouses_endpoint(request: LocationRequest):
     try:
-        nearby_warehouses = await find_nearby_warehouses(request.zip_code, request.radius_miles)
+        nearby_warehouses = await find_nearby_warehouses(request.zip_code, request.radius_miles, request.estimate, request.limit, request.max_drive_minutes)
         encoded = jsonable_encoder(nearby_warehouses, exclude_none=False)
         return ResponseModel(status="success", data=encoded)
+    except AirtableRateLimited as e:
+        raise _rate_limited(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+
+@warehouse_router.post("/nearby_warehouses/batch")
+async def find_nearby_warehouses_batch_endpoint(request: BatchLocationRequest):
+    try:
+        origins = [origin.model_dump() for origin in request.origins]
+        results = await find_nearby_warehouses_batch(origins, request.estimate, request.limit)
+        return ResponseModel(status="success", data=jsonable_encoder({"results": results}))
+    except AirtableRateLimited as e:
+        raise _rate_limited(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
@@ -61,22 +148,25 @@ async def send_bulk_email_endpoint(send_bulk_emails: SendBulkEmailData):
 
 # Cache management endpoints
 @warehouse_router.post("/cache/refresh")
-async def refresh_cache():
-    """Manually refresh warehouse cache from Airtable."""
+async def refresh_cache(full: bool = False):
+    """Refresh warehouse cache from Airtable (delta sync; `full=true` forces a full reconcile)."""
     try:
         # Optional: Add admin authentication for production
         #     raise HTTPException(status_code=401, detail="Invalid admin key")
         
         # Force refresh by bypassing cache
-        warehouses = await fetch_warehouses_from_airtable(force_refresh=True)
+        view_counts = await refresh_warehouse_views(full_sync=full)
         return ResponseModel(
             status="success", 
             data={
                 "message": "Cache refreshed successfully",
-                "warehouse_count": len(warehouses),
+                "warehouse_count": view_counts["detail"],
+                "view_counts": view_counts,
                 "timestamp": time.time()
             }
         )
+    except AirtableRateLimited as e:
+        raise _rate_limited(e)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Cache refresh failed: {str(e)}")
 
@@ -132,4 +222,4 @@ async def airtable_webhook(request: dict):
             )
             
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Webhook processing failed: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Webhook processing failed: {str(e)}")
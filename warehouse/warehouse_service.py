@@ -1,66 +1,241 @@
 import os
-import re
+import sys
 import time
+import base64
+import bisect
 import asyncio
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, Callable, Awaitable, AsyncIterator, Iterable
 from threading import Lock
+from collections import OrderedDict
+from itertools import islice
 
 from pydantic import BaseModel
-import httpx
 import copy
+import numpy as np
 
-from services.geolocation.geolocation_service import get_coordinates_mapbox, get_coordinates_google, get_driving_distance_and_time_google, get_coordinates_google_async
+from services.geolocation.geolocation_service import get_driving_matrix_google, get_google_maps_executor
+from services.geolocation.geocoding import GeocodingUnavailable, geocode, get_geocoder
+from services.geolocation.driving_cache import get_driving_cache
+from services.geolocation.circuity import CircuityEstimator, EXCLUDE, INCLUDE
+from services.geolocation.drive_time_grid import DRIVE_TIME_GRID_SAVE_EVERY, MAX_DRIVING_MPH, get_drive_time_grid, load_drive_time_grid, reload_drive_time_grid_in_background, save_drive_time_grid
+from services.geolocation.zip_centroids import lookup_zip_centroid, normalize_location
+from services.cache.redis_cache import REDIS_CACHE_NAMESPACES, RedisCache, get_redis_cache
 from warehouse.models import FilterWarehouseData, OrderData, WarehouseData
 from services.gemini_services.ai_analysis import GENERAL_AI_ANALYSIS, analyze_warehouse_with_gemini
+from services.airtable.airtable_client import airtable_get, fetch_all_airtable_records, iter_airtable_pages, get_rate_limiter
+from services.airtable.airtable_sync import AirtableTableSync
+from services.airtable.rate_limiter import BACKGROUND, INTERACTIVE
+from warehouse.warehouse_snapshot import WAREHOUSE_SNAPSHOT_PATH, build_snapshot, read_snapshot, write_snapshot
+from warehouse.request_replica import REQUEST_REPLICA_FIELDS, RequestReplica, order_from_fields
+from warehouse.warehouse_locations import WarehouseLocations, location_key
 from dotenv import load_dotenv
 
 load_dotenv()
-AIRTABLE_TOKEN = os.getenv("AIRTABLE_TOKEN")
-BASE_ID = os.getenv("BASE_ID")
 WAREHOUSE_TABLE_NAME = "Warehouses" 
 ODER_TABLE_NAME = "Requests"
 
+# "delta" only asks Airtable for records modified since the last sync, "full" re-pages the table every time
+WAREHOUSE_SYNC_MODE = os.getenv("WAREHOUSE_SYNC_MODE", "delta").lower()
+WAREHOUSE_FULL_RECONCILE_SECONDS = float(os.getenv("WAREHOUSE_FULL_RECONCILE_SECONDS", "3600"))
+# Oldest warehouse snapshot that may be served while a background refresh runs
+WAREHOUSE_MAX_STALENESS_SECONDS = int(os.getenv("WAREHOUSE_MAX_STALENESS_SECONDS", "3600"))
+
+# Requests replica: delta sync cadence, and how recent a sync must be before a lookup miss triggers another
+REQUEST_REPLICA_SYNC_SECONDS = float(os.getenv("REQUEST_REPLICA_SYNC_SECONDS", "60"))
+REQUEST_REPLICA_MISS_REFRESH_SECONDS = float(os.getenv("REQUEST_REPLICA_MISS_REFRESH_SECONDS", "5"))
+REQUEST_REPLICA_FULL_RECONCILE_SECONDS = float(os.getenv("REQUEST_REPLICA_FULL_RECONCILE_SECONDS", "3600"))
+
+# Top-K nearby search: candidates routed per round (one Distance Matrix request), and the
+# speed no route beats, which turns straight-line miles into a lower bound on driving time
+# (read from NEARBY_MAX_DRIVING_MPH by the drive-time grid, whose reach uses the same speed)
+NEARBY_TOP_K_BATCH_SIZE = int(os.getenv("NEARBY_TOP_K_BATCH_SIZE", "25"))
+NEARBY_MAX_DRIVING_MPH = MAX_DRIVING_MPH
+
+# Geocoded coordinates are cached for a day; queries no provider could find for a shorter
+# while, so garbage input is turned away by the cache instead of a paid API
+GEOCODE_TTL_SECONDS = int(os.getenv("GEOCODE_TTL_SECONDS", "86400"))
+GEOCODE_NEGATIVE_TTL_SECONDS = int(os.getenv("GEOCODE_NEGATIVE_TTL_SECONDS", "3600"))
+# Cached in place of coordinates for a query that geocoded to nothing
+GEOCODE_MISS = "not_found"
+
+# Per-namespace bounds of the in-memory cache (a namespace is the key prefix before ':');
+# the least recently used entries are evicted past either limit
+MEMORY_CACHE_MAX_ENTRIES = int(os.getenv("MEMORY_CACHE_MAX_ENTRIES", "100000"))
+MEMORY_CACHE_MAX_BYTES = int(os.getenv("MEMORY_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# Warehouse views are only a few entries but each holds the whole table
+WAREHOUSE_CACHE_MAX_BYTES = int(os.getenv("WAREHOUSE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+
+
+def _fields_from_env(name: str, default: List[str]) -> List[str]:
+    value = os.getenv(name)
+    fields = [f.strip() for f in value.split(",")] if value else default
+    return list(dict.fromkeys(f for f in fields if f))
+
+WAREHOUSE_CONTACT_FIELDS = ["Contact_1", "Email_1", "Office_number", "Cell_number_1"]
+
+# Airtable columns fetched per view; None means every column (attachments, notes, thumbnails...)
+WAREHOUSE_VIEW_FIELDS: Dict[str, Optional[List[str]]] = {
+    # Nearby search: location, ranking, missing-field tags and contacts
+    "search": _fields_from_env(
+        "WAREHOUSE_SEARCH_FIELDS",
+        ["Name", "ZIP", "Tier", *FilterWarehouseData.model_fields.keys(), *WAREHOUSE_CONTACT_FIELDS],
+    ),
+    # Dashboard listings: everything but attachments and free-text notes
+    "listing": _fields_from_env(
+        "WAREHOUSE_LISTING_FIELDS",
+        ["Name", "City", "State", "ZIP", "Status", "Tier", *WAREHOUSE_CONTACT_FIELDS,
+         "Hours", "Hazmat", "Temp_Control", "Food_Grade", "Services", "Website"],
+    ),
+    "detail": None,
+}
+WAREHOUSE_VIEW_CACHE_KEYS = {
+    "search": "warehouses:search",
+    "listing": "warehouses:listing",
+    "detail": "warehouses:all",
+}
+
+
+# Containers larger than this are sized from a sample of their items
+SIZE_SAMPLE_ITEMS = 32
+
+
+def _approximate_size(value: Any) -> int:
+    """Rough retained size of a cached value in bytes.
+
+    Large containers are extrapolated from an evenly spaced sample of their
+    items, so sizing a whole warehouse view costs a few thousand calls
+    rather than a walk over every field of every record.
+    """
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        count = len(value)
+        children = [part for item in islice(value.items(), SIZE_SAMPLE_ITEMS) for part in item]
+    elif isinstance(value, (list, tuple)):
+        count = len(value)
+        children = value[::max(1, count // SIZE_SAMPLE_ITEMS)][:SIZE_SAMPLE_ITEMS]
+    elif isinstance(value, (set, frozenset)):
+        count = len(value)
+        children = list(islice(value, SIZE_SAMPLE_ITEMS))
+    else:
+        return size
+    sampled = min(count, SIZE_SAMPLE_ITEMS)
+    if sampled:
+        size += sum(_approximate_size(child) for child in children) * count // sampled
+    return size
 
 # In-memory cache for performance optimization
 class MemoryCache:
-    def __init__(self):
-        self._cache: Dict[str, Dict[str, Any]] = {}
+    """TTL cache bounded per namespace by entry count and approximate bytes, with LRU eviction.
+
+    A namespace is the key prefix before the first ':' ("coords", "warehouses");
+    each keeps its own recency order, so a burst of one kind of key never
+    evicts another kind.
+    """
+
+    def __init__(self, max_entries: int = MEMORY_CACHE_MAX_ENTRIES, max_bytes: int = MEMORY_CACHE_MAX_BYTES,
+                 limits: Optional[Dict[str, Tuple[int, int]]] = None):
+        # namespace -> key -> entry, least recently used first
+        self._cache: Dict[str, "OrderedDict[str, Dict[str, Any]]"] = {}
         self._lock = Lock()
         self._last_airtable_check = 0
         self._airtable_check_interval = 300  
+        self._default_limits = (max_entries, max_bytes)
+        # namespace -> (max entries, max bytes), overriding the defaults
+        self._limits = dict(limits or {})
+        self._bytes: Dict[str, int] = {}
+        self._evictions: Dict[str, int] = {}
     
     def _is_expired(self, entry: Dict[str, Any]) -> bool:
         return time.time() > entry.get('expires_at', 0)
+
+    @staticmethod
+    def _namespace(key: str) -> str:
+        return key.split(':', 1)[0]
+
+    def _entries(self):
+        for entries in self._cache.values():
+            yield from entries.items()
+
+    def _remove(self, namespace: str, key: str) -> None:
+        entry = self._cache[namespace].pop(key)
+        self._bytes[namespace] -= entry['size']
+
+    def _evict(self, namespace: str) -> None:
+        """Drop the namespace's least recently used entries until it fits its limits; the newest is kept."""
+        max_entries, max_bytes = self._limits.get(namespace, self._default_limits)
+        entries = self._cache[namespace]
+        while len(entries) > 1 and (len(entries) > max_entries or self._bytes[namespace] > max_bytes):
+            self._remove(namespace, next(iter(entries)))
+            self._evictions[namespace] = self._evictions.get(namespace, 0) + 1
     
+    def _get(self, key: str) -> Optional[Any]:
+        namespace = self._namespace(key)
+        entries = self._cache.get(namespace)
+        if entries and key in entries:
+            entry = entries[key]
+            if not self._is_expired(entry):
+                entries.move_to_end(key)
+                return entry['value']
+            else:
+                self._remove(namespace, key)
+        return None
+
     def get(self, key: str) -> Optional[Any]:
         with self._lock:
-            if key in self._cache:
-                entry = self._cache[key]
-                if not self._is_expired(entry):
-                    return entry['value']
-                else:
-                    del self._cache[key]
-            return None
+            return self._get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """Values of the keys that have a live entry."""
+        with self._lock:
+            found = {}
+            for key in keys:
+                value = self._get(key)
+                if value is not None:
+                    found[key] = value
+            return found
     
     def set(self, key: str, value: Any, ttl: int = 3600) -> None:
+        namespace = self._namespace(key)
+        size = _approximate_size(value) + sys.getsizeof(key)
         with self._lock:
-            self._cache[key] = {
+            entries = self._cache.setdefault(namespace, OrderedDict())
+            if key in entries:
+                self._remove(namespace, key)
+            entries[key] = {
                 'value': value,
                 'expires_at': time.time() + ttl,
-                'created_at': time.time()
+                'created_at': time.time(),
+                'size': size
             }
+            self._bytes[namespace] = self._bytes.get(namespace, 0) + size
+            self._evict(namespace)
     
     def delete(self, key: str) -> None:
         """Delete a specific cache entry."""
+        namespace = self._namespace(key)
         with self._lock:
-            self._cache.pop(key, None)
+            if key in self._cache.get(namespace, ()):
+                self._remove(namespace, key)
     
     def clear_warehouse_cache(self) -> None:
         """Clear all warehouse-related cache entries."""
         with self._lock:
-            keys_to_delete = [key for key in self._cache.keys() if key.startswith(('warehouses:', 'coords:', 'driving:'))]
-            for key in keys_to_delete:
-                del self._cache[key]
+            for namespace in ('warehouses', 'coords'):
+                self._cache.pop(namespace, None)
+                self._bytes.pop(namespace, None)
+
+    # Awaitable variants for request handlers: process memory never blocks, but a shared backend may
+    async def get_async(self, key: str) -> Optional[Any]:
+        return self.get(key)
+
+    async def get_many_async(self, keys: Iterable[str]) -> Dict[str, Any]:
+        return self.get_many(keys)
+
+    async def set_async(self, key: str, value: Any, ttl: int = 3600) -> None:
+        self.set(key, value, ttl)
+
+    async def clear_warehouse_cache_async(self) -> None:
+        self.clear_warehouse_cache()
     
     def should_check_airtable(self) -> bool:
         """Check if we should verify Airtable for updates."""
@@ -74,142 +249,532 @@ class MemoryCache:
         """Get cache statistics for monitoring."""
         with self._lock:
             current_time = time.time()
-            total_entries = len(self._cache)
-            expired_entries = sum(1 for entry in self._cache.values() if self._is_expired(entry))
-            warehouse_entries = sum(1 for key in self._cache.keys() if key.startswith('warehouses:'))
+            total_entries = sum(len(entries) for entries in self._cache.values())
+            expired_entries = sum(1 for _, entry in self._entries() if self._is_expired(entry))
+            warehouse_entries = len(self._cache.get('warehouses', ()))
+            namespaces = {}
+            for namespace in set(self._cache) | set(self._evictions):
+                max_entries, max_bytes = self._limits.get(namespace, self._default_limits)
+                namespaces[namespace] = {
+                    "entries": len(self._cache.get(namespace, ())),
+                    "approximate_bytes": self._bytes.get(namespace, 0),
+                    "evictions": self._evictions.get(namespace, 0),
+                    "max_entries": max_entries,
+                    "max_bytes": max_bytes,
+                }
             
             return {
                 'total_entries': total_entries,
                 'expired_entries': expired_entries,
                 'active_entries': total_entries - expired_entries,
                 'warehouse_entries': warehouse_entries,
+                'approximate_bytes': sum(self._bytes.values()),
+                'evictions': sum(self._evictions.values()),
+                'namespaces': namespaces,
                 'last_airtable_check': self._last_airtable_check,
                 'cache_age_hours': (current_time - self._last_airtable_check) / 3600
             }
 
+# Never moved to Redis: each worker keeps its warehouse views in sync itself, and the
+# (records, version) entries would come back from msgpack as lists
+LOCAL_ONLY_NAMESPACES = ("warehouses",)
+
+class RedisBackedCache(MemoryCache):
+    """MemoryCache whose shared namespaces (REDIS_CACHE_NAMESPACES) live in Redis.
+
+    Geocodes are shared by every worker and instance this way. Other
+    namespaces, like the warehouse views each worker keeps in sync itself,
+    stay in process memory under the usual limits. The Redis client blocks,
+    so request handlers use the `*_async` methods, which run it in a thread.
+    """
+
+    def __init__(self, redis_cache: RedisCache, namespaces: Iterable[str], **kwargs):
+        super().__init__(**kwargs)
+        self._redis = redis_cache
+        self._shared = set(namespaces)
+        for namespace in self._shared.intersection(LOCAL_ONLY_NAMESPACES):
+            print(f"Ignoring {namespace!r} in REDIS_CACHE_NAMESPACES; that cache always stays in process memory")
+            self._shared.discard(namespace)
+
+    def _is_shared(self, key: str) -> bool:
+        return self._namespace(key) in self._shared
+
+    def get(self, key: str) -> Optional[Any]:
+        if self._is_shared(key):
+            return self._redis.get(key)
+        return super().get(key)
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(keys)
+        found = super().get_many([key for key in keys if not self._is_shared(key)])
+        found.update(self._redis.get_many([key for key in keys if self._is_shared(key)]))
+        return found
+
+    def set(self, key: str, value: Any, ttl: int = 3600) -> None:
+        if self._is_shared(key):
+            self._redis.set(key, value, ttl)
+        else:
+            super().set(key, value, ttl)
+
+    def delete(self, key: str) -> None:
+        if self._is_shared(key):
+            self._redis.delete(key)
+        else:
+            super().delete(key)
+
+    def _shared_warehouse_namespaces(self) -> List[str]:
+        return [namespace for namespace in ('warehouses', 'coords') if namespace in self._shared]
+
+    def clear_warehouse_cache(self) -> None:
+        super().clear_warehouse_cache()
+        self._redis.clear(self._shared_warehouse_namespaces())
+
+    async def get_async(self, key: str) -> Optional[Any]:
+        if self._is_shared(key):
+            return await asyncio.to_thread(self._redis.get, key)
+        return super().get(key)
+
+    async def get_many_async(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(keys)
+        found = super().get_many([key for key in keys if not self._is_shared(key)])
+        shared = [key for key in keys if self._is_shared(key)]
+        if shared:
+            found.update(await asyncio.to_thread(self._redis.get_many, shared))
+        return found
+
+    async def set_async(self, key: str, value: Any, ttl: int = 3600) -> None:
+        if self._is_shared(key):
+            await asyncio.to_thread(self._redis.set, key, value, ttl)
+        else:
+            super().set(key, value, ttl)
+
+    async def clear_warehouse_cache_async(self) -> None:
+        super().clear_warehouse_cache()
+        namespaces = self._shared_warehouse_namespaces()
+        if namespaces:
+            # SCAN walks the whole keyspace; keep it off the event loop
+            await asyncio.to_thread(self._redis.clear, namespaces)
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        stats = super().get_cache_stats()
+        stats['redis'] = {**self._redis.get_stats(), "namespaces": sorted(self._shared)}
+        return stats
+
+# Coalesces concurrent cache misses so only one fetch per key is in flight
+class SingleFlight:
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run `fn` for `key`, or wait on the call already in flight and share its result."""
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(fn())
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._forget(key, f))
+        # Shield so one cancelled caller doesn't cancel the fetch for everyone else
+        return await asyncio.shield(future)
+
+    async def do_many(self, keys: Iterable[str], fn: Callable[[List[str]], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """`do` for a batch: one `fn` call fetches the keys not already in flight and returns {key: value}.
+
+        Keys another caller is already fetching are waited on instead, so
+        overlapping batches fetch each key once. Keys `fn` leaves out map to None.
+        """
+        futures = {key: self._inflight.get(key) for key in dict.fromkeys(keys)}
+        own = [key for key, future in futures.items() if future is None]
+        if own:
+            batch = asyncio.ensure_future(fn(own))
+            for key in own:
+                future = asyncio.ensure_future(self._pick(batch, key))
+                self._inflight[key] = future
+                future.add_done_callback(lambda f, key=key: self._forget(key, f))
+                futures[key] = future
+        results = await asyncio.gather(*[asyncio.shield(future) for future in futures.values()])
+        return dict(zip(futures, results))
+
+    @staticmethod
+    async def _pick(batch: Awaitable[Dict[str, Any]], key: str) -> Any:
+        return (await batch).get(key)
+
+    def _forget(self, key: str, future: asyncio.Future) -> None:
+        if self._inflight.get(key) is future:
+            del self._inflight[key]
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+def _build_cache() -> MemoryCache:
+    """In-memory by default; with CACHE_BACKEND=redis the shared namespaces go to Redis."""
+    limits = {"warehouses": (MEMORY_CACHE_MAX_ENTRIES, WAREHOUSE_CACHE_MAX_BYTES)}
+    redis_cache = get_redis_cache()
+    if redis_cache is not None:
+        return RedisBackedCache(redis_cache, REDIS_CACHE_NAMESPACES, limits=limits)
+    return MemoryCache(limits=limits)
+
 # Global cache instance
-_cache = MemoryCache()
+_cache = _build_cache()
+_singleflight = SingleFlight()
+# Keeps background refresh tasks referenced until they finish
+_background_tasks: set = set()
+# (dataset version, coordinate count) of the last snapshot written to disk
+_snapshot_signature: Optional[Tuple[str, int]] = None
+
+# Local copies of the Warehouses table, one per field projection, refreshed with delta queries
+_warehouse_syncs: Dict[str, AirtableTableSync] = {
+    view: AirtableTableSync(
+        WAREHOUSE_TABLE_NAME,
+        # Removed view parameter to fetch all warehouses regardless of view state
+        params={"fields[]": fields} if fields else {},
+        full_reconcile_interval=WAREHOUSE_FULL_RECONCILE_SECONDS,
+    )
+    for view, fields in WAREHOUSE_VIEW_FIELDS.items()
+}
+
+# Requests table indexed by Request ID, kept fresh by a background delta sync
+_request_replica = RequestReplica(AirtableTableSync(
+    ODER_TABLE_NAME,
+    params={"fields[]": REQUEST_REPLICA_FIELDS},
+    full_reconcile_interval=REQUEST_REPLICA_FULL_RECONCILE_SECONDS,
+))
+_request_replica_task: Optional[asyncio.Task] = None
+# Warehouse coordinates resolved at ingest, keyed by record ID
+_warehouse_locations = WarehouseLocations()
+# Road vs straight-line distance ratios learned from driving results
+_circuity = CircuityEstimator()
 
 class LocationRequest(BaseModel):
     zip_code: str
     radius_miles: float = 50  # default to 50 miles
 
 # Optimized async functions with caching
-async def get_coordinates_cached(zip_code: str) -> Optional[Tuple[float, float]]:
-    """Get coordinates with caching."""
-    cache_key = f"coords:{zip_code}"
-    cached = _cache.get(cache_key)
-    if cached:
-        return cached
-    
-    coords = await get_coordinates_google_async(zip_code)
-    if coords:
-        _cache.set(cache_key, coords, ttl=86400)  # 24 hours
-    return coords
-
-async def get_driving_data_cached(origin_coords: Tuple[float, float], dest_coords: Tuple[float, float], origin_zip: str, dest_zip: str) -> Optional[Dict[str, float]]:
-    """Get driving data with caching."""
-    cache_key = f"driving:{origin_zip}:{dest_zip}"
-    cached = _cache.get(cache_key)
+async def get_coordinates_cached(zip_code: str, raise_unavailable: bool = False) -> Optional[Tuple[float, float]]:
+    """Get coordinates with caching; plain US ZIPs resolve from the offline centroid table.
+
+    Inputs are normalized first, so "2134", "02134" and "02134-1234" share one
+    entry. Misses are cached too (for GEOCODE_NEGATIVE_TTL_SECONDS), unless a
+    provider failed along the way; such a miss returns None, or raises
+    GeocodingUnavailable with `raise_unavailable`.
+    """
+    query = normalize_location(zip_code)
+    if not query:
+        return None
+    local = lookup_zip_centroid(query)
+    if local:
+        return local
+
+    cache_key = f"coords:{query}"
+    cached = await _cache.get_async(cache_key)
+    if cached == GEOCODE_MISS:
+        return None
     if cached:
-        return cached
+        return tuple(cached)
     
-    result = await get_driving_distance_and_time_google(origin_coords, dest_coords)
-    if result:
-        _cache.set(cache_key, result, ttl=86400)  # 24 hours
-    return result
-
-async def batch_get_coordinates(zip_codes: List[str], max_concurrent: int = 10) -> Dict[str, Optional[Tuple[float, float]]]:
-    """Get coordinates for multiple ZIP codes concurrently."""
-    semaphore = asyncio.Semaphore(max_concurrent)
-    
-    async def get_single_coords(zip_code: str) -> Tuple[str, Optional[Tuple[float, float]]]:
-        async with semaphore:
-            coords = await get_coordinates_cached(zip_code)
-            return zip_code, coords
-    
-    tasks = [get_single_coords(zip_code) for zip_code in zip_codes]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    coordinate_map = {}
-    for result in results:
-        if isinstance(result, Exception):
-            continue
-        zip_code, coords = result
-        coordinate_map[zip_code] = coords
-    
-    return coordinate_map
+    async def fetch() -> Optional[Tuple[float, float]]:
+        coords = await geocode(query)
+        if coords:
+            await _cache.set_async(cache_key, coords, ttl=GEOCODE_TTL_SECONDS)
+        else:
+            await _cache.set_async(cache_key, GEOCODE_MISS, ttl=GEOCODE_NEGATIVE_TTL_SECONDS)
+        return coords
 
-async def batch_get_driving_data(origin_coords: Tuple[float, float], dest_coords_list: List[Tuple[float, float]], origin_zip: str, dest_zips: List[str], max_concurrent: int = 5) -> List[Optional[Dict[str, float]]]:
-    """Get driving data for multiple destinations concurrently."""
-    semaphore = asyncio.Semaphore(max_concurrent)
-    
-    async def get_single_driving(dest_coords: Tuple[float, float], dest_zip: str) -> Optional[Dict[str, float]]:
-        async with semaphore:
-            return await get_driving_data_cached(origin_coords, dest_coords, origin_zip, dest_zip)
-    
-    tasks = []
-    for i, dest_coords in enumerate(dest_coords_list):
-        dest_zip = dest_zips[i] if i < len(dest_zips) else None
-        tasks.append(get_single_driving(dest_coords, dest_zip))
-    
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    driving_data_list = []
-    for result in results:
-        if isinstance(result, Exception):
-            driving_data_list.append(None)
+    try:
+        return await _singleflight.do(cache_key, fetch)
+    except GeocodingUnavailable as e:
+        if raise_unavailable:
+            raise
+        print(f"Not caching geocoding miss: {e}")
+        return None
+
+async def _geocode_warehouse(zip_code: str) -> Optional[Tuple[float, float]]:
+    # Outages raise so WarehouseLocations retries the ZIP shortly instead of treating it as a miss
+    return await get_coordinates_cached(zip_code, raise_unavailable=True)
+
+async def _update_warehouse_locations(warehouses: list, retry_unresolved: bool = False) -> None:
+    await _warehouse_locations.update(warehouses, _geocode_warehouse, retry_unresolved=retry_unresolved,
+                                      lookup_cached=lookup_cached_coordinates)
+
+async def lookup_cached_coordinates(zip_codes: Iterable[str]) -> Dict[str, Optional[Tuple[float, float]]]:
+    """Coordinates already known for the inputs (ZIP table or cache, in one cache round trip).
+
+    Inputs missing from the result still need `get_coordinates_cached`; a
+    None value is a cached miss.
+    """
+    known: Dict[str, Optional[Tuple[float, float]]] = {}
+    cache_keys: Dict[str, str] = {}
+    for zip_code in dict.fromkeys(zip_codes):
+        query = normalize_location(zip_code)
+        local = lookup_zip_centroid(query) if query else None
+        if local or not query:
+            known[zip_code] = local
         else:
-            driving_data_list.append(result)
-    
-    return driving_data_list
+            cache_keys[zip_code] = f"coords:{query}"
+    cached = await _cache.get_many_async(cache_keys.values())
+    for zip_code, cache_key in cache_keys.items():
+        if cache_key in cached:
+            known[zip_code] = None if cached[cache_key] == GEOCODE_MISS else tuple(cached[cache_key])
+    return known
 
-async def fetch_warehouses_from_airtable(force_refresh: bool = False) -> list[any]:
-    """Fetch warehouses with smart caching and invalidation strategies."""
-    
-    # Check if we should verify Airtable for updates
-    should_check = _cache.should_check_airtable() or force_refresh
-    
-    if not should_check:
-        # Return cached data if available and not expired
-        cached_warehouses = _cache.get("warehouses:all")
-        if cached_warehouses:
-            return cached_warehouses
-    
-    # Fetch fresh data from Airtable
-    url = f"https://api.airtable.com/v0/{BASE_ID}/{WAREHOUSE_TABLE_NAME}"
-    headers = {
-        "Authorization": f"Bearer {AIRTABLE_TOKEN}"
-    }
-    params = {
-        # Removed view parameter to fetch all warehouses regardless of view state
-    }
+async def batch_get_driving_data(origin_coords: Tuple[float, float], dest_coords_list: List[Tuple[float, float]], origin_zip: str, dest_zips: List[str]) -> List[Optional[Dict[str, float]]]:
+    """Get driving data for multiple destinations.
 
-    records = []
-    async with httpx.AsyncClient() as client:
-        offset = None
-        while True:
-            if offset:
-                params["offset"] = offset
-            resp = await client.get(url, headers=headers, params=params)
-            resp.raise_for_status()
-            data = resp.json()
-            records.extend(data.get("records", []))
-            offset = data.get("offset")
-            if not offset:
-                break
+    Cached pairs are answered from the persistent per-pair driving cache; the
+    misses (one per destination ZIP) go out in Distance Matrix requests of up
+    to 25 destinations, and each result is written back to the cache.
+    """
+    return (await batch_get_driving_data_for_origins([(origin_coords, origin_zip, dest_coords_list, dest_zips)]))[0]
 
-    # Smart TTL based on data freshness
-    # Shorter TTL for more frequent checks, longer for stable data
-    ttl = 1800 if should_check else 3600  # 30 min vs 1 hour
-    
-    # Cache the result
-    _cache.set("warehouses:all", records, ttl=ttl)
+async def batch_get_driving_data_for_origins(legs: List[Tuple[Tuple[float, float], str, List[Tuple[float, float]], List[str]]]) -> List[List[Optional[Dict[str, float]]]]:
+    """`batch_get_driving_data` for several (origin coords, origin ZIP, destination coords, destination ZIPs) legs.
+
+    All legs share one cache lookup and one cache write; a pair requested by
+    several legs, or already being routed for a concurrent call, is routed
+    once, and each origin's misses go out as its own Distance Matrix row so
+    no unneeded origin/destination pairs are billed.
+    """
+    all_results: List[List[Optional[Dict[str, float]]]] = [[None] * len(dests) for _, _, dests, _ in legs]
+    # (leg, position, cache key) for every requested pair
+    pairs: List[Tuple[int, int, str]] = []
+    for leg, (origin_coords, origin_zip, dest_coords_list, dest_zips) in enumerate(legs):
+        for i, dest_coords in enumerate(dest_coords_list):
+            dest_zip = dest_zips[i] if i < len(dest_zips) else None
+            pairs.append((leg, i, f"driving:{origin_zip}:{dest_zip}" if dest_zip else f"driving:{origin_coords}:{dest_coords}"))
+    cached = await get_driving_cache().get_many(key for _, _, key in pairs)
+
+    # cache key -> (origin ZIP, origin coordinates, destination coordinates), and the (leg, position)s waiting on it
+    misses: Dict[str, Tuple[str, Tuple[float, float], Tuple[float, float]]] = {}
+    waiting: Dict[str, List[Tuple[int, int]]] = {}
+    for leg, i, cache_key in pairs:
+        if cache_key in cached:
+            all_results[leg][i] = cached[cache_key]
+            continue
+        origin_coords, origin_zip, dest_coords_list, _ = legs[leg]
+        misses.setdefault(cache_key, (origin_zip, origin_coords, dest_coords_list[i]))
+        waiting.setdefault(cache_key, []).append((leg, i))
+
+    async def route(keys: List[str]) -> Dict[str, Dict[str, float]]:
+        # One row per origin ZIP (cache keys embed it, so legs sharing an origin share a row)
+        rows: Dict[str, Tuple[Tuple[float, float], Dict[str, Tuple[float, float]]]] = {}
+        for key in keys:
+            origin_zip, origin_coords, dest_coords = misses[key]
+            rows.setdefault(origin_zip, (origin_coords, {}))[1][key] = dest_coords
+        matrices = await asyncio.gather(*[
+            get_driving_matrix_google(origin_coords, list(row.values())) for origin_coords, row in rows.values()
+        ])
+        found = {}
+        for (_, row), matrix in zip(rows.values(), matrices):
+            for key, driving_data in zip(row, matrix):
+                if driving_data:
+                    found[key] = driving_data
+        await get_driving_cache().set_many(found)
+        return found
+
+    if misses:
+        # Concurrent searches missing the same pairs share one route per pair
+        for key, driving_data in (await _singleflight.do_many(misses, route)).items():
+            if driving_data:
+                for leg, i in waiting[key]:
+                    all_results[leg][i] = driving_data
+
+    for leg, i, cache_key in pairs:
+        driving_data = all_results[leg][i]
+        if driving_data:
+            _circuity.observe(cache_key, legs[leg][0], legs[leg][2][i], driving_data)
+    return all_results
+
+def _check_view(view: str) -> None:
+    if view not in WAREHOUSE_VIEW_FIELDS:
+        raise ValueError(f"Unknown warehouse view {view!r}; expected one of {list(WAREHOUSE_VIEW_FIELDS)}")
+
+async def _refresh_warehouses(view: str = "detail", force_full: bool = False, priority: int = INTERACTIVE) -> Tuple[list, Optional[str]]:
+    """Sync with Airtable and atomically swap the new snapshot into the cache; returns (records, version)."""
+    cache_key = WAREHOUSE_VIEW_CACHE_KEYS[view]
+
+    async def refresh() -> Tuple[list, Optional[str]]:
+        # Sync with Airtable (delta unless a full reconcile is needed)
+        records = await _warehouse_syncs[view].sync(force_full=force_full, priority=priority)
+        # Read before the geocoding await below, which another sync of the view may overlap
+        version = _warehouse_syncs[view].version
+        # Geocode new and re-zipped records now so searches never have to
+        if _view_has_location(view):
+            await _update_warehouse_locations(records, retry_unresolved=_warehouse_syncs[view].last_sync_was_full)
+
+        # The snapshot stays servable until the hard staleness limit; soft refreshes happen in the background.
+        # Records and version are cached together so an ETag never describes records not yet served.
+        entry = (records, version)
+        await _cache.set_async(cache_key, entry, ttl=WAREHOUSE_MAX_STALENESS_SECONDS)
+        _run_in_background(save_warehouse_snapshot(), "warehouse snapshot save")
+        return entry
+
+    # Concurrent misses share one Airtable pagination instead of each running their own
+    return await _singleflight.do(f"{cache_key}:full" if force_full else cache_key, refresh)
+
+def _on_background_task_done(task: asyncio.Task) -> None:
+    _background_tasks.discard(task)
+    if not task.cancelled() and task.exception():
+        print(f"Background {task.get_name()} failed: {task.exception()}")
+
+def _run_in_background(coro: Awaitable[Any], name: str) -> None:
+    task = asyncio.create_task(coro, name=name)
+    _background_tasks.add(task)
+    task.add_done_callback(_on_background_task_done)
+
+def _refresh_warehouses_in_background(view: str = "detail", force_full: bool = False) -> None:
+    _run_in_background(_refresh_warehouses(view, force_full, BACKGROUND), "warehouse refresh")
+
+def _view_has_location(view: str) -> bool:
+    fields = WAREHOUSE_VIEW_FIELDS[view]
+    return fields is None or "ZIP" in fields
+
+def _collect_snapshot() -> Dict[str, Any]:
+    views = {view: sync.export_state() for view, sync in _warehouse_syncs.items() if sync.has_data}
+    return build_snapshot(views, _warehouse_locations.export_state())
+
+async def save_warehouse_snapshot() -> bool:
+    """Persist synced warehouse views and their geocoded locations; skipped when nothing changed."""
+    if not WAREHOUSE_SNAPSHOT_PATH:
+        return False
+    # Saves triggered while one is running join it instead of writing the file twice
+    return await _singleflight.do("snapshot:save", _save_warehouse_snapshot)
+
+async def _save_warehouse_snapshot() -> bool:
+    global _snapshot_signature
+    snapshot = _collect_snapshot()
+    signature = (snapshot["version"], len(snapshot["locations"]))
+    if not snapshot["views"] or signature == _snapshot_signature:
+        return False
+    try:
+        await asyncio.to_thread(write_snapshot, snapshot, WAREHOUSE_SNAPSHOT_PATH)
+    except OSError as e:
+        print(f"Could not write warehouse snapshot {WAREHOUSE_SNAPSHOT_PATH}: {e}")
+        return False
+    _snapshot_signature = signature
+    return True
+
+async def load_warehouse_snapshot() -> bool:
+    """Seed the warehouse caches from the on-disk snapshot so a fresh worker can serve before syncing.
+
+    Returns whether any view is servable; views synced longer than
+    WAREHOUSE_MAX_STALENESS_SECONDS ago are not.
+    """
+    global _snapshot_signature
+    if not WAREHOUSE_SNAPSHOT_PATH:
+        return False
+    snapshot = await asyncio.to_thread(read_snapshot, WAREHOUSE_SNAPSHOT_PATH)
+    if not snapshot:
+        return False
+
+    restored = loaded = False
+    for view, state in snapshot.get("views", {}).items():
+        sync = _warehouse_syncs.get(view)
+        if sync and sync.restore_state(state):
+            restored = True
+            # Servable only for what is left of the hard staleness limit, counted from the view's last sync;
+            # an expired view still restores its sync state, so the first refresh is a delta query
+            age = time.time() - state["watermark"]
+            if age < WAREHOUSE_MAX_STALENESS_SECONDS:
+                await _cache.set_async(WAREHOUSE_VIEW_CACHE_KEYS[view], (sync.records, sync.version),
+                                       ttl=WAREHOUSE_MAX_STALENESS_SECONDS - age)
+                loaded = True
+            else:
+                print(f"Not serving the snapshot's {view} view: synced {age / 3600:.1f} hours ago")
+    _warehouse_locations.restore_state(snapshot.get("locations", {}))
+
+    if restored:
+        _snapshot_signature = (snapshot["version"], len(snapshot.get("locations", {})))
+    return loaded
+
+async def fetch_warehouses_from_airtable(force_refresh: bool = False, full_sync: bool = False, view: str = "detail", priority: int = INTERACTIVE) -> list[any]:
+    """Fetch warehouses with smart caching and invalidation strategies.
+
+    `view` selects a field projection ("search", "listing" or "detail"); each
+    view only requests its columns from Airtable and is cached separately.
+
+    Stale-while-revalidate: once the snapshot is older than the Airtable check
+    interval it is still returned immediately while a background task refreshes
+    it. Callers only block when there is no snapshot, it is older than
+    WAREHOUSE_MAX_STALENESS_SECONDS, or a refresh is forced.
+
+    Refreshes are incremental: only records modified since the last sync are
+    requested unless a full reconcile is due, forced via `full_sync`, or
+    WAREHOUSE_SYNC_MODE is "full". `priority` is the Airtable rate-limiter
+    priority of a blocking refresh.
+    """
+    records, _ = await fetch_warehouses_with_version(force_refresh, full_sync, view, priority)
     return records
 
+async def fetch_warehouses_with_version(force_refresh: bool = False, full_sync: bool = False, view: str = "detail", priority: int = INTERACTIVE) -> Tuple[list, Optional[str]]:
+    """`fetch_warehouses_from_airtable` plus the content version of exactly those records.
+
+    The version is identical across workers holding the same data, so it can
+    back a strong ETag.
+    """
+    _check_view(view)
+    force_full = full_sync or WAREHOUSE_SYNC_MODE == "full"
+
+    if not (force_refresh or full_sync):
+        # Expires from the cache once older than the hard staleness limit
+        cached = await _cache.get_async(WAREHOUSE_VIEW_CACHE_KEYS[view])
+        if cached is not None:
+            # Check if we should verify Airtable for updates
+            if _cache.should_check_airtable():
+                for loaded_view, sync in _warehouse_syncs.items():
+                    if loaded_view == view or sync.has_data:
+                        _refresh_warehouses_in_background(loaded_view, force_full)
+            return cached
+
+    return await _refresh_warehouses(view, force_full, priority)
+
+async def iter_warehouse_pages(view: str = "detail", page_size: int = 100) -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield the (cached) warehouse records of a view in pages for streaming responses."""
+    records = await fetch_warehouses_from_airtable(view=view)
+    for start in range(0, len(records), page_size):
+        yield records[start:start + page_size]
+
+class InvalidCursor(ValueError):
+    pass
+
+def _encode_cursor(record_id: str) -> str:
+    return base64.urlsafe_b64encode(record_id.encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> str:
+    try:
+        return base64.b64decode(cursor + "=" * (-len(cursor) % 4), altchars=b"-_", validate=True).decode()
+    except (ValueError, UnicodeDecodeError):
+        raise InvalidCursor(f"Invalid cursor {cursor!r}")
+
+# (records list, records sorted by id, sorted ids) for the last snapshot paginated
+_page_index: Optional[Tuple[list, list, List[str]]] = None
+
+def paginate_warehouses(records: list, limit: int, cursor: Optional[str] = None) -> Tuple[list, Optional[str]]:
+    """Return the page after `cursor` plus the cursor of the next page (None on the last page).
+
+    Cursors are keyset positions on the record ID, so pages stay consistent
+    when records are added or removed between calls.
+    """
+    global _page_index
+    if _page_index is None or _page_index[0] is not records:
+        ordered = sorted(records, key=lambda rec: rec["id"])
+        _page_index = (records, ordered, [rec["id"] for rec in ordered])
+    _, ordered, ids = _page_index
+
+    start = bisect.bisect_right(ids, _decode_cursor(cursor)) if cursor else 0
+    page = ordered[start:start + limit]
+    next_cursor = _encode_cursor(page[-1]["id"]) if start + limit < len(ordered) else None
+    return page, next_cursor
+
+async def refresh_warehouse_views(full_sync: bool = False) -> Dict[str, int]:
+    """Force-refresh the detail view and every other view that has been loaded; returns record counts."""
+    views = [view for view, sync in _warehouse_syncs.items() if view == "detail" or sync.has_data]
+    results = await asyncio.gather(*[
+        fetch_warehouses_from_airtable(force_refresh=True, full_sync=full_sync, view=view, priority=BACKGROUND)
+        for view in views
+    ])
+    return {view: len(records) for view, records in zip(views, results)}
+
 async def invalidate_warehouse_cache() -> Dict[str, Any]:
-    """Manually invalidate warehouse cache."""
-    _cache.clear_warehouse_cache()
+    """Manually invalidate warehouse cache; geocoded warehouse locations are kept."""
+    await _cache.clear_warehouse_cache_async()
     return {"status": "success", "message": "Warehouse cache cleared"}
 
 async def get_cache_status() -> Dict[str, Any]:
@@ -217,6 +782,16 @@ async def get_cache_status() -> Dict[str, Any]:
     stats = _cache.get_cache_stats()
     return {
         "cache_stats": stats,
+        "warehouse_sync": {view: sync.get_stats() for view, sync in _warehouse_syncs.items()},
+        "in_flight_fetches": _singleflight.in_flight(),
+        "airtable_rate_limiter": get_rate_limiter().get_stats(),
+        "request_replica": _request_replica.get_stats(),
+        "geocoders": get_geocoder().get_stats(),
+        "warehouse_locations": _warehouse_locations.get_stats(),
+        "driving_cache": get_driving_cache().get_stats(),
+        "circuity": _circuity.get_stats(),
+        "google_maps_executor": get_google_maps_executor().get_stats(),
+        "drive_time_grid": get_drive_time_grid().get_stats(),
         "recommendations": _get_cache_recommendations(stats)
     }
 
@@ -233,6 +808,10 @@ def _get_cache_recommendations(stats: Dict[str, Any]) -> List[str]:
     if stats['warehouse_entries'] == 0:
         recommendations.append("No warehouse data cached - may need manual refresh")
     
+    for namespace, usage in stats.get('namespaces', {}).items():
+        if usage['evictions']:
+            recommendations.append(f"Cache namespace '{namespace}' is evicting entries - consider raising its limits")
+    
     return recommendations
 
 # Find nearby warehouses (openStreetMap)
@@ -253,74 +832,54 @@ def find_missing_fields(fields: dict) -> List[str]:
             missing.append(field_name)
     return missing
 
-from services.geolocation.geolocation_service import (
-    get_coordinates_mapbox,
-    get_coordinates_google,
-    get_driving_distance_and_time_google,
-    haversine,
-)
+from services.geolocation.spatial_index import SpatialIndex
 
-async def find_nearby_warehouses(origin_zip: str, radius_miles: float):
-    """Optimized version with caching and batch processing."""
-    origin_coords = get_coordinates_mapbox(origin_zip)
-    if not origin_coords:
-        return {"error": "Invalid ZIP code"}
+# (search records, locations revision, [(record, zip, coords)], SpatialIndex) for the last dataset searched
+_search_points: Optional[Tuple[list, int, list, SpatialIndex]] = None
 
-    warehouses: List[WarehouseData] = await fetch_warehouses_from_airtable()
-    
-    # Extract unique ZIP codes and filter warehouses
-    unique_zips = set()
-    valid_warehouses = []
-    
-    for wh in warehouses:
-        wh_zip = wh["fields"].get("ZIP")
-        if wh_zip:
-            unique_zips.add(wh_zip)
-            valid_warehouses.append(wh)
-    
-    # Batch get coordinates for all unique ZIP codes
-    zip_coords_map = await batch_get_coordinates(list(unique_zips), max_concurrent=10)
-    
-    # Pre-filter warehouses using Haversine distance
-    candidate_warehouses = []
-    for wh in valid_warehouses:
-        wh_zip = wh["fields"].get("ZIP")
-        wh_coords = zip_coords_map.get(wh_zip)
-        
-        if not wh_coords:
-            continue
-            
-        # Fast pre-filter with Haversine
-        straight_line_miles = haversine(
-            origin_coords[0], origin_coords[1],
-            wh_coords[0], wh_coords[1]
-        )
-        
-        if straight_line_miles <= radius_miles * 2:  # 2x buffer for driving distance
-            candidate_warehouses.append({
-                'warehouse': wh,
-                'coordinates': wh_coords,
-                'zip': wh_zip
-            })
-    
-    if not candidate_warehouses:
-        return {"origin_zip": origin_zip, "warehouses": [], "ai_analysis": GENERAL_AI_ANALYSIS}
-    
-    # Batch get driving data for candidates
-    dest_coords_list = [candidate['coordinates'] for candidate in candidate_warehouses]
-    dest_zips = [candidate['zip'] for candidate in candidate_warehouses]
-    
-    driving_results = await batch_get_driving_data(
-        origin_coords, 
-        dest_coords_list,
-        origin_zip,
-        dest_zips,
-        max_concurrent=5
-    )
-    
-    # Process results and build final list
-    nearby: List[WarehouseData] = []
-    for i, candidate in enumerate(candidate_warehouses):
+def _get_search_points(warehouses: list) -> Tuple[list, SpatialIndex]:
+    """Warehouses with known coordinates plus their spatial index, rebuilt only when the data changes.
+
+    The entries and the index are swapped in as one tuple, so a search never
+    sees an index built over a different record list.
+    """
+    global _search_points
+    revision = _warehouse_locations.revision
+    if _search_points is None or _search_points[0] is not warehouses or _search_points[1] != revision:
+        entries = []
+        for wh in warehouses:
+            wh_coords = _warehouse_locations.get(wh["id"])
+            if wh_coords:
+                entries.append((wh, location_key(wh["fields"]), wh_coords))
+        _search_points = (warehouses, revision, entries, SpatialIndex([coords for _, _, coords in entries]))
+    return _search_points[2], _search_points[3]
+
+def _rank_key(wh: Dict[str, Any]) -> Tuple[int, float, float]:
+    return (wh["tier_rank"], wh["duration_minutes"], wh["distance_miles"])
+
+def _classify_candidates(origin_coords: Tuple[float, float], radius_miles: float, candidates: List[Dict[str, Any]], estimate: bool, max_drive_minutes: Optional[float] = None) -> Tuple[List[Optional[Dict[str, Any]]], List[int]]:
+    """Driving data settled without routing (estimates, drive-time grid), plus the positions that still need a route."""
+    driving_results: List[Optional[Dict[str, Any]]] = [None] * len(candidates)
+    routed = []
+    grid = get_drive_time_grid() if max_drive_minutes is not None else None
+    for i, candidate in enumerate(candidates):
+        if grid is not None:
+            # Drive-time mode: the precomputed grid settles everything but the band around the limit
+            status, grid_data = grid.classify(candidate['zip'], origin_coords, max_drive_minutes)
+            if status == INCLUDE:
+                driving_results[i] = {**grid_data, "estimated": True}
+            elif status != EXCLUDE:
+                routed.append(i)
+        elif estimate and _circuity.classify(origin_coords, candidate['straight_miles'], radius_miles) == INCLUDE:
+            driving_results[i] = _circuity.estimate(origin_coords, candidate['straight_miles'])
+        else:
+            routed.append(i)
+    return driving_results, routed
+
+def _build_results(radius_miles: float, candidates: List[Dict[str, Any]], driving_results: List[Optional[Dict[str, Any]]], max_drive_minutes: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Result entries for the candidates within `radius_miles` (or `max_drive_minutes`)."""
+    nearby: List[Dict[str, Any]] = []
+    for i, candidate in enumerate(candidates):
         driving_data = driving_results[i]
         if not driving_data:
             continue
@@ -328,19 +887,141 @@ async def find_nearby_warehouses(origin_zip: str, radius_miles: float):
         distance_miles = driving_data["distance_miles"]
         duration_minutes = driving_data["duration_minutes"]
         
-        if distance_miles <= radius_miles:
+        if max_drive_minutes is not None:
+            within = duration_minutes <= max_drive_minutes
+        else:
+            within = distance_miles <= radius_miles
+        if within:
             wh = candidate['warehouse']
             wh_copy = copy.copy(wh)
             wh_copy["distance_miles"] = distance_miles
             wh_copy["duration_minutes"] = duration_minutes
-            wh_copy["tier_rank"] = _tier_rank(wh["fields"].get("Tier"))
+            wh_copy["estimated"] = bool(driving_data.get("estimated"))
+            wh_copy["tier_rank"] = candidate['tier_rank']
             wh_copy["tags"] = find_missing_fields(wh["fields"])
             wh_copy["has_missed_fields"] = bool(wh_copy["tags"])
             
             nearby.append(wh_copy)
+    return nearby
+
+async def _resolve_candidates(origin_coords: Tuple[float, float], origin_zip: str, radius_miles: float, candidates: List[Dict[str, Any]], estimate: bool, max_drive_minutes: Optional[float] = None) -> List[Dict[str, Any]]:
+    """Driving data for `candidates`; returns the ones within `radius_miles` (or `max_drive_minutes`) as result entries."""
+    driving_results, routed = _classify_candidates(origin_coords, radius_miles, candidates, estimate, max_drive_minutes)
+    
+    # Batch get driving data for the candidates that need a route
+    if routed:
+        routed_results = await batch_get_driving_data(
+            origin_coords, 
+            [candidates[i]['coordinates'] for i in routed],
+            origin_zip,
+            [candidates[i]['zip'] for i in routed]
+        )
+        for i, driving_data in zip(routed, routed_results):
+            driving_results[i] = driving_data
+    return _build_results(radius_miles, candidates, driving_results, max_drive_minutes)
+
+async def _top_k(origin_coords: Tuple[float, float], origin_zip: str, radius_miles: float, candidates: List[Dict[str, Any]], estimate: bool, limit: int, max_drive_minutes: Optional[float] = None) -> List[Dict[str, Any]]:
+    """The first `limit` results, routing candidates in batches until the rest can't outrank them.
+
+    Candidates are visited by (tier rank, lower bound on driving time). Once
+    the K-th result ranks ahead of the next candidate's best possible key,
+    no remaining candidate can enter the top K and the search stops.
+    """
+    # Geometric floor only: the learned circuity `low` is a percentile some routes beat,
+    # and a bound that a route can beat could stop before a better warehouse is routed
+    for candidate in candidates:
+        candidate['min_duration'] = candidate['straight_miles'] / NEARBY_MAX_DRIVING_MPH * 60
+    ordered = sorted(candidates, key=lambda c: (c['tier_rank'], c['min_duration']))
+
+    nearby: List[Dict[str, Any]] = []
+    for start in range(0, len(ordered), NEARBY_TOP_K_BATCH_SIZE):
+        batch = ordered[start:start + NEARBY_TOP_K_BATCH_SIZE]
+        nearby.extend(await _resolve_candidates(origin_coords, origin_zip, radius_miles, batch, estimate, max_drive_minutes))
+        nearby.sort(key=_rank_key)
+
+        following = start + NEARBY_TOP_K_BATCH_SIZE
+        if len(nearby) >= limit and following < len(ordered):
+            kth = _rank_key(nearby[limit - 1])
+            best_remaining = (ordered[following]['tier_rank'], ordered[following]['min_duration'])
+            if kth[:2] < best_remaining:
+                break
+    return nearby[:limit]
+
+def _search_radius(radius_miles: float, max_drive_minutes: Optional[float]) -> float:
+    """Driving miles a search can reach; in drive-time mode, what NEARBY_MAX_DRIVING_MPH covers in the time."""
+    if max_drive_minutes is not None:
+        return max_drive_minutes / 60 * NEARBY_MAX_DRIVING_MPH
+    return radius_miles
+
+def _prefilter_radius(origin_coords: Tuple[float, float], radius_miles: float, estimate: bool) -> float:
+    """Straight-line miles that can still be within `radius_miles` by road.
+
+    No road is shorter than the straight line, so exact searches use the radius
+    itself. Estimated searches also divide by the learned circuity floor, but
+    only the origin region's own: the all-regions fallback reflects other roads.
+    """
+    fit = _circuity.regional_fit(origin_coords) if estimate else None
+    return radius_miles / fit.low if fit else radius_miles
+
+def _candidates_from_matches(entries: list, indices: np.ndarray, straight_miles: np.ndarray) -> List[Dict[str, Any]]:
+    """Candidate dicts for the spatial index matches, in dataset order."""
+    candidates = []
+    for j in np.argsort(indices, kind="stable"):
+        wh, wh_zip, wh_coords = entries[indices[j]]
+        candidates.append({
+            'warehouse': wh,
+            'coordinates': wh_coords,
+            'zip': wh_zip,
+            'straight_miles': float(straight_miles[j]),
+            'tier_rank': _tier_rank(wh["fields"].get("Tier"))
+        })
+    return candidates
+
+async def find_nearby_warehouses(origin_zip: str, radius_miles: float, estimate: bool = False, limit: Optional[int] = None, max_drive_minutes: Optional[float] = None):
+    """Optimized version with caching and batch processing.
+
+    Warehouses whose straight-line distance already rules them out are never
+    routed. With `estimate`, that pre-filter also applies the learned road
+    circuity of the origin's region, warehouses that are certainly within the
+    radius get an estimated distance and time (`estimated: true`) and only
+    the ambiguous band is sent to the routing provider. With `limit`, only the top `limit`
+    warehouses are returned and routing stops as soon as they are final.
+    With `max_drive_minutes`, the drive time replaces the mileage radius and
+    warehouses are included or excluded from the precomputed drive-time grid
+    (`estimated: true`); only those near the limit are routed live.
+    """
+    origin_coords = await get_coordinates_cached(origin_zip)
+    if not origin_coords:
+        return {"error": "Invalid ZIP code"}
+    if max_drive_minutes is not None:
+        # Picks up a grid the refresh job rewrote; this search uses the one already loaded
+        reload_drive_time_grid_in_background()
+    # Driving results are cached under the normalized ZIP, like the warehouse side
+    origin_key = normalize_location(origin_zip)
+
+    warehouses: List[WarehouseData] = await fetch_warehouses_from_airtable(view="search")
+    
+    # Records are geocoded at ingest; this only runs for a snapshot that wasn't (e.g. restored
+    # from disk) or once ZIPs that failed during a geocoder outage are due a retry
+    if _warehouse_locations.needs_update(warehouses):
+        await _update_warehouse_locations(warehouses)
+    
+    # Pre-filter with a spatial index radius query: no road is shorter than the straight line
+    # (and in drive-time mode, no route is faster than NEARBY_MAX_DRIVING_MPH)
+    radius_miles = _search_radius(radius_miles, max_drive_minutes)
+    entries, points = _get_search_points(warehouses)
+    indices, straight_miles = points.query(origin_coords, _prefilter_radius(origin_coords, radius_miles, estimate))
+    candidate_warehouses = _candidates_from_matches(entries, indices, straight_miles)
+    
+    if not candidate_warehouses:
+        return {"origin_zip": origin_zip, "warehouses": [], "ai_analysis": GENERAL_AI_ANALYSIS}
     
-    # Sort final list
-    nearby.sort(key=lambda x: (x["tier_rank"], x["duration_minutes"], x["distance_miles"]))
+    if limit:
+        nearby = await _top_k(origin_coords, origin_key, radius_miles, candidate_warehouses, estimate, limit, max_drive_minutes)
+    else:
+        nearby = await _resolve_candidates(origin_coords, origin_key, radius_miles, candidate_warehouses, estimate, max_drive_minutes)
+        # Sort final list
+        nearby.sort(key=_rank_key)
 
     # AI analysis with fallback
     try:
@@ -350,77 +1031,163 @@ async def find_nearby_warehouses(origin_zip: str, radius_miles: float):
 
     return {"origin_zip": origin_zip, "warehouses": nearby, "ai_analysis": ai_analysis}
 
-import httpx
+async def find_nearby_warehouses_batch(origins: List[Dict[str, Any]], estimate: bool = False, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """`find_nearby_warehouses` for several origins, one result per origin in request order.
+
+    Each origin is a dict with `zip_code` and optionally `radius_miles`
+    (default 50) or `max_drive_minutes`. The origins share one warehouse
+    snapshot, one pre-filter distance pass and, without `limit`, one
+    deduplicated routing round. Results are ranked like the single search
+    but carry no AI analysis.
+    """
+    # Origins already in the cache are read in one round trip; the rest are geocoded concurrently
+    known = await lookup_cached_coordinates(origin["zip_code"] for origin in origins)
+
+    async def origin_coordinates(zip_code: str) -> Optional[Tuple[float, float]]:
+        return known[zip_code] if zip_code in known else await get_coordinates_cached(zip_code)
+
+    origin_coords_list = await asyncio.gather(*[origin_coordinates(origin["zip_code"]) for origin in origins])
+    if any(origin.get("max_drive_minutes") is not None for origin in origins):
+        reload_drive_time_grid_in_background()
+
+    warehouses: List[WarehouseData] = await fetch_warehouses_from_airtable(view="search")
+    if _warehouse_locations.needs_update(warehouses):
+        await _update_warehouse_locations(warehouses)
+    entries, points = _get_search_points(warehouses)
+
+    # (position in `origins`, origin coords, normalized ZIP, search radius, max drive minutes)
+    searches = []
+    for position, (origin, origin_coords) in enumerate(zip(origins, origin_coords_list)):
+        if origin_coords:
+            max_drive_minutes = origin.get("max_drive_minutes")
+            radius_miles = _search_radius(origin.get("radius_miles", 50), max_drive_minutes)
+            searches.append((position, origin_coords, normalize_location(origin["zip_code"]), radius_miles, max_drive_minutes))
+    matches = points.query_many(
+        [origin_coords for _, origin_coords, _, _, _ in searches],
+        [_prefilter_radius(origin_coords, radius_miles, estimate) for _, origin_coords, _, radius_miles, _ in searches],
+    )
+    candidate_lists = [_candidates_from_matches(entries, indices, straight_miles) for indices, straight_miles in matches]
+
+    if limit:
+        nearby_lists = await asyncio.gather(*[
+            _top_k(origin_coords, origin_key, radius_miles, candidates, estimate, limit, max_drive_minutes)
+            for (_, origin_coords, origin_key, radius_miles, max_drive_minutes), candidates in zip(searches, candidate_lists)
+        ])
+    else:
+        # Classify every origin first so the remaining routes go out together
+        classified = [
+            _classify_candidates(origin_coords, radius_miles, candidates, estimate, max_drive_minutes)
+            for (_, origin_coords, _, radius_miles, max_drive_minutes), candidates in zip(searches, candidate_lists)
+        ]
+        legs = [
+            (origin_coords, origin_key, [candidates[i]['coordinates'] for i in routed], [candidates[i]['zip'] for i in routed])
+            for (_, origin_coords, origin_key, _, _), candidates, (_, routed) in zip(searches, candidate_lists, classified)
+        ]
+        routed_results = await batch_get_driving_data_for_origins(legs) if any(leg[2] for leg in legs) else [[] for _ in legs]
+        nearby_lists = []
+        for (_, _, _, radius_miles, max_drive_minutes), candidates, (driving_results, routed), leg_results in zip(searches, candidate_lists, classified, routed_results):
+            for i, driving_data in zip(routed, leg_results):
+                driving_results[i] = driving_data
+            nearby = _build_results(radius_miles, candidates, driving_results, max_drive_minutes)
+            nearby.sort(key=_rank_key)
+            nearby_lists.append(nearby)
+
+    results: List[Dict[str, Any]] = [
+        {"origin_zip": origin["zip_code"], "error": "Invalid ZIP code"} for origin in origins
+    ]
+    for (position, _, _, _, _), nearby in zip(searches, nearby_lists):
+        results[position] = {"origin_zip": origins[position]["zip_code"], "warehouses": nearby}
+    return results
+
+async def refresh_drive_time_grid(max_age: Optional[float] = None) -> int:
+    """Rebuild missing, incomplete or stale drive-time grids around the warehouses and save the result.
+
+    Meant to run offline (`python -m warehouse.refresh_drive_time_grid`);
+    searches only read the saved grid. The grid is saved every
+    DRIVE_TIME_GRID_SAVE_EVERY builds and when the run stops, so an
+    interrupted run keeps the routing it paid for. Returns how many grids were built.
+    """
+    warehouses: List[WarehouseData] = await fetch_warehouses_from_airtable(view="search")
+    if _warehouse_locations.needs_update(warehouses):
+        await _update_warehouse_locations(warehouses)
+    locations = _warehouse_locations.by_location_key()
+
+    grid = await load_drive_time_grid()
+    grid.prune(locations)
+    built = 0
+    try:
+        for key in (grid.stale(locations) if max_age is None else grid.stale(locations, max_age)):
+            try:
+                if await grid.build(key, locations[key]):
+                    built += 1
+                    if built % DRIVE_TIME_GRID_SAVE_EVERY == 0:
+                        await asyncio.to_thread(save_drive_time_grid)
+                else:
+                    print(f"No drive times could be routed around warehouse ZIP {key}")
+            except Exception as e:
+                print(f"Error building drive-time grid for warehouse ZIP {key}: {e}")
+    finally:
+        await asyncio.to_thread(save_drive_time_grid)
+    return built
+
+async def _sync_request_replica_forever(interval: float) -> None:
+    while True:
+        try:
+            await _request_replica.refresh(priority=BACKGROUND)
+        except Exception as e:
+            print(f"Request replica sync failed: {e}")
+        await asyncio.sleep(interval)
+
+def start_request_replica_sync(interval: float = REQUEST_REPLICA_SYNC_SECONDS) -> None:
+    """Start the periodic delta sync of the Requests replica (called from the app lifespan)."""
+    global _request_replica_task
+    if _request_replica_task is None or _request_replica_task.done():
+        _request_replica_task = asyncio.create_task(_sync_request_replica_forever(interval))
+
+async def stop_request_replica_sync() -> None:
+    global _request_replica_task
+    if _request_replica_task is not None:
+        _request_replica_task.cancel()
+        try:
+            await _request_replica_task
+        except asyncio.CancelledError:
+            pass
+        _request_replica_task = None
 
 async def fetch_orders_by_requestid_from_airtable(request_id: int) -> List[OrderData]:
-    url = f"https://api.airtable.com/v0/{BASE_ID}/{ODER_TABLE_NAME}"
-    headers = {
-        "Authorization": f"Bearer {AIRTABLE_TOKEN}"
-    }
+    """Look up orders by Request ID in the local replica, querying Airtable only until it is ready."""
+    if _request_replica.ready:
+        orders = _request_replica.get(request_id)
+        if not orders:
+            # The request may be newer than the last sync; a delta sync is cheap and coalesced
+            await _request_replica.refresh(max_age=REQUEST_REPLICA_MISS_REFRESH_SECONDS)
+            orders = _request_replica.get(request_id)
+        return orders
+
     params = {
         "filterByFormula": f"{{Request ID}} = {request_id}",
         # Removed view parameter to fetch all orders regardless of view state
     }
 
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url, headers=headers, params=params)
-        resp.raise_for_status()
-        data = resp.json()
+    data = await airtable_get(ODER_TABLE_NAME, params)
 
     records = data.get("records", [])
     if not records:
         return []  # return empty list if no matches
 
-    results: List[OrderData] = []
-
-    for record in records:
-        fields = record.get("fields", {})
-
-        request_images: List[str] = []
-        raw_images = fields.get("BOL & Pictures")
-
-        if isinstance(raw_images, str):
-            # Case: "filename (url), filename (url)"
-            request_images = re.findall(r"\((https?://[^\)]+)\)", raw_images)
-
-        elif isinstance(raw_images, list):
-            # Case: array of objects with "url"
-            for img in raw_images:
-                if isinstance(img, dict) and "url" in img:
-                    request_images.append(img["url"])
-
-        results.append(
-            OrderData(
-                commodity=fields.get("Commodity"),
-                loading_method=fields.get("Loading Style"),
-                request_images=request_images
-            )
-        )
-
-    return results
+    return [order_from_fields(record.get("fields", {})) for record in records]
 
 
 async def fetch_orders_from_airtable():
-    url = f"https://api.airtable.com/v0/{BASE_ID}/{ODER_TABLE_NAME}"
-    headers = {
-        "Authorization": f"Bearer {AIRTABLE_TOKEN}"
-    }
     params = {
         # Removed view parameter to fetch all orders regardless of view state
     }
+    return await fetch_all_airtable_records(ODER_TABLE_NAME, params)
 
-    records = []
-    async with httpx.AsyncClient() as client:
-        offset = None
-        while True:
-            if offset:
-                params["offset"] = offset
-            resp = await client.get(url, headers=headers, params=params)
-            resp.raise_for_status()
-            data = resp.json()
-            records.extend(data.get("records", []))
-            offset = data.get("offset")
-            if not offset:
-                break
-    
-    return records
\ No newline at end of file
+async def iter_orders_from_airtable() -> AsyncIterator[List[Dict[str, Any]]]:
+    """Yield Requests records page by page as Airtable returns them."""
+    params = {
+        # Removed view parameter to fetch all orders regardless of view state
+    }
+    async for page in iter_airtable_pages(ODER_TABLE_NAME, params):
+        yield page
@@ -0,0 +1,64 @@
+import os
+import gzip
+import json
+import time
+import hashlib
+import tempfile
+from typing import Any, Dict, Optional
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Where the warehouse snapshot is persisted between restarts; empty disables it
+WAREHOUSE_SNAPSHOT_PATH = os.getenv("WAREHOUSE_SNAPSHOT_PATH", ".cache/warehouse_snapshot.json.gz")
+
+SNAPSHOT_FORMAT = 2
+
+
+def dataset_version(view_versions: Dict[str, Optional[str]]) -> str:
+    """Single version string covering every persisted view."""
+    joined = ",".join(f"{view}={version}" for view, version in sorted(view_versions.items()))
+    return hashlib.sha1(joined.encode()).hexdigest()[:16]
+
+
+def build_snapshot(views: Dict[str, Dict[str, Any]], locations: Dict[str, Any]) -> Dict[str, Any]:
+    """`locations` maps record IDs to the [ZIP, lat, lon] they were geocoded to at ingest."""
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "saved_at": time.time(),
+        "version": dataset_version({view: state.get("version") for view, state in views.items()}),
+        "views": views,
+        "locations": locations,
+    }
+
+
+def write_snapshot(snapshot: Dict[str, Any], path: str = WAREHOUSE_SNAPSHOT_PATH) -> None:
+    """Write the snapshot as gzipped compact JSON, replacing the old file atomically."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    # Unique temp file so concurrent writers (other workers) never interleave
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8", compresslevel=5) as f:
+            json.dump(snapshot, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def read_snapshot(path: str = WAREHOUSE_SNAPSHOT_PATH) -> Optional[Dict[str, Any]]:
+    """Read a snapshot written by `write_snapshot`; None if missing, unreadable or from another format."""
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable warehouse snapshot {path}: {e}")
+        return None
+    if snapshot.get("format") != SNAPSHOT_FORMAT:
+        return None
+    return snapshot